@@ -216,8 +216,9 @@ export class FileAnalysisProcessor {
   ): Promise<FileAnalysisResult> {
     const formData = new FormData();
     const blob = new Blob([fileBuffer as BlobPart], { type: `application/${fileType}` });
-    formData.append('file', blob, fileName);
+    // Fields before the file: the worker reads the upload as a stream
     formData.append('options', JSON.stringify(analysisOptions || {}));
+    formData.append('file', blob, fileName);
 
     try {
       // Update progress periodically while waiting for worker
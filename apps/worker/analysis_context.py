@@ -0,0 +1,37 @@
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import telemetry
+
+# name -> (names of the values it is computed from, function taking those values)
+Providers = Dict[str, Tuple[Sequence[str], Callable[..., Any]]]
+
+
+class AnalysisContext:
+    """
+    Lazily computed, memoized values for one analyzed file.
+
+    Each value is declared with the values it depends on; ``get`` computes a
+    value and its dependencies on first use only, so metrics that share an
+    intermediate (the parsed mesh, a triangle summary) compute it once and
+    metrics nobody asks for cost nothing.
+
+    Each computation is timed as a telemetry stage named after the value
+    (or its entry in ``stage_names``), excluding its dependencies.
+    """
+
+    def __init__(self, providers: Providers, stage_names: Optional[Dict[str, str]] = None):
+        self.providers = providers
+        self.stage_names = stage_names or {}
+        self._values: Dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        if name not in self._values:
+            dependencies, compute = self.providers[name]
+            arguments = [self.get(dependency) for dependency in dependencies]
+            with telemetry.stage(self.stage_names.get(name, name)):
+                self._values[name] = compute(*arguments)
+        return self._values[name]
+
+    def peek(self, name: str) -> Any:
+        """The value if it has been computed, else None (without computing it)."""
+        return self._values.get(name)
@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import resource
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("process", "thread")
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool already holds the maximum number of running and queued jobs."""
+
+
+class AnalysisTimeoutError(Exception):
+    """Raised when a job exceeds the per-job timeout."""
+
+
+class WorkerCrashedError(Exception):
+    """Raised when a worker process dies while running a job."""
+
+
+# Per-process analyzer, created once when a pool worker starts
+_analyzer = None
+
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        from geometry_analyzer import GeometryAnalyzer
+        _analyzer = GeometryAnalyzer()
+    return _analyzer
+
+
+def _limit_cpu(seconds: Optional[float]):
+    """
+    Let the kernel stop this process (SIGXCPU) once it has used ``seconds``
+    more CPU time, or lift the limit when ``seconds`` is None.
+    """
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, cpu_limit_seconds: Optional[float] = None,
+                 analyzer_factory: Optional[Callable[[], Any]] = None):
+    """Entry point of a pool worker process: run analyzer calls received over ``conn``."""
+    # Shutdown is driven by the parent; don't die on the terminal's Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cpu_limit_seconds:
+        # A job stopped by its CPU limit should not leave a core dump behind
+        resource.setrlimit(resource.RLIMIT_CORE, (0, resource.getrlimit(resource.RLIMIT_CORE)[1]))
+    analyzer = analyzer_factory() if analyzer_factory else _get_analyzer()
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        method, args, kwargs = message
+        try:
+            if cpu_limit_seconds:
+                _limit_cpu(cpu_limit_seconds)
+            try:
+                result = getattr(analyzer, method)(*args, **kwargs)
+            finally:
+                if cpu_limit_seconds:
+                    _limit_cpu(None)
+            conn.send((True, result))
+        except Exception as e:
+            try:
+                conn.send((False, e))
+            except Exception:
+                # Exception not picklable; send its message instead
+                conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _WorkerProcess:
+    """A long-lived analyzer process and the parent's end of its pipe."""
+
+    def __init__(self, ctx, cpu_limit_seconds: Optional[float] = None,
+                 analyzer_factory: Optional[Callable[[], Any]] = None):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(child_conn, cpu_limit_seconds, analyzer_factory), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class AnalysisPool:
+    """
+    Runs GeometryAnalyzer methods off the event loop with admission control.
+
+    In ``process`` mode each job runs in one of ``max_workers`` long-lived worker
+    processes; a job that exceeds ``timeout_seconds`` gets its process killed and
+    replaced. ``thread`` mode runs jobs in a thread pool instead, which avoids the
+    process overhead but cannot stop a runaway job after it times out.
+
+    ``cpu_limit_seconds`` (process mode only) additionally caps the CPU time of
+    each job through RLIMIT_CPU: the kernel stops a worker that spends it,
+    even inside native code that never returns to Python, and the job fails
+    with AnalysisTimeoutError.
+
+    At most ``max_workers`` jobs run at once and ``max_queued`` more may wait;
+    further submissions raise PoolSaturatedError immediately.
+
+    ``analyzer_factory`` replaces GeometryAnalyzer as the object whose methods
+    ``run`` calls; in process mode it must be picklable (a module-level callable).
+    """
+
+    def __init__(self, mode: str = "process", max_workers: int = 2, max_queued: int = 20,
+                 timeout_seconds: float = 120.0, cpu_limit_seconds: Optional[float] = None,
+                 analyzer_factory: Optional[Callable[[], Any]] = None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.timeout_seconds = timeout_seconds
+        self.cpu_limit_seconds = cpu_limit_seconds if mode == "process" else None
+        self.analyzer_factory = analyzer_factory
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers = set()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._thread_analyzer = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._running = 0
+        self._timeouts = 0
+        self._crashes = 0
+        self._rejected = 0
+
+    async def start(self):
+        """Start the worker processes (or thread pool)."""
+        if self.mode == "process":
+            self._idle = asyncio.Queue()
+            for _ in range(self.max_workers):
+                self._idle.put_nowait(self._spawn())
+        else:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="analysis")
+            self._slots = asyncio.Semaphore(self.max_workers)
+        logger.info(f"Analysis pool started: mode={self.mode}, workers={self.max_workers}, "
+                    f"max_queued={self.max_queued}, timeout={self.timeout_seconds}s, "
+                    f"cpu_limit={self.cpu_limit_seconds or 'none'}")
+
+    async def shutdown(self):
+        """Stop all workers."""
+        for worker in list(self._workers):
+            worker.stop()
+        self._workers.clear()
+        if self._threads:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.max_workers + self.max_queued
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "running": self._running,
+            "queued": self._pending - self._running,
+            "max_queued": self.max_queued,
+            "cpu_limit_seconds": self.cpu_limit_seconds,
+            "timeouts": self._timeouts,
+            "crashes": self._crashes,
+            "rejected": self._rejected,
+        }
+
+    def check_admission(self):
+        """Raise PoolSaturatedError if a new job would be rejected."""
+        if self.saturated:
+            self._rejected += 1
+            raise PoolSaturatedError(
+                f"Analysis pool saturated ({self._pending} jobs running or queued)"
+            )
+
+    async def run(self, method: str, *args, **kwargs) -> Any:
+        """Call ``GeometryAnalyzer.<method>(*args, **kwargs)`` in the pool and return its result."""
+        self.check_admission()
+        self._pending += 1
+        try:
+            if self.mode == "process":
+                return await self._run_in_process(method, args, kwargs)
+            return await self._run_in_thread(method, args, kwargs)
+        finally:
+            self._pending -= 1
+
+    def _spawn(self) -> _WorkerProcess:
+        worker = _WorkerProcess(self._ctx, self.cpu_limit_seconds, self.analyzer_factory)
+        self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _WorkerProcess):
+        self._workers.discard(worker)
+        worker.kill()
+        self._idle.put_nowait(self._spawn())
+
+    async def _run_in_process(self, method, args, kwargs):
+        with telemetry.stage("queue_wait"):
+            worker = await self._idle.get()
+        self._running += 1
+        try:
+            ok, result = await asyncio.wait_for(self._call(worker, (method, args, kwargs)),
+                                                self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.error(f"Analysis {method} exceeded {self.timeout_seconds}s, killing worker "
+                         f"pid={worker.process.pid}")
+            self._replace(worker)
+            raise AnalysisTimeoutError(f"Analysis exceeded {self.timeout_seconds:.0f}s timeout")
+        except (EOFError, OSError) as e:
+            worker.process.join(timeout=1)
+            if worker.process.exitcode == -signal.SIGXCPU:
+                self._timeouts += 1
+                logger.error(f"Analysis {method} exceeded its {self.cpu_limit_seconds:.0f}s CPU limit, "
+                             f"worker pid={worker.process.pid} stopped")
+                self._replace(worker)
+                raise AnalysisTimeoutError(f"Analysis exceeded {self.cpu_limit_seconds:.0f}s CPU limit")
+            self._crashes += 1
+            logger.error(f"Analysis worker pid={worker.process.pid} crashed "
+                         f"(exitcode={worker.process.exitcode}): {e}")
+            self._replace(worker)
+            raise WorkerCrashedError("Analysis worker crashed")
+        except asyncio.CancelledError:
+            # The worker is still busy with an abandoned job; don't hand it out again
+            self._replace(worker)
+            raise
+        finally:
+            self._running -= 1
+
+        self._idle.put_nowait(worker)
+        if not ok:
+            raise result
+        return result
+
+    async def _call(self, worker: _WorkerProcess, message):
+        """
+        Send ``message`` to ``worker`` and wait for its reply.
+
+        Requests and replies can carry whole files, so pickling and pipe I/O run
+        in the default executor; the loop itself only waits for the pipe to
+        become readable, so no executor thread sits blocked while the job runs.
+        If the job is abandoned, killing the worker ends any transfer in flight.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.conn.send, message)
+
+        readable = loop.create_future()
+        fd = worker.conn.fileno()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        return await loop.run_in_executor(None, worker.conn.recv)
+
+    def _local_analyzer(self):
+        if self.analyzer_factory is None:
+            return _get_analyzer()
+        if self._thread_analyzer is None:
+            self._thread_analyzer = self.analyzer_factory()
+        return self._thread_analyzer
+
+    async def _run_in_thread(self, method, args, kwargs):
+        loop = asyncio.get_running_loop()
+        with telemetry.stage("queue_wait"):
+            await self._slots.acquire()
+        self._running += 1
+        try:
+            call = getattr(self._local_analyzer(), method)
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._threads, lambda: call(*args, **kwargs)),
+                self.timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.error(f"Analysis {method} exceeded {self.timeout_seconds}s "
+                         f"(thread mode: job keeps running in the background)")
+            raise AnalysisTimeoutError(f"Analysis exceeded {self.timeout_seconds:.0f}s timeout")
+        finally:
+            self._running -= 1
+            self._slots.release()
@@ -0,0 +1,231 @@
+"""
+Benchmark GeometryAnalyzer on deterministic synthetic parts (and optionally a corpus).
+
+Each case runs in a fresh process, so its peak RSS is its own: the file is
+analyzed once to warm up, then timed ``--repeat`` times. Results are
+written as JSON and can be compared against a stored baseline; the exit
+status is 1 when a case got slower (or bigger) than the thresholds allow.
+
+Usage (from apps/worker):
+    python benchmarks/bench_analyzer.py [--quick] [--corpus DIR] [--output results.json]
+    python benchmarks/bench_analyzer.py --baseline baseline.json [--time-threshold 0.25]
+    python benchmarks/bench_analyzer.py --save-baseline baseline.json
+
+Baselines are only comparable on the same machine (or CI runner type).
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+WORKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORKER_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures  # noqa: E402
+
+# Analyzer entry point and arguments per file type; STL runs once per metric profile
+CASES = {
+    "stl": [
+        ("analyze_stl", "3d_fff", {"profile": "full_dfm"}),
+        ("analyze_stl", "3d_fff", {"profile": "instant_quote"}),
+    ],
+    "dxf": [("analyze_dxf", "laser_2d", {})],
+    "step": [("analyze_step", "cnc_3axis", {"profile": "full_dfm"})],
+}
+# Time differences below this are noise, whatever the ratio (seconds)
+MIN_TIME_REGRESSION_S = 0.005
+# Memory differences below this are noise (MB)
+MIN_RSS_REGRESSION_MB = 5.0
+UNITS = {"stl": "triangles", "dxf": "entities", "step": "holes"}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(conn, path: str, file_type: str, method: str, process_type: str,
+              options: Dict[str, Any], repeat: int):
+    """Child process: analyze the file ``repeat`` + 1 times and report timings and peak RSS."""
+    try:
+        sys.path.insert(0, WORKER_DIR)
+        from geometry_analyzer import GeometryAnalyzer, STEP_FILE_TYPES, requested_metrics
+
+        analyzer = GeometryAnalyzer()
+        if file_type in STEP_FILE_TYPES:
+            source = path  # gmsh reads from disk
+        else:
+            with open(path, "rb") as f:
+                source = f.read()
+        if method == "analyze_dxf":
+            call = lambda: analyzer.analyze_dxf(source, process_type)  # noqa: E731
+        else:
+            metrics = requested_metrics(options)
+            call = lambda: getattr(analyzer, method)(source, process_type, metrics)  # noqa: E731
+
+        rss_before = _peak_rss_mb()
+        call()  # warm up: imports, ray engine, gmsh initialization
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+        conn.send({"times": times, "rss_before_mb": rss_before, "peak_rss_mb": _peak_rss_mb()})
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def run_case(fixture: fixtures.Fixture, path: str, method: str, process_type: str,
+             options: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run_case, args=(child_conn, path, fixture.file_type, method,
+                                                  process_type, options, repeat))
+    process.start()
+    child_conn.close()
+    try:
+        report = parent_conn.recv()
+    except EOFError:
+        report = {"error": "benchmark process died"}
+    process.join()
+
+    label = options.get("profile")
+    result = {
+        "case": f"{fixture.name}:{method}" + (f":{label}" if label else ""),
+        "fixture": fixture.name,
+        "file_type": fixture.file_type,
+        "function": method,
+        "process_type": process_type,
+        "options": options,
+        "file_bytes": len(fixture.data),
+        "size": fixture.size,
+        "unit": UNITS.get(fixture.file_type, "items"),
+    }
+    if "error" in report:
+        return {**result, "error": report["error"]}
+
+    times = report["times"]
+    median = statistics.median(times)
+    return {
+        **result,
+        "wall_s_best": round(min(times), 5),
+        "wall_s_median": round(median, 5),
+        "peak_rss_mb": round(report["peak_rss_mb"], 1),
+        "rss_delta_mb": round(report["peak_rss_mb"] - report["rss_before_mb"], 1),
+        "throughput_mb_s": round(len(fixture.data) / 1e6 / median, 2) if median else None,
+        "throughput_units_s": round(fixture.size / median) if median and fixture.size else None,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import trimesh
+    from geometry_analyzer import ANALYZER_VERSION
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "trimesh": trimesh.__version__,
+        "embree": bool(trimesh.ray.has_embree),
+        "analyzer_version": ANALYZER_VERSION,
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+            time_threshold: float, rss_threshold: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline`` (case by case), as messages."""
+    previous = {row["case"]: row for row in baseline.get("results", []) if "error" not in row}
+    regressions = []
+    for row in results:
+        old = previous.get(row["case"])
+        if old is None:
+            continue
+        if "error" in row:
+            regressions.append(f"{row['case']}: failed ({row['error']})")
+            continue
+        slower = row["wall_s_median"] - old["wall_s_median"]
+        if slower > MIN_TIME_REGRESSION_S and row["wall_s_median"] > old["wall_s_median"] * (1 + time_threshold):
+            regressions.append(f"{row['case']}: median {old['wall_s_median']:.4f}s -> {row['wall_s_median']:.4f}s "
+                               f"(+{slower / old['wall_s_median'] * 100:.0f}%)")
+        bigger = row["rss_delta_mb"] - old["rss_delta_mb"]
+        if bigger > MIN_RSS_REGRESSION_MB and row["rss_delta_mb"] > old["rss_delta_mb"] * (1 + rss_threshold):
+            regressions.append(f"{row['case']}: memory {old['rss_delta_mb']:.1f}MB -> {row['rss_delta_mb']:.1f}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small fixtures only (for CI smoke runs)")
+    parser.add_argument("--corpus", help="directory of real STL/DXF/STEP files to benchmark as well")
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", help="write results JSON here as the new baseline")
+    parser.add_argument("--time-threshold", type=float, default=0.25,
+                        help="allowed relative slowdown of the median (default 0.25)")
+    parser.add_argument("--rss-threshold", type=float, default=0.25,
+                        help="allowed relative growth of the peak RSS increase (default 0.25)")
+    args = parser.parse_args()
+
+    cases = fixtures.synthetic_fixtures("quick" if args.quick else "default")
+    if args.corpus:
+        cases.extend(fixtures.corpus_fixtures(args.corpus))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for fixture in cases:
+            path = os.path.join(directory, fixture.name.replace(":", "_").replace(os.sep, "_")
+                                + "." + fixture.file_type)
+            with open(path, "wb") as f:
+                f.write(fixture.data)
+            file_type = "step" if "." + fixture.file_type in fixtures.STEP_SUFFIXES else fixture.file_type
+            for method, process_type, options in CASES[file_type]:
+                if args.filter and args.filter not in f"{fixture.name}:{method}":
+                    continue
+                row = run_case(fixture, path, method, process_type, options, args.repeat)
+                results.append(row)
+                if "error" in row:
+                    print(f"{row['case']:<48} ERROR {row['error']}", file=sys.stderr)
+                else:
+                    print(f"{row['case']:<48}{row['wall_s_median']:>10.4f}s{row['peak_rss_mb']:>9.0f}MB"
+                          f"{row['throughput_units_s'] or 0:>12} {row['unit']}/s", file=sys.stderr)
+
+    report = {"environment": environment(), "results": results}
+    serialized = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(serialized)
+    elif not args.save_baseline:
+        print(serialized)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(serialized)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.time_threshold, args.rss_threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
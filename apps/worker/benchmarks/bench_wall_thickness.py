@@ -0,0 +1,113 @@
+"""
+Benchmark the batched wall thickness engine against the previous per-ray loop.
+
+Usage (from apps/worker):
+    python benchmarks/bench_wall_thickness.py [--max-subdivisions 6] [--repeat 3] [--json] [--no-embree]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry_analyzer import GeometryAnalyzer  # noqa: E402
+
+
+def legacy_wall_thickness(mesh, sample_count=1000):
+    """The original implementation: closest-point query plus one ray cast per sample."""
+    samples = mesh.sample(sample_count)
+    _, _, triangle_ids = trimesh.proximity.closest_point(mesh, samples)
+
+    thicknesses = []
+    for point, normal in zip(samples, mesh.face_normals[triangle_ids]):
+        locations, _, _ = mesh.ray.intersects_location(
+            ray_origins=[point - normal * 1e-6 * mesh.scale],
+            ray_directions=[-normal],
+            multiple_hits=False
+        )
+        if len(locations) > 0:
+            thicknesses.append(np.linalg.norm(locations[0] - point))
+
+    if thicknesses:
+        return min(thicknesses), float(np.mean(thicknesses))
+    return None, None
+
+
+def hollow_box(size: float, wall: float, subdivisions: int):
+    """Closed box with a box-shaped cavity, i.e. walls of known thickness."""
+    outer = trimesh.creation.box((size, size, size))
+    inner = trimesh.creation.box((size - 2 * wall,) * 3)
+    for _ in range(subdivisions):
+        outer = outer.subdivide()
+        inner = inner.subdivide()
+    inner.invert()
+    return trimesh.util.concatenate([outer, inner])
+
+
+def synthetic_meshes(max_subdivisions: int):
+    for subdivisions in range(2, max_subdivisions + 1):
+        yield f"icosphere_r20_s{subdivisions}", trimesh.creation.icosphere(subdivisions, radius=20)
+    for subdivisions in range(0, max(1, max_subdivisions - 1)):
+        yield f"hollow_box_w3_s{subdivisions}", hollow_box(40, 3, subdivisions)
+
+
+def best_time(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-subdivisions", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="emit results as JSON")
+    parser.add_argument("--no-embree", action="store_true",
+                        help="use trimesh's triangle intersector, as on installs without embreex")
+    args = parser.parse_args()
+    if args.no_embree:
+        # Read when each mesh is created, so this must come before the meshes
+        trimesh.ray.has_embree = False
+
+    analyzer = GeometryAnalyzer()
+    rows = []
+    for name, mesh in synthetic_meshes(args.max_subdivisions):
+        legacy_time, (legacy_min, legacy_avg) = best_time(lambda: legacy_wall_thickness(mesh), args.repeat)
+        batched_time, stats = best_time(lambda: analyzer._estimate_wall_thickness(mesh), args.repeat)
+        rows.append({
+            "mesh": name,
+            "faces": len(mesh.faces),
+            "legacy_s": round(legacy_time, 4),
+            "legacy_min": legacy_min,
+            "legacy_avg": legacy_avg,
+            "batched_s": round(batched_time, 4),
+            "batched_min": stats.min if stats else None,
+            "batched_avg": stats.avg if stats else None,
+            "batched_samples": stats.sample_count if stats else 0,
+            "speedup": round(legacy_time / batched_time, 1) if batched_time else None,
+        })
+
+    if args.json:
+        print(json.dumps({"embree": trimesh.ray.has_embree, "results": rows}, indent=2))
+        return
+
+    print(f"ray engine: {'embree' if trimesh.ray.has_embree else 'triangle (numpy)'}")
+    print(f"{'mesh':<24}{'faces':>9}{'legacy s':>11}{'batched s':>11}{'samples':>9}{'speedup':>9}"
+          f"{'min (legacy/batched)':>24}")
+    for row in rows:
+        mins = f"{row['legacy_min'] or 0:.2f}/{row['batched_min'] or 0:.2f}"
+        print(f"{row['mesh']:<24}{row['faces']:>9}{row['legacy_s']:>11}{row['batched_s']:>11}"
+              f"{row['batched_samples']:>9}{row['speedup']:>9}{mins:>24}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Deterministic synthetic parts for the benchmarks.
+
+Every generator returns the file's bytes and is seeded, so the same
+arguments always produce the same file (and the same content digest).
+"""
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import numpy as np
+import trimesh
+
+STEP_SUFFIXES = (".step", ".stp", ".iges", ".igs")
+CORPUS_SUFFIXES = (".stl", ".dxf") + STEP_SUFFIXES
+
+
+@dataclass
+class Fixture:
+    name: str
+    file_type: str  # stl, dxf, step, ...
+    data: bytes
+    size: int  # triangles, DXF entities or STEP holes (0 for corpus files)
+
+
+def icosphere_stl(subdivisions: int, radius: float = 20.0) -> bytes:
+    """Sphere with 20 * 4**subdivisions triangles."""
+    return trimesh.creation.icosphere(subdivisions, radius=radius).export(file_type="stl")
+
+
+def hollow_box_stl(subdivisions: int, size: float = 40.0, wall: float = 3.0) -> bytes:
+    """Box with a box-shaped cavity: walls of known thickness, 24 * 4**subdivisions triangles."""
+    outer = trimesh.creation.box((size, size, size))
+    inner = trimesh.creation.box((size - 2 * wall,) * 3)
+    for _ in range(subdivisions):
+        outer = outer.subdivide()
+        inner = inner.subdivide()
+    inner.invert()
+    return trimesh.util.concatenate([outer, inner]).export(file_type="stl")
+
+
+def sheet_dxf(entity_count: int, seed: int = 0) -> bytes:
+    """
+    Nested sheet of rectangular parts with holes, about ``entity_count`` entities.
+
+    Each part is a closed LWPOLYLINE outline (with a bulged corner), two
+    CIRCLE holes, a slot of two LINEs and two ARCs, and an open LWPOLYLINE
+    engraving: 7 entities.
+    """
+    import ezdxf
+
+    rng = np.random.default_rng(seed)
+    doc = ezdxf.new("R2010")
+    msp = doc.modelspace()
+    parts = max(1, entity_count // 7)
+    columns = int(np.ceil(np.sqrt(parts)))
+    for index in range(parts):
+        x0, y0 = (index % columns) * 120.0, (index // columns) * 120.0
+        width, height = rng.uniform(60, 100, size=2)
+        msp.add_lwpolyline(
+            [(x0, y0, 0), (x0 + width, y0, 0), (x0 + width, y0 + height, -0.4), (x0, y0 + height, 0)],
+            format="xyb", close=True
+        )
+        for cx in (x0 + 15, x0 + width - 15):
+            msp.add_circle((cx, y0 + 15), radius=rng.uniform(2, 6))
+        sx, sy = x0 + width / 2, y0 + height / 2
+        msp.add_line((sx - 10, sy - 3), (sx + 10, sy - 3))
+        msp.add_line((sx - 10, sy + 3), (sx + 10, sy + 3))
+        msp.add_arc((sx + 10, sy), radius=3, start_angle=-90, end_angle=90)
+        msp.add_arc((sx - 10, sy), radius=3, start_angle=90, end_angle=270)
+        msp.add_lwpolyline([(x0 + 5, y0 + height - 10), (x0 + 25, y0 + height - 10), (x0 + 25, y0 + height - 20)])
+    stream = io.StringIO()
+    doc.write(stream)
+    return stream.getvalue().encode("utf-8")
+
+
+def drilled_block_step(holes: int) -> Optional[bytes]:
+    """Block with a row of through holes and a pocket, written by gmsh (None without gmsh)."""
+    try:
+        import gmsh
+    except Exception:
+        return None
+
+    gmsh.initialize(readConfigFiles=False, interruptible=False)
+    try:
+        gmsh.option.setNumber("General.Terminal", 0)
+        length = 20.0 * (holes + 1)
+        block = gmsh.model.occ.addBox(0, 0, 0, length, 40, 20)
+        tools = [(3, gmsh.model.occ.addCylinder(20.0 * (i + 1), 20, -1, 0, 0, 22, 4)) for i in range(holes)]
+        tools.append((3, gmsh.model.occ.addBox(5, 5, 12, length - 10, 8, 10)))
+        gmsh.model.occ.cut([(3, block)], tools)
+        gmsh.model.occ.synchronize()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "block.step")
+            gmsh.write(path)
+            with open(path, "rb") as f:
+                return f.read()
+    finally:
+        gmsh.finalize()
+
+
+def synthetic_fixtures(scale: str = "default") -> List[Fixture]:
+    """All synthetic fixtures; ``quick`` keeps each case below a second or so."""
+    quick = scale == "quick"
+    fixtures = []
+    for subdivisions in ((2, 4, 5) if quick else (3, 5, 6, 7)):
+        fixtures.append(Fixture(f"icosphere_s{subdivisions}", "stl", icosphere_stl(subdivisions),
+                                20 * 4 ** subdivisions))
+    for subdivisions in ((1, 3) if quick else (2, 4, 6)):
+        fixtures.append(Fixture(f"hollow_box_s{subdivisions}", "stl", hollow_box_stl(subdivisions),
+                                24 * 4 ** subdivisions))
+    for count in ((700, 7000) if quick else (700, 7000, 70000)):
+        fixtures.append(Fixture(f"sheet_{count}", "dxf", sheet_dxf(count), count // 7 * 7))
+    for holes in ((2,) if quick else (2, 20)):
+        data = drilled_block_step(holes)
+        if data is not None:
+            fixtures.append(Fixture(f"drilled_block_{holes}", "step", data, holes))
+    return fixtures
+
+
+def corpus_fixtures(directory: str) -> Iterator[Fixture]:
+    """Real-world files from ``directory`` (recursively), by extension."""
+    for root, _, files in os.walk(directory):
+        for file_name in sorted(files):
+            suffix = os.path.splitext(file_name)[1].lower()
+            if suffix in CORPUS_SUFFIXES:
+                with open(os.path.join(root, file_name), "rb") as f:
+                    data = f.read()
+                name = os.path.relpath(os.path.join(root, file_name), directory)
+                yield Fixture(f"corpus:{name}", suffix[1:], data, 0)
+
+
+def variant(data: bytes, file_type: str, number: int) -> bytes:
+    """
+    Same geometry with different bytes (and so a different content digest),
+    to defeat the content-addressed cache in load tests.
+    """
+    if file_type == "stl" and not data[:5].lower() == b"solid":
+        return f"variant {number}".encode().ljust(80, b" ") + data[80:]
+    if file_type == "dxf":
+        return f"999\nvariant {number}\n".encode() + data
+    raise ValueError(f"No variants for {file_type} fixtures")
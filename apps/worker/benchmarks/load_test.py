@@ -0,0 +1,222 @@
+"""
+Load test /analyze and /analyze/batch end to end.
+
+Starts the worker app with uvicorn on a local port, serves synthetic
+fixtures from a local HTTP server and drives the API with concurrent
+clients. Redis is an in-process fakeredis server unless --redis-url points
+at a real (disposable!) one. Scenarios:
+
+    cold   every request is for new content (a byte-level variant of a
+           fixture), so it is downloaded and analyzed
+    warm   every request repeats one URL, so it is answered from the cache
+    batch  /analyze/batch calls of --batch-size new files each
+
+Latency percentiles, throughput and status codes are reported as JSON.
+
+Usage (from apps/worker):
+    python benchmarks/load_test.py [--requests 200] [--concurrency 16] [--scenarios cold,warm,batch]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+WORKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORKER_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures  # noqa: E402
+
+PROCESS_TYPES = {"stl": "3d_fff", "dxf": "laser_2d"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_fixtures(files: Dict[str, fixtures.Fixture]) -> ThreadingHTTPServer:
+    """HTTP server for /<fixture name>?variant=<n>, in a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            fixture = files.get(url.path.lstrip("/"))
+            if fixture is None:
+                self.send_error(404)
+                return
+            number = parse_qs(url.query).get("variant")
+            data = fixtures.variant(fixture.data, fixture.file_type, int(number[0])) if number else fixture.data
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def summarize(name: str, latencies: List[float], statuses: Counter, elapsed: float,
+              items: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1) if ordered else None
+
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "items": items,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_items_s": round(items / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(ordered) * 1000, 1) if ordered else None,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(ordered[-1] * 1000, 1) if ordered else None,
+        },
+        "status_codes": dict(statuses),
+    }
+
+
+async def run_scenario(client, name: str, requests: List[Dict[str, Any]], concurrency: int,
+                       path: str = "/analyze") -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    items = 0
+
+    async def send(body):
+        nonlocal items
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            if path.endswith("/batch") and response.status_code == 200:
+                # Streamed NDJSON: the call is done when the last line arrives
+                for line in response.text.splitlines():
+                    statuses[json.loads(line).get("status_code", 200)] += 1
+                    items += 1
+            else:
+                statuses[response.status_code] += 1
+                items += 1 if not isinstance(body, list) else len(body)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(body) for body in requests))
+    return summarize(name, latencies, statuses, time.perf_counter() - start, items)
+
+
+async def load_test(args) -> Dict[str, Any]:
+    import httpx
+    import uvicorn
+
+    if not args.redis_url:
+        try:
+            import fakeredis
+        except ImportError:
+            sys.exit("fakeredis is required without --redis-url (pip install fakeredis)")
+    import main
+
+    if not args.redis_url:
+        # Point the app's Redis pool at an in-process stand-in before it starts
+        main.redis_pool._client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+        main.lookup_result_script = main.redis_pool.register_script(main.LOOKUP_RESULT_SCRIPT)
+
+    files = {fixture.name: fixture for fixture in fixtures.synthetic_fixtures("quick")
+             if fixture.file_type in PROCESS_TYPES}
+    file_server = serve_fixtures(files)
+    file_base = f"http://127.0.0.1:{file_server.server_address[1]}"
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    variants = itertools.count(1)
+    names = sorted(files)
+
+    def body(name: str, fresh: bool) -> Dict[str, Any]:
+        fixture = files[name]
+        query = f"?variant={next(variants)}" if fresh else ""
+        return {"file_url": f"{file_base}/{name}{query}", "file_type": fixture.file_type,
+                "process_type": PROCESS_TYPES[fixture.file_type], "options": {}}
+
+    results = []
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout) as client:
+            # One request per fixture first, so pool processes are up before timing starts
+            await run_scenario(client, "warmup", [body(name, False) for name in names], args.concurrency)
+            for scenario in args.scenarios.split(","):
+                if scenario == "cold":
+                    requests = [body(names[i % len(names)], True) for i in range(args.requests)]
+                    results.append(await run_scenario(client, "cold", requests, args.concurrency))
+                elif scenario == "warm":
+                    requests = [body(names[i % len(names)], False) for i in range(args.requests)]
+                    results.append(await run_scenario(client, "warm", requests, args.concurrency))
+                elif scenario == "batch":
+                    batches = [[body(names[(i + j) % len(names)], True) for j in range(args.batch_size)]
+                               for i in range(max(1, args.requests // args.batch_size))]
+                    results.append(await run_scenario(client, "batch", batches, max(1, args.concurrency // 4),
+                                                      path="/analyze/batch"))
+                else:
+                    raise ValueError(f"Unknown scenario: {scenario}")
+            health = (await client.get("/health")).json()
+    finally:
+        server.should_exit = True
+        await server_task
+        file_server.shutdown()
+
+    return {
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "redis": args.redis_url or "fakeredis",
+            "fixtures": names,
+        },
+        "results": results,
+        "pools": {"analysis_pool": health["analysis_pool"], "step_pool": health["step_pool"]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests (or batch items) per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--scenarios", default="cold,warm,batch")
+    parser.add_argument("--redis-url", help="use this Redis instead of fakeredis (it will be written to)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout (seconds)")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    report = asyncio.run(load_test(args))
+    serialized = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(serialized)
+    else:
+        print(serialized)
+
+
+if __name__ == "__main__":
+    main()
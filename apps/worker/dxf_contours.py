@@ -0,0 +1,298 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from dxf_pipeline import DXFGeometry, edge_lengths, flatten_edges
+
+logger = logging.getLogger(__name__)
+
+# Path end points closer than this are treated as connected (mm)
+CONTOUR_TOLERANCE_MM = 0.01
+# Arcs are split into chords of at most this sweep for containment tests (degrees)
+CONTAINMENT_ARC_STEP_DEGREES = 10.0
+# Upper bound on candidate pair x polygon vertex rows evaluated at once
+CONTAINMENT_CHUNK_EDGES = 2_000_000
+
+
+@dataclass
+class ContourSummary:
+    """
+    Closed contours of a drawing, classified by nesting depth.
+
+    Contours at even depth bound material (part outlines, islands), contours
+    at odd depth are holes. Areas are exact for arcs and circles.
+    """
+    areas: np.ndarray  # (k,) enclosed area per closed contour, mm²
+    perimeters: np.ndarray  # (k,) mm
+    depths: np.ndarray  # (k,) number of contours enclosing each one
+    open_count: int  # chains of edges that do not close
+
+    @property
+    def closed_count(self) -> int:
+        return len(self.areas)
+
+    @property
+    def holes(self) -> np.ndarray:
+        return self.depths % 2 == 1
+
+    @property
+    def hole_count(self) -> int:
+        return int(self.holes.sum())
+
+    @property
+    def net_area(self) -> float:
+        return float(np.where(self.holes, -self.areas, self.areas).sum())
+
+    @property
+    def pierce_count(self) -> int:
+        """Every contour, closed or open, starts with one pierce."""
+        return self.closed_count + self.open_count
+
+
+def build_contours(geometry: DXFGeometry, tolerance: float = CONTOUR_TOLERANCE_MM) -> ContourSummary:
+    """
+    Chain edges into closed contours and nest them.
+
+    Closed polylines and circles are contours by themselves; the end points of
+    all other paths are merged through a KD-tree and the resulting graph is
+    walked once, so the cost grows near-linearly with the number of paths.
+    """
+    edge_count = len(geometry.edge_starts)
+    origin = _origin(geometry)
+    starts = geometry.edge_starts - origin
+    ends = geometry.edge_ends - origin
+
+    # Signed area contribution of every edge (Green's theorem): chord term plus
+    # the circular segment between chord and arc
+    bulges = geometry.edge_bulges
+    chords = np.linalg.norm(ends - starts, axis=1)
+    sweeps = 4 * np.arctan(np.abs(bulges))
+    half_sines = np.sin(sweeps / 2)
+    curved = half_sines > 0
+    segment_areas = np.zeros(edge_count)
+    radii = chords[curved] / (2 * half_sines[curved])
+    segment_areas[curved] = (
+        np.sign(bulges[curved]) * radii ** 2 / 2 * (sweeps[curved] - np.sin(sweeps[curved]))
+    )
+    edge_areas = (starts[:, 0] * ends[:, 1] - ends[:, 0] * starts[:, 1]) / 2 + segment_areas
+
+    path_count = len(geometry.path_closed)
+    path_areas = np.bincount(geometry.edge_paths, weights=edge_areas, minlength=path_count)
+    path_lengths = np.bincount(geometry.edge_paths, weights=edge_lengths(geometry), minlength=path_count)
+    path_first = np.searchsorted(geometry.edge_paths, np.arange(path_count), side="left")
+    path_last = np.searchsorted(geometry.edge_paths, np.arange(path_count), side="right") - 1
+
+    # Loops are made of pieces: a path traversed forward or backward. Closed
+    # paths are loops by themselves, open paths are chained at their end points
+    closed_paths = np.flatnonzero(geometry.path_closed)
+    chained, open_count = _chain_open_paths(
+        np.flatnonzero(~geometry.path_closed), starts[path_first], ends[path_last], tolerance
+    )
+    chained_pieces = np.array([
+        (loop_number, path, forward)
+        for loop_number, loop in enumerate(chained, start=len(closed_paths))
+        for path, forward in loop
+    ], dtype=np.int64).reshape(-1, 3)
+    loop_count = len(closed_paths) + len(chained)
+    piece_loops = np.concatenate([np.arange(len(closed_paths)), chained_pieces[:, 0]])
+    piece_paths = np.concatenate([closed_paths, chained_pieces[:, 1]])
+    piece_forward = np.concatenate([np.ones(len(closed_paths), dtype=bool), chained_pieces[:, 2] == 1])
+
+    signed_areas = np.where(piece_forward, path_areas[piece_paths], -path_areas[piece_paths])
+    loop_areas = np.bincount(piece_loops, weights=signed_areas, minlength=loop_count)
+    loop_perimeters = np.bincount(piece_loops, weights=path_lengths[piece_paths], minlength=loop_count)
+
+    # Polygon of every loop for containment tests, with arcs split into short chords
+    flat_points, edge_steps = _flatten_edges(starts, ends, bulges)
+    edge_offsets = np.r_[0, np.cumsum(edge_steps)]
+    piece_starts = edge_offsets[path_first[piece_paths]]
+    piece_sizes = edge_offsets[path_last[piece_paths] + 1] - piece_starts
+    within = np.arange(piece_sizes.sum()) - np.repeat(np.cumsum(piece_sizes) - piece_sizes, piece_sizes)
+    point_index = np.where(
+        np.repeat(piece_forward, piece_sizes),
+        np.repeat(piece_starts, piece_sizes) + within,
+        np.repeat(piece_starts + piece_sizes - 1, piece_sizes) - within
+    )
+    loop_sizes = np.bincount(piece_loops, weights=piece_sizes, minlength=loop_count).astype(np.int64)
+
+    circles = geometry.circles
+    angles = np.radians(np.arange(0.0, 360.0, CONTAINMENT_ARC_STEP_DEGREES))
+    unit_circle = np.column_stack([np.cos(angles), np.sin(angles)])
+    circle_points = (circles[:, None, :2] - origin) + circles[:, None, 2:3] * unit_circle[None]
+
+    vertices = np.vstack([flat_points[point_index], circle_points.reshape(-1, 2)])
+    sizes = np.concatenate([loop_sizes, np.full(len(circles), len(angles), dtype=np.int64)])
+    areas = np.concatenate([np.abs(loop_areas), np.pi * circles[:, 2] ** 2])
+    perimeters = np.concatenate([loop_perimeters, 2 * np.pi * circles[:, 2]])
+
+    return ContourSummary(
+        areas=areas,
+        perimeters=perimeters,
+        depths=_nesting_depths(vertices, sizes, areas),
+        open_count=open_count
+    )
+
+
+def _origin(geometry: DXFGeometry) -> np.ndarray:
+    """Shift coordinates near zero so shoelace sums do not lose precision far from the origin."""
+    points = np.vstack([geometry.edge_starts, geometry.circles[:, :2]])
+    return points.min(axis=0) if len(points) else np.zeros(2)
+
+
+def _chain_open_paths(paths: np.ndarray, path_starts: np.ndarray, path_ends: np.ndarray,
+                      tolerance: float) -> Tuple[List[List[Tuple[int, bool]]], int]:
+    """
+    Chain open paths whose end points meet into loops.
+
+    Returns the loops and the number of chains that stay open (including
+    branching ones, where more than two paths meet at a point).
+    """
+    if not len(paths):
+        return [], 0
+
+    # Merge end points within tolerance into graph nodes
+    count = len(paths)
+    points = np.vstack([path_starts[paths], path_ends[paths]])
+    pairs = cKDTree(points).query_pairs(tolerance, output_type="ndarray")
+    merged = coo_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(2 * count, 2 * count)
+    )
+    _, point_nodes = connected_components(merged, directed=False)
+    node_a, node_b = point_nodes[:count], point_nodes[count:]
+    node_count = point_nodes.max() + 1
+
+    # Paths are graph edges between nodes; a component is a loop if every node has degree 2
+    degrees = np.bincount(node_a, minlength=node_count) + np.bincount(node_b, minlength=node_count)
+    graph = coo_matrix((np.ones(count), (node_a, node_b)), shape=(node_count, node_count))
+    component_count, node_components = connected_components(graph, directed=False)
+    branching = np.zeros(component_count, dtype=bool)
+    branching[node_components[degrees != 2]] = True
+    open_count = int(branching.sum())
+
+    # The two paths incident to each node (only used where the degree is 2)
+    incident = np.full((node_count, 2), -1, dtype=np.int64)
+    end_nodes = np.concatenate([node_a, node_b])
+    ends_order = np.argsort(end_nodes, kind="stable")
+    sorted_nodes = end_nodes[ends_order]
+    slots = np.r_[0, (sorted_nodes[1:] == sorted_nodes[:-1]).astype(np.int64)]
+    incident[sorted_nodes, slots] = ends_order % count
+
+    loops = []
+    visited = np.zeros(count, dtype=bool)
+    for first in np.flatnonzero(~branching[node_components[node_a]]):
+        if visited[first]:
+            continue
+        loop = []
+        current, forward = first, True
+        while True:
+            visited[current] = True
+            loop.append((int(paths[current]), forward))
+            node = node_b[current] if forward else node_a[current]
+            a, b = incident[node]
+            following = b if a == current else a
+            if following == first:
+                break
+            forward = node_a[following] == node
+            current = following
+        loops.append(loop)
+    return loops, open_count
+
+
+def _flatten_edges(starts: np.ndarray, ends: np.ndarray, bulges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start point of every edge followed by intermediate points along bulged
+    edges, and the number of points emitted per edge.
+    """
+    sweeps = np.degrees(4 * np.arctan(np.abs(bulges)))
+    steps = np.maximum(1, np.ceil(sweeps / CONTAINMENT_ARC_STEP_DEGREES)).astype(np.int64)
+    return flatten_edges(starts, ends, bulges, steps), steps
+
+
+def _nesting_depths(vertices: np.ndarray, sizes: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    """
+    Number of other contours that enclose each contour, tested at its first vertex.
+
+    Candidate enclosing contours come from a uniform grid over the contour
+    bounding boxes; the point-in-polygon tests then run over all candidate
+    pairs at once (even-odd rule), in chunks of bounded size.
+    """
+    count = len(sizes)
+    depths = np.zeros(count, dtype=np.int64)
+    if count < 2:
+        return depths
+
+    offsets = np.cumsum(sizes) - sizes
+    points = vertices[offsets]
+    lower = np.minimum.reduceat(vertices, offsets, axis=0)
+    upper = np.maximum.reduceat(vertices, offsets, axis=0)
+
+    inner, outer = _candidate_pairs(points, lower, upper)
+    # Only a larger contour whose box holds the point can enclose it
+    keep = (inner != outer) & (areas[outer] > areas[inner])
+    keep &= np.all((points[inner] >= lower[outer]) & (points[inner] <= upper[outer]), axis=1)
+    inner, outer = inner[keep], outer[keep]
+
+    # Chunk so that pairs x polygon vertices stays bounded
+    pair_edges = np.cumsum(sizes[outer])
+    total_edges = pair_edges[-1] if len(pair_edges) else 0
+    chunk_starts = np.searchsorted(pair_edges, np.arange(0, total_edges, CONTAINMENT_CHUNK_EDGES), side="right")
+    for start, stop in zip(chunk_starts, np.r_[chunk_starts[1:], len(inner)]):
+        if start == stop:
+            continue
+        chunk_inner, chunk_outer = inner[start:stop], outer[start:stop]
+        edge_counts = sizes[chunk_outer]
+        pair_index = np.repeat(np.arange(len(chunk_inner)), edge_counts)
+        within = np.arange(len(pair_index)) - np.repeat(np.cumsum(edge_counts) - edge_counts, edge_counts)
+        current = vertices[offsets[chunk_outer][pair_index] + within]
+        previous = vertices[offsets[chunk_outer][pair_index] + (within - 1) % edge_counts[pair_index]]
+        x, y = points[chunk_inner][pair_index].T
+
+        crosses = (current[:, 1] > y) != (previous[:, 1] > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slopes = (previous[:, 0] - current[:, 0]) / (previous[:, 1] - current[:, 1])
+            x_at_y = current[:, 0] + slopes * (y - current[:, 1])
+        crossings = np.bincount(pair_index, weights=crosses & (x < x_at_y), minlength=len(chunk_inner))
+        np.add.at(depths, chunk_inner, crossings.astype(np.int64) % 2)
+    return depths
+
+
+def _candidate_pairs(points: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (point index, box index) pairs where the point and the box share a grid cell.
+
+    Each box is registered in every cell it overlaps; the cell size adapts to
+    the typical box size, bounded so the grid has about as many cells as boxes.
+    """
+    origin = lower.min(axis=0)
+    extent = (upper.max(axis=0) - origin).max()
+    typical = np.median((upper - lower).max(axis=1))
+    cell = max(typical, extent / np.sqrt(len(points)), 1e-9)
+
+    low_cells = np.floor((lower - origin) / cell).astype(np.int64)
+    high_cells = np.floor((upper - origin) / cell).astype(np.int64)
+    columns = high_cells[:, 0] - low_cells[:, 0] + 1
+    cells_per_box = columns * (high_cells[:, 1] - low_cells[:, 1] + 1)
+    grid_width = high_cells[:, 0].max() + 1
+
+    boxes = np.repeat(np.arange(len(lower)), cells_per_box)
+    within = np.arange(len(boxes)) - np.repeat(np.cumsum(cells_per_box) - cells_per_box, cells_per_box)
+    box_cells = (
+        (low_cells[boxes, 1] + within // columns[boxes]) * grid_width
+        + low_cells[boxes, 0] + within % columns[boxes]
+    )
+    order = np.argsort(box_cells, kind="stable")
+    box_cells, boxes = box_cells[order], boxes[order]
+
+    point_xy = np.floor((points - origin) / cell).astype(np.int64)
+    # Points are corners of their own boxes, so they always fall inside the grid
+    point_cells = point_xy[:, 1] * grid_width + point_xy[:, 0]
+    first = np.searchsorted(box_cells, point_cells, side="left")
+    matches = np.searchsorted(box_cells, point_cells, side="right") - first
+    inner = np.repeat(np.arange(len(points)), matches)
+    within = np.arange(len(inner)) - np.repeat(np.cumsum(matches) - matches, matches)
+    return inner, boxes[first[inner] + within]
@@ -0,0 +1,468 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Straight segments and circle diameters below this size are reported as small features (mm)
+SMALL_FEATURE_MM = 1.0
+# Default maximum distance between flattened splines/ellipses and the true curve (mm)
+FLATTEN_TOLERANCE_MM = 0.01
+# Block references nested deeper than this are ignored (guards against self-referencing blocks)
+MAX_BLOCK_DEPTH = 16
+
+QUADRANT_ANGLES = np.array([0.0, 90.0, 180.0, 270.0])
+
+# Source entity of each edge in DXFGeometry
+EDGE_LINE = 0
+EDGE_POLYLINE = 1
+EDGE_ARC = 2
+EDGE_SPLINE = 3
+EDGE_ELLIPSE = 4
+
+
+@dataclass
+class DXFGeometry:
+    """
+    Modelspace geometry gathered into arrays.
+
+    Everything except circles is stored as edges: a start point, an end point
+    and a bulge (tan(sweep / 4), positive counter-clockwise, 0 for straight
+    edges), in WCS x/y. Edges of one polyline or spline share a path index
+    and are stored in order; lines and arcs are single-edge paths. Splines
+    and ellipses are flattened to polylines.
+    """
+    edge_starts: np.ndarray  # (n, 2)
+    edge_ends: np.ndarray  # (n, 2)
+    edge_bulges: np.ndarray  # (n,)
+    edge_kinds: np.ndarray  # (n,) EDGE_* above
+    edge_paths: np.ndarray  # (n,) path index
+    path_closed: np.ndarray  # (p,) closed polylines and splines
+    circles: np.ndarray  # (m, 3) center x, center y, radius
+    entity_count: int
+
+
+@dataclass
+class DXFSummary:
+    cut_length: float
+    bounds: Optional[np.ndarray]  # (2, 2) min / max corner, None without geometry
+    small_features: np.ndarray  # sizes in mm
+    entity_count: int
+
+
+def collect_geometry(entities: Iterable, tolerance: float = FLATTEN_TOLERANCE_MM,
+                     block_cache: Optional[Dict[str, Optional[DXFGeometry]]] = None,
+                     depth: int = 0) -> DXFGeometry:
+    """
+    Group entities by type and gather their coordinates into numpy arrays.
+    
+    INSERTs are expanded: each block definition is collected once into
+    ``block_cache`` (in block coordinates) and every reference to it places a
+    transformed copy. ``tolerance`` bounds the chord error of flattened curves.
+    """
+    if block_cache is None:
+        block_cache = {}
+    by_type: Dict[str, list] = defaultdict(list)
+    entity_count = 0
+    for entity in entities:
+        entity_count += 1
+        by_type[entity.dxftype()].append(entity)
+
+    # Single-edge paths: (start, end, bulge, kind)
+    single_edges = [
+        ((entity.dxf.start.x, entity.dxf.start.y), (entity.dxf.end.x, entity.dxf.end.y), 0.0, EDGE_LINE)
+        for entity in by_type["LINE"]
+    ]
+
+    circles = []
+    for entity in by_type["CIRCLE"]:
+        center = _ocs_point(entity, entity.dxf.center)
+        circles.append((center[0], center[1], entity.dxf.radius))
+    for entity in by_type["ARC"]:
+        center = _ocs_point(entity, entity.dxf.center)
+        radius = entity.dxf.radius
+        start_angle, end_angle = entity.dxf.start_angle, entity.dxf.end_angle
+        if _is_mirrored(entity):
+            start_angle, end_angle = 180.0 - end_angle, 180.0 - start_angle
+        span = (end_angle - start_angle) % 360.0
+        if span == 0:
+            circles.append((center[0], center[1], radius))
+            continue
+        start, end = np.radians(start_angle), np.radians(end_angle)
+        single_edges.append((
+            (center[0] + radius * np.cos(start), center[1] + radius * np.sin(start)),
+            (center[0] + radius * np.cos(end), center[1] + radius * np.sin(end)),
+            np.tan(np.radians(span) / 4),
+            EDGE_ARC
+        ))
+
+    # Multi-edge paths: (points, bulges, closed, kind), edges in order
+    paths = []
+    for entity in by_type["LWPOLYLINE"]:
+        # x, y, start width, end width, bulge per vertex
+        vertices = np.frombuffer(entity.lwpoints.values, dtype=np.float64).reshape(-1, 5)
+        points, bulges = vertices[:, :2].copy(), vertices[:, 4].copy()
+        if _is_mirrored(entity):
+            points[:, 0] *= -1
+            bulges *= -1
+        paths.append((points, bulges, entity.closed, EDGE_POLYLINE))
+    for entity in by_type["POLYLINE"]:
+        if not (entity.is_2d_polyline or entity.is_3d_polyline):
+            continue  # polyface and polygon meshes have no cutting path
+        vertices = list(entity.vertices)
+        points = np.array(
+            [(vertex.dxf.location.x, vertex.dxf.location.y) for vertex in vertices], dtype=np.float64
+        ).reshape(-1, 2)
+        bulges = np.array([vertex.dxf.bulge for vertex in vertices], dtype=np.float64)
+        if entity.is_2d_polyline and _is_mirrored(entity):
+            points[:, 0] *= -1
+            bulges *= -1
+        paths.append((points, bulges, entity.is_closed, EDGE_POLYLINE))
+
+    # Adaptive flattening (ezdxf's C extension evaluates the curves when available)
+    for entity in by_type["SPLINE"] + by_type["ELLIPSE"]:
+        try:
+            points = np.array([(point.x, point.y) for point in entity.flattening(tolerance)], dtype=np.float64)
+        except Exception as e:
+            logger.debug(f"Skipping {entity.dxftype()}: {e}")
+            continue
+        closed = len(points) > 2 and np.allclose(points[0], points[-1])
+        if closed:
+            points = points[:-1]
+        kind = EDGE_SPLINE if entity.dxftype() == "SPLINE" else EDGE_ELLIPSE
+        paths.append((points, np.zeros(len(points)), closed, kind))
+
+    # INSERTs count through the block entities they place, not themselves
+    geometry = _edge_table(
+        single_edges, paths, np.array(circles, dtype=np.float64).reshape(-1, 3),
+        entity_count - len(by_type["INSERT"])
+    )
+
+    # Block references, grouped by block so each block is placed in one batch
+    transforms_by_block: Dict[str, list] = defaultdict(list)
+    for insert in by_type["INSERT"]:
+        for reference in insert.multi_insert():
+            transforms_by_block[insert.dxf.name].append(_affine(reference.matrix44()))
+        _block_geometry(insert, tolerance, block_cache, depth)
+
+    placed = [geometry]
+    for name, transforms in transforms_by_block.items():
+        block_geometry = block_cache.get(name)
+        if block_geometry is not None:
+            placed.extend(place_geometry(block_geometry, np.array(transforms), tolerance))
+    return concatenate_geometry(placed)
+
+
+def summarize(geometry: DXFGeometry) -> DXFSummary:
+    """Cut length, exact bounds and small features of the collected geometry."""
+    kinds = geometry.edge_kinds
+    lengths = edge_lengths(geometry)
+    cut_length = lengths.sum() + (2 * np.pi * geometry.circles[:, 2]).sum()
+
+    edge_sizes = lengths[(kinds == EDGE_LINE) | (kinds == EDGE_POLYLINE)]
+    circle_diameters = 2 * geometry.circles[:, 2]
+    small_features = np.concatenate([
+        sizes[sizes < SMALL_FEATURE_MM] for sizes in (edge_sizes, circle_diameters)
+    ])
+
+    curved = geometry.edge_bulges != 0
+    arcs, spans = bulge_arcs(
+        geometry.edge_starts[curved], geometry.edge_ends[curved], geometry.edge_bulges[curved]
+    )
+    circle_arcs = np.column_stack([geometry.circles, np.zeros(len(geometry.circles))])
+    points = np.vstack([
+        geometry.edge_starts,
+        geometry.edge_ends,
+        arc_extreme_points(arcs, spans),
+        arc_extreme_points(circle_arcs, np.full(len(circle_arcs), 360.0)),
+    ])
+    bounds = np.array([points.min(axis=0), points.max(axis=0)]) if len(points) else None
+
+    return DXFSummary(
+        cut_length=float(cut_length),
+        bounds=bounds,
+        small_features=small_features,
+        entity_count=geometry.entity_count
+    )
+
+
+def edge_lengths(geometry: DXFGeometry) -> np.ndarray:
+    """Length of every edge: chord length for straight edges, arc length for bulged ones."""
+    chords = np.linalg.norm(geometry.edge_ends - geometry.edge_starts, axis=1)
+    sweeps = 4 * np.arctan(np.abs(geometry.edge_bulges))
+    half_sines = np.sin(sweeps / 2)
+    curved = half_sines > 0
+    lengths = chords.copy()
+    # Arc length = radius * sweep, with radius = chord / (2 sin(sweep / 2))
+    lengths[curved] = chords[curved] * sweeps[curved] / (2 * half_sines[curved])
+    return lengths
+
+
+def bulge_arcs(starts: np.ndarray, ends: np.ndarray, bulges: np.ndarray):
+    """
+    Convert bulged edges to arcs (center x, center y, radius, start angle) and spans in degrees.
+
+    Clockwise edges become the counter-clockwise arc from their end to their start.
+    """
+    chords = ends - starts
+    chord_lengths = np.linalg.norm(chords, axis=1)
+
+    # Center is offset from the chord midpoint along its left normal
+    left_normals = np.column_stack([-chords[:, 1], chords[:, 0]]) / chord_lengths[:, None]
+    offsets = chord_lengths / 2 * (1 - bulges ** 2) / (2 * bulges)
+    centers = (starts + ends) / 2 + left_normals * offsets[:, None]
+    radii = chord_lengths / 2 * (1 + bulges ** 2) / (2 * np.abs(bulges))
+    spans = np.degrees(4 * np.arctan(np.abs(bulges)))
+
+    arc_starts = np.where(bulges[:, None] > 0, starts, ends)
+    start_angles = np.degrees(
+        np.arctan2(arc_starts[:, 1] - centers[:, 1], arc_starts[:, 0] - centers[:, 0])
+    ) % 360.0
+
+    return np.column_stack([centers, radii, start_angles]), spans
+
+
+def flatten_edges(starts: np.ndarray, ends: np.ndarray, bulges: np.ndarray, steps: np.ndarray) -> np.ndarray:
+    """
+    Start point of every edge followed by ``steps - 1`` evenly spaced points
+    along it (bulged edges are followed along their arc).
+    """
+    if np.all(steps == 1):
+        return starts
+
+    sweeps = 4 * np.arctan(bulges)  # signed
+    chords = ends - starts
+    chord_lengths = np.linalg.norm(chords, axis=1)
+    half_sines = np.sin(sweeps / 2)
+    edge_index = np.repeat(np.arange(len(starts)), steps)
+    step_index = np.arange(len(edge_index)) - np.repeat(np.cumsum(steps) - steps, steps)
+    fractions = step_index / np.repeat(steps, steps)
+    curved = half_sines[edge_index] != 0
+    points = starts[edge_index] + chords[edge_index] * fractions[:, None]
+
+    # On an arc, the chord from the start to the point after turning t has length
+    # 2 r sin(t / 2) and is rotated by (t - sweep) / 2 from the full chord
+    index = edge_index[curved]
+    turned = sweeps[index] * fractions[curved]
+    radii = chord_lengths[index] / (2 * np.abs(half_sines[index]))
+    rotation = (turned - sweeps[index]) / 2
+    directions = chords[index] / chord_lengths[index, None]
+    rotated = np.column_stack([
+        directions[:, 0] * np.cos(rotation) - directions[:, 1] * np.sin(rotation),
+        directions[:, 0] * np.sin(rotation) + directions[:, 1] * np.cos(rotation),
+    ])
+    points[curved] = starts[index] + rotated * (2 * radii * np.abs(np.sin(turned / 2)))[:, None]
+    return points
+
+
+def arc_steps(radii: np.ndarray, sweeps: np.ndarray, tolerance: float) -> np.ndarray:
+    """Chords needed to follow arcs (sweeps in radians) within ``tolerance``."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_step = 2 * np.arccos(np.clip(1 - tolerance / radii, -1.0, 1.0))
+        steps = np.ceil(np.abs(sweeps) / max_step)
+    return np.clip(np.nan_to_num(steps, nan=1.0), 1, None).astype(np.int64)
+
+
+def flatten_arcs(geometry: DXFGeometry, tolerance: float) -> DXFGeometry:
+    """Copy of ``geometry`` with bulged edges and circles replaced by straight chords."""
+    sweeps = 4 * np.arctan(geometry.edge_bulges)
+    chords = np.linalg.norm(geometry.edge_ends - geometry.edge_starts, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        radii = chords / (2 * np.abs(np.sin(sweeps / 2)))
+    steps = np.where(geometry.edge_bulges != 0, arc_steps(radii, sweeps, tolerance), 1)
+    starts = flatten_edges(geometry.edge_starts, geometry.edge_ends, geometry.edge_bulges, steps)
+    ends = np.roll(starts, -1, axis=0)
+    last_steps = np.cumsum(steps) - 1
+    ends[last_steps] = geometry.edge_ends
+
+    # Circles become closed straight-edged paths
+    circles = geometry.circles
+    circle_steps = np.maximum(arc_steps(circles[:, 2], np.full(len(circles), 2 * np.pi), tolerance), 8)
+    circle_index = np.repeat(np.arange(len(circles)), circle_steps)
+    step_index = np.arange(len(circle_index)) - np.repeat(np.cumsum(circle_steps) - circle_steps, circle_steps)
+    angles = 2 * np.pi * step_index / circle_steps[circle_index]
+    circle_starts = circles[circle_index, :2] + circles[circle_index, 2:3] * np.column_stack([np.cos(angles), np.sin(angles)])
+    next_index = np.where(step_index + 1 == circle_steps[circle_index], -step_index, 1)
+    circle_ends = circle_starts[np.arange(len(circle_starts)) + next_index]
+    path_count = len(geometry.path_closed)
+
+    return DXFGeometry(
+        edge_starts=np.vstack([starts, circle_starts]),
+        edge_ends=np.vstack([ends, circle_ends]),
+        edge_bulges=np.zeros(len(starts) + len(circle_starts)),
+        edge_kinds=np.concatenate([
+            # Chords of arcs are not straight segments of the drawing
+            np.repeat(np.where(geometry.edge_bulges != 0, EDGE_ARC, geometry.edge_kinds).astype(np.int8), steps),
+            np.full(len(circle_starts), EDGE_ARC, dtype=np.int8)
+        ]),
+        edge_paths=np.concatenate([np.repeat(geometry.edge_paths, steps), path_count + circle_index]),
+        path_closed=np.concatenate([geometry.path_closed, np.ones(len(circles), dtype=bool)]),
+        circles=np.empty((0, 3)),
+        entity_count=geometry.entity_count
+    )
+
+
+def place_geometry(geometry: DXFGeometry, transforms: np.ndarray, tolerance: float) -> List[DXFGeometry]:
+    """
+    Copies of block geometry under each 2D affine transform (k, 3, 2): rows
+    are the images of the x and y unit vectors, then the translation.
+
+    Rotations, mirrors and uniform scales keep arcs and circles exact;
+    non-uniform scales turn them into ellipses, so those copies are made
+    from a flattened version of the block.
+    """
+    linear = transforms[:, :2]
+    determinants = linear[:, 0, 0] * linear[:, 1, 1] - linear[:, 0, 1] * linear[:, 1, 0]
+    row_lengths = np.linalg.norm(linear, axis=2)
+    similar = np.isclose(row_lengths[:, 0], row_lengths[:, 1], rtol=1e-9) & np.isclose(
+        np.einsum("ki,ki->k", linear[:, 0], linear[:, 1]), 0.0, atol=1e-9 * row_lengths.prod(axis=1)
+    )
+
+    placed = []
+    if similar.any():
+        placed.append(_transform(geometry, transforms[similar], determinants[similar]))
+    if not similar.all():
+        # Flatten tightly enough for the largest stretch among these copies
+        stretch = row_lengths[~similar].max()
+        flat = flatten_arcs(geometry, tolerance / stretch if stretch > 0 else tolerance)
+        placed.append(_transform(flat, transforms[~similar], determinants[~similar]))
+    return placed
+
+
+def concatenate_geometry(parts: List[DXFGeometry]) -> DXFGeometry:
+    """Join geometries into one, renumbering paths and summing entity counts."""
+    path_offsets = np.cumsum([0] + [len(part.path_closed) for part in parts[:-1]])
+    return DXFGeometry(
+        edge_starts=np.vstack([part.edge_starts for part in parts]),
+        edge_ends=np.vstack([part.edge_ends for part in parts]),
+        edge_bulges=np.concatenate([part.edge_bulges for part in parts]),
+        edge_kinds=np.concatenate([part.edge_kinds for part in parts]),
+        edge_paths=np.concatenate([part.edge_paths + offset for part, offset in zip(parts, path_offsets)]),
+        path_closed=np.concatenate([part.path_closed for part in parts]),
+        circles=np.vstack([part.circles for part in parts]),
+        entity_count=sum(part.entity_count for part in parts)
+    )
+
+
+def arc_extreme_points(arcs: np.ndarray, spans: np.ndarray) -> np.ndarray:
+    """
+    Points that bound each arc: both end points plus every axis extreme
+    (0, 90, 180, 270 degrees) the arc sweeps through.
+    """
+    if not len(arcs):
+        return np.empty((0, 2))
+    centers, radii, starts = arcs[:, :2], arcs[:, 2:3], arcs[:, 3:4]
+
+    # Angles relative to the start, for the end point and the four quadrant extremes
+    relative = np.hstack([
+        np.zeros_like(starts), spans[:, None], (QUADRANT_ANGLES[None, :] - starts) % 360.0
+    ])
+    inside = relative <= spans[:, None]
+    angles = np.radians(starts + relative)[inside]
+    radii = np.broadcast_to(radii, relative.shape)[inside]
+    centers = np.repeat(centers, inside.sum(axis=1), axis=0)
+    return centers + radii[:, None] * np.column_stack([np.cos(angles), np.sin(angles)])
+
+
+def _edge_table(single_edges, paths, circles: np.ndarray, entity_count: int) -> DXFGeometry:
+    """Concatenate single edges and the edges of all paths into one table."""
+    count = len(single_edges)
+    starts = [np.array([edge[0] for edge in single_edges], dtype=np.float64).reshape(-1, 2)]
+    ends = [np.array([edge[1] for edge in single_edges], dtype=np.float64).reshape(-1, 2)]
+    bulges = [np.array([edge[2] for edge in single_edges], dtype=np.float64)]
+    kinds = [np.array([edge[3] for edge in single_edges], dtype=np.int8)]
+    path_ids = [np.arange(count, dtype=np.int64)]
+    path_closed = [False] * count
+    for points, vertex_bulges, closed, kind in paths:
+        if len(points) < 2:
+            continue
+        if closed:
+            starts.append(points)
+            ends.append(np.roll(points, -1, axis=0))
+            bulges.append(vertex_bulges)
+        else:
+            starts.append(points[:-1])
+            ends.append(points[1:])
+            bulges.append(vertex_bulges[:-1])
+        count = len(starts[-1])
+        kinds.append(np.full(count, kind, dtype=np.int8))
+        path_ids.append(np.full(count, len(path_closed), dtype=np.int64))
+        path_closed.append(bool(closed))
+
+    starts, ends, bulges = np.vstack(starts), np.vstack(ends), np.concatenate(bulges)
+    # A zero-length edge has no arc through it
+    bulges[np.all(starts == ends, axis=1)] = 0.0
+
+    return DXFGeometry(
+        edge_starts=starts,
+        edge_ends=ends,
+        edge_bulges=bulges,
+        edge_kinds=np.concatenate(kinds),
+        edge_paths=np.concatenate(path_ids),
+        path_closed=np.array(path_closed, dtype=bool),
+        circles=circles,
+        entity_count=entity_count
+    )
+
+
+def _transform(geometry: DXFGeometry, transforms: np.ndarray, determinants: np.ndarray) -> DXFGeometry:
+    """k transformed copies of ``geometry`` in one DXFGeometry."""
+    copies = len(transforms)
+    linear, translations = transforms[:, :2], transforms[:, 2]
+
+    def apply(points):
+        return (np.einsum("ni,kij->knj", points, linear) + translations[:, None]).reshape(-1, 2)
+
+    # Mirroring reverses the direction in which arcs turn
+    signs = np.sign(determinants)
+    scales = np.sqrt(np.abs(determinants))
+    circles = geometry.circles
+    path_count = len(geometry.path_closed)
+
+    return DXFGeometry(
+        edge_starts=apply(geometry.edge_starts),
+        edge_ends=apply(geometry.edge_ends),
+        edge_bulges=(signs[:, None] * geometry.edge_bulges[None]).reshape(-1),
+        edge_kinds=np.tile(geometry.edge_kinds, copies),
+        edge_paths=(geometry.edge_paths[None] + path_count * np.arange(copies)[:, None]).reshape(-1),
+        path_closed=np.tile(geometry.path_closed, copies),
+        circles=np.column_stack([
+            apply(circles[:, :2]), (scales[:, None] * circles[None, :, 2]).reshape(-1)
+        ]).reshape(-1, 3),
+        entity_count=geometry.entity_count * copies
+    )
+
+
+def _affine(matrix) -> np.ndarray:
+    """x/y part of an ezdxf Matrix44 (row vector convention) as a (3, 2) transform."""
+    rows = np.array(list(matrix.rows()), dtype=np.float64)
+    return np.vstack([rows[0, :2], rows[1, :2], rows[3, :2]])
+
+
+def _block_geometry(insert, tolerance: float, block_cache: Dict[str, Optional[DXFGeometry]], depth: int):
+    """Collect the referenced block once, in block coordinates."""
+    name = insert.dxf.name
+    if name in block_cache:
+        return
+    block = insert.block()
+    if block is None or depth >= MAX_BLOCK_DEPTH:
+        logger.warning(f"Skipping block reference {name}")
+        block_cache[name] = None
+        return
+    # Placeholder first, so a block that references itself resolves to nothing
+    block_cache[name] = None
+    block_cache[name] = collect_geometry(block, tolerance, block_cache, depth + 1)
+
+
+def _is_mirrored(entity) -> bool:
+    """True for 2D entities drawn with extrusion (0, 0, -1), i.e. x mirrored in WCS."""
+    return entity.dxf.hasattr("extrusion") and entity.dxf.extrusion[2] < 0
+
+
+def _ocs_point(entity, point):
+    if _is_mirrored(entity):
+        return (-point[0], point[1])
+    return (point[0], point[1])
@@ -1,19 +1,104 @@
 import numpy as np
 import trimesh
 import os
+import io
+import hashlib
 import tempfile
+import threading
 import requests
-from typing import Dict, List, Optional, Tuple, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Any, Union
 from dataclasses import dataclass
 import logging
 from urllib.parse import urlparse
 import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 import ezdxf
 from ezdxf.acc import USE_C_EXT
 
+import dxf_pipeline
+import step_engine
+import step_features
+import mesh_proxy
+import orientation
+import profiling
+import telemetry
+from dxf_contours import ContourSummary, build_contours
+from analysis_context import AnalysisContext
+from mesh_cache import MeshArtifact, MeshCache
+from stl_reader import STLTriangles
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change alters analysis results, so cached results are not reused
+ANALYZER_VERSION = "9"
+
+STEP_FILE_TYPES = ("step", "stp", "iges", "igs")
+SUPPORTED_FILE_TYPES = ("stl", "dxf") + STEP_FILE_TYPES
+
+# Request options that change analysis results (and therefore cache keys)
+RESULT_OPTIONS = ("material_thickness", "metrics", "profile", "flatten_tolerance")
+
+# Metrics that can be requested through options["metrics"] / options["profile"].
+# Volume, surface area and bounding box are always computed (the response requires them).
+BASE_METRICS = ("volume", "surface_area", "bbox")
+METRICS = BASE_METRICS + ("triangle_count", "overhang_area", "is_watertight", "wall_thickness", "orientation")
+# Only computed for 3D printing processes
+PRINT_METRICS = ("overhang_area", "orientation")
+PRINT_PROCESS_TYPES = ("3d_fff", "3d_sla")
+METRIC_PROFILES = {
+    "instant_quote": BASE_METRICS,
+    "full_dfm": METRICS,
+}
+DEFAULT_METRIC_PROFILE = "full_dfm"
+
+# Download settings
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv("DOWNLOAD_CONNECT_TIMEOUT_SECONDS", 5))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("DOWNLOAD_READ_TIMEOUT_SECONDS", 60))
+MAX_FILE_SIZE_BYTES = int(float(os.getenv("MAX_FILE_SIZE_MB", 100)) * 1024 * 1024)
+# Files up to this size are kept in memory instead of being written to a temp file
+IN_MEMORY_MAX_BYTES = int(float(os.getenv("IN_MEMORY_DOWNLOAD_MAX_MB", 16)) * 1024 * 1024)
+HTTP_POOL_SIZE = int(os.getenv("DOWNLOAD_POOL_SIZE", 16))
+# Client errors from the file URL that may pass on retry
+TRANSIENT_CLIENT_STATUSES = (408, 429)
+
+BINARY_DXF_SENTINEL = b"AutoCAD Binary DXF\r\n\x1a\x00"
+# Bounds for options["flatten_tolerance"] (mm): finer is slow on large drawings, coarser misstates lengths
+MIN_FLATTEN_TOLERANCE_MM = 0.001
+MAX_FLATTEN_TOLERANCE_MM = 1.0
+
+# Spline and ellipse flattening evaluate curves through ezdxf, which is much faster with its C extensions
+if not USE_C_EXT:
+    logger.warning("ezdxf C extensions are not available; DXF curve flattening runs in pure Python")
+
+# CNC limits for STEP feature checks
+STEP_MIN_HOLE_DIAMETER_MM = 1.0
+STEP_MAX_HOLE_DEPTH_RATIO = 4.0
+STEP_MIN_INTERNAL_RADIUS_MM = 1.0
+
+# Parsed meshes (and STEP B-rep measurements) kept on local disk by content digest (0 disables it)
+MESH_CACHE_DIR = os.getenv("MESH_CACHE_DIR", os.path.join(tempfile.gettempdir(), "geometry-meshes"))
+MESH_CACHE_MAX_BYTES = int(float(os.getenv("MESH_CACHE_MAX_MB", 2048)) * 1024 * 1024)
+
+# Meshes above this many triangles get a decimated proxy for sampling-based metrics (0 disables it)
+MESH_PROXY_MAX_TRIANGLES = int(os.getenv("MESH_PROXY_MAX_TRIANGLES", 500_000))
+
+# Wall thickness sampling: sample count grows with sqrt(face count) within these bounds
+WALL_THICKNESS_MIN_SAMPLES = 500
+WALL_THICKNESS_MAX_SAMPLES = 5000
+# Without embree (embreex missing, e.g. no wheel for the platform) every ray costs far more,
+# so the sample count stays at what the per-ray implementation used
+WALL_THICKNESS_FALLBACK_MAX_SAMPLES = 1000
+WALL_THICKNESS_SAMPLES_PER_SQRT_FACE = 10
+# Ray origins are moved this fraction of the mesh scale inside the surface to avoid self-hits
+WALL_THICKNESS_RAY_OFFSET = 1e-6
+WALL_THICKNESS_PERCENTILES = (5, 25, 50, 75, 95)
+# Rays per intersection query; bounds the candidate arrays built without embree
+WALL_THICKNESS_RAY_BATCH = 256
+
 @dataclass
 class BoundingBox:
     x: float
@@ -23,6 +108,89 @@ class BoundingBox:
     def to_dict(self):
         return {"x": self.x, "y": self.y, "z": self.z}
 
+class FileTooLargeError(Exception):
+    """Raised when a download exceeds MAX_FILE_SIZE_MB."""
+
+class SourceFileError(Exception):
+    """Raised when the file URL answers with a client error (e.g. 403, 404): bad input, not worth retrying."""
+    
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+@dataclass
+class DownloadedFile:
+    sha256: str
+    size_bytes: int
+    path: Optional[str] = None  # set when the file was written to disk
+    data: Optional[bytes] = None  # set when the file was kept in memory
+    
+    @property
+    def source(self) -> Union[str, bytes]:
+        """What to pass to GeometryAnalyzer.analyze: file path or in-memory bytes."""
+        return self.data if self.data is not None else self.path
+    
+    def cleanup(self):
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+class FileSink:
+    """
+    Receives a file in chunks: hashes it, enforces MAX_FILE_SIZE_MB and keeps it in
+    memory up to IN_MEMORY_DOWNLOAD_MAX_MB (when ``in_memory`` is set), spilling to
+    a temporary file beyond that.
+    """
+    
+    def __init__(self, in_memory: bool = True):
+        self.digest = hashlib.sha256()
+        self.size_bytes = 0
+        self._buffer = io.BytesIO() if in_memory else None
+        self._temp_file = None if in_memory else tempfile.NamedTemporaryFile(delete=False)
+    
+    def write(self, chunk: bytes):
+        self.size_bytes += len(chunk)
+        if self.size_bytes > MAX_FILE_SIZE_BYTES:
+            raise FileTooLargeError(f"File exceeds {MAX_FILE_SIZE_BYTES} bytes")
+        self.digest.update(chunk)
+        
+        if self._buffer is not None and self.size_bytes > IN_MEMORY_MAX_BYTES:
+            # Too big to keep in memory: spill what we have to disk
+            self._temp_file = tempfile.NamedTemporaryFile(delete=False)
+            self._temp_file.write(self._buffer.getbuffer())
+            self._buffer = None
+        
+        if self._buffer is not None:
+            self._buffer.write(chunk)
+        else:
+            self._temp_file.write(chunk)
+    
+    def finish(self) -> DownloadedFile:
+        if self._buffer is not None:
+            return DownloadedFile(sha256=self.digest.hexdigest(), size_bytes=self.size_bytes,
+                                  data=self._buffer.getvalue())
+        self._temp_file.close()
+        return DownloadedFile(sha256=self.digest.hexdigest(), size_bytes=self.size_bytes,
+                              path=self._temp_file.name)
+    
+    def discard(self):
+        """Drop what was received so far (and its temporary file)."""
+        if self._temp_file:
+            self._temp_file.close()
+            os.unlink(self._temp_file.name)
+            self._temp_file = None
+        self._buffer = None
+
+# Analysis of one file for several process types: process_type -> (metrics, issues)
+ProcessResults = Dict[str, Tuple["GeometryMetrics", List["DFMIssue"]]]
+
+@dataclass
+class WallThicknessStats:
+    min: float
+    avg: float
+    percentiles: Dict[str, float]  # "p5", "p50", ... in mm
+    sample_count: int
+    hit_count: int
+
 @dataclass
 class GeometryMetrics:
     volume_cm3: float
@@ -30,11 +198,18 @@ class GeometryMetrics:
     bbox_mm: BoundingBox
     length_cut_mm: Optional[float] = None
     holes_count: Optional[int] = None
+    pierce_count: Optional[int] = None
     overhang_area: Optional[float] = None
     wall_thickness_min: Optional[float] = None
     wall_thickness_avg: Optional[float] = None
+    wall_thickness_percentiles: Optional[Dict[str, float]] = None
     triangle_count: Optional[int] = None
     is_watertight: Optional[bool] = None
+    # Set when wall thickness was measured on a decimated proxy of the mesh
+    proxy_triangle_count: Optional[int] = None
+    proxy_max_deviation_mm: Optional[float] = None
+    # Best build direction for 3D printing and its support estimate, with the file's own (+Z) as "current"
+    orientation: Optional[Dict[str, Any]] = None
     
     def to_dict(self):
         data = {
@@ -43,9 +218,10 @@ class GeometryMetrics:
             "bbox_mm": self.bbox_mm.to_dict()
         }
         # Add optional fields if they have values
-        for field in ["length_cut_mm", "holes_count", "overhang_area", 
-                     "wall_thickness_min", "wall_thickness_avg", 
-                     "triangle_count", "is_watertight"]:
+        for field in ["length_cut_mm", "holes_count", "pierce_count", "overhang_area", 
+                     "wall_thickness_min", "wall_thickness_avg", "wall_thickness_percentiles",
+                     "triangle_count", "is_watertight", "proxy_triangle_count", "proxy_max_deviation_mm",
+                     "orientation"]:
             value = getattr(self, field)
             if value is not None:
                 data[field] = value
@@ -68,144 +244,416 @@ class DFMIssue:
             data["location"] = self.location
         return data
 
+def _client_error_status(error: Exception) -> Optional[int]:
+    """HTTP status of a failed download if the source rejected the request (4xx), else None."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status_code = error.response.status_code
+    elif isinstance(error, ClientError):
+        status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    else:
+        return None
+    if status_code and 400 <= status_code < 500 and status_code not in TRANSIENT_CLIENT_STATUSES:
+        return status_code
+    return None
+
+def requested_metrics(options: Optional[Dict[str, Any]]) -> Tuple[str, ...]:
+    """
+    Resolve options["metrics"] and options["profile"] to the metrics to compute.
+    
+    Explicit metrics are added to the profile's (``instant_quote`` if only
+    metrics are given, ``full_dfm`` if neither is). Raises ValueError for
+    unknown names.
+    """
+    options = options or {}
+    metrics = options.get("metrics")
+    profile = options.get("profile") or ("instant_quote" if metrics else DEFAULT_METRIC_PROFILE)
+    if profile not in METRIC_PROFILES:
+        raise ValueError(f"Unknown metric profile: {profile}. Expected one of {', '.join(METRIC_PROFILES)}")
+    if metrics is None:
+        metrics = []
+    if isinstance(metrics, str) or not isinstance(metrics, list):
+        raise ValueError("options.metrics must be a list of metric names")
+    unknown = [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(map(str, unknown))}. Expected any of {', '.join(METRICS)}")
+    
+    selected = set(METRIC_PROFILES[profile]) | set(metrics)
+    return tuple(name for name in METRICS if name in selected)
+
+def flatten_tolerance(options: Optional[Dict[str, Any]]) -> float:
+    """Resolve options["flatten_tolerance"] (mm). Raises ValueError for values out of range."""
+    value = (options or {}).get("flatten_tolerance")
+    if value is None:
+        return dxf_pipeline.FLATTEN_TOLERANCE_MM
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("options.flatten_tolerance must be a number (mm)")
+    if not MIN_FLATTEN_TOLERANCE_MM <= value <= MAX_FLATTEN_TOLERANCE_MM:
+        raise ValueError(
+            f"options.flatten_tolerance must be between {MIN_FLATTEN_TOLERANCE_MM} and {MAX_FLATTEN_TOLERANCE_MM} mm"
+        )
+    return float(value)
+
 class GeometryAnalyzer:
     def __init__(self):
         self.s3_client = None
+        self._s3_lock = threading.Lock()
         if os.getenv("AWS_ACCESS_KEY_ID"):
-            self.s3_client = boto3.client(
-                's3',
-                region_name=os.getenv("AWS_REGION", "us-east-1")
+            self.s3_client = self._create_s3_client()
+        
+        # Pooled HTTP connections shared by all downloads
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=2, connect=2, read=0, backoff_factor=0.5,
+                              status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        )
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        
+        # Shared by every process on the host
+        self.mesh_cache = MeshCache(MESH_CACHE_DIR, MESH_CACHE_MAX_BYTES) if MESH_CACHE_MAX_BYTES > 0 else None
+    
+    def _create_s3_client(self):
+        return boto3.client(
+            's3',
+            region_name=os.getenv("AWS_REGION", "us-east-1"),
+            config=BotoConfig(
+                max_pool_connections=HTTP_POOL_SIZE,
+                connect_timeout=DOWNLOAD_CONNECT_TIMEOUT,
+                read_timeout=DOWNLOAD_READ_TIMEOUT,
+                retries={"max_attempts": 3, "mode": "standard"}
             )
+        )
     
-    def download_file(self, file_url: str) -> str:
-        """Download file from URL or S3 to temporary location."""
-        parsed_url = urlparse(file_url)
+    def _get_s3_client(self):
+        # Created on first use so instance roles work without AWS_ACCESS_KEY_ID
+        with self._s3_lock:
+            if self.s3_client is None:
+                self.s3_client = self._create_s3_client()
+            return self.s3_client
+    
+    def download_file(self, file_url: str, in_memory: bool = True) -> DownloadedFile:
+        """
+        Download file from URL or S3, hashing it on the way.
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
+        Files up to IN_MEMORY_DOWNLOAD_MAX_MB are kept in memory when ``in_memory`` is
+        set; larger ones (or all, if not set) are spilled to a temporary file.
+        """
+        parsed_url = urlparse(file_url)
+        sink = FileSink(in_memory)
         
         try:
             if parsed_url.scheme == 's3':
                 # Download from S3
                 bucket = parsed_url.netloc
                 key = parsed_url.path.lstrip('/')
-                self.s3_client.download_file(bucket, key, temp_file.name)
+                response = self._get_s3_client().get_object(Bucket=bucket, Key=key)
+                content_length = response.get("ContentLength")
+                chunks = response["Body"].iter_chunks(chunk_size=DOWNLOAD_CHUNK_SIZE)
             else:
                 # Download from HTTP/HTTPS
-                response = requests.get(file_url, stream=True)
+                response = self.http.get(
+                    file_url, stream=True, timeout=(DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_READ_TIMEOUT)
+                )
                 response.raise_for_status()
-                for chunk in response.iter_content(chunk_size=8192):
-                    temp_file.write(chunk)
+                content_length = response.headers.get("Content-Length")
+                chunks = response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+            
+            if content_length and int(content_length) > MAX_FILE_SIZE_BYTES:
+                raise FileTooLargeError(f"File is {int(content_length)} bytes, limit is {MAX_FILE_SIZE_BYTES}")
             
-            temp_file.close()
-            return temp_file.name
+            for chunk in chunks:
+                sink.write(chunk)
+            return sink.finish()
             
         except Exception as e:
-            temp_file.close()
-            os.unlink(temp_file.name)
+            sink.discard()
+            if isinstance(e, FileTooLargeError):
+                raise
+            status_code = _client_error_status(e)
+            if status_code is not None:
+                raise SourceFileError(f"file_url returned HTTP {status_code}", status_code) from e
             raise Exception(f"Failed to download file: {str(e)}")
     
-    def analyze_stl(self, file_path: str, process_type: str) -> Tuple[GeometryMetrics, List[DFMIssue]]:
-        """Analyze STL file using trimesh."""
+    def analyze(self, source: Union[str, bytes], file_type: str, process_type: str,
+                options: Optional[Dict[str, Any]] = None) -> Tuple[GeometryMetrics, List[DFMIssue]]:
+        """
+        Analyze a downloaded file with the analyzer matching its file type.
+        
+        ``source`` is a file path or the file's bytes; STEP/IGES need a path.
+        """
+        return self.analyze_processes(source, file_type, [process_type], options)[process_type]
+    
+    def analyze_processes(self, source: Union[str, bytes], file_type: str, process_types: Sequence[str],
+                          options: Optional[Dict[str, Any]] = None,
+                          content_sha256: Optional[str] = None) -> ProcessResults:
+        """
+        Analyze a downloaded file for several process types at once.
+        
+        The file is parsed once and process-independent metrics are computed
+        once; only process-specific metrics (overhangs, orientation, holes)
+        and DFM rules are evaluated per process type. With ``content_sha256``
+        meshes are loaded from (and added to) the mesh cache.
+        """
+        options = options or {}
+        file_type = file_type.lower()
+        
+        if file_type == "stl":
+            return self.analyze_stl_processes(source, process_types, requested_metrics(options), content_sha256)
+        elif file_type in STEP_FILE_TYPES:
+            return self.analyze_step_processes(source, process_types, requested_metrics(options), content_sha256)
+        elif file_type == "dxf":
+            material_thickness = options.get("material_thickness", 3.0)
+            return self.analyze_dxf_processes(source, process_types, material_thickness, flatten_tolerance(options))
+        
+        raise ValueError(f"Unsupported file type: {file_type}")
+    
+    def analyze_timed(self, source: Union[str, bytes], file_type: str, process_types: Sequence[str],
+                      options: Optional[Dict[str, Any]] = None, content_sha256: Optional[str] = None
+                      ) -> Tuple[ProcessResults, telemetry.StageTimings]:
+        """``analyze_processes``, plus the time spent in each stage (pool workers report it back with the results)."""
+        with telemetry.recording() as timings:
+            results = self.analyze_processes(source, file_type, process_types, options, content_sha256)
+        return results, timings
+    
+    def analyze_profiled(self, source: Union[str, bytes], file_type: str, process_types: Sequence[str],
+                         options: Optional[Dict[str, Any]] = None, content_sha256: Optional[str] = None
+                         ) -> Tuple[ProcessResults, telemetry.StageTimings, profiling.Profile]:
+        """``analyze_timed`` under the sampling profiler, plus the sampled profile."""
+        with profiling.SamplingProfiler() as profiler:
+            results, timings = self.analyze_timed(source, file_type, process_types, options, content_sha256)
+        return results, timings, profiler.profile()
+    
+    def analyze_stl(self, source: Union[str, bytes], process_type: str,
+                    metrics: Tuple[str, ...] = METRICS) -> Tuple[GeometryMetrics, List[DFMIssue]]:
+        """Analyze STL file (path or bytes) for one process type; see ``analyze_stl_processes``."""
+        return self.analyze_stl_processes(source, [process_type], metrics)[process_type]
+    
+    def analyze_stl_processes(self, source: Union[str, bytes], process_types: Sequence[str],
+                              metrics: Tuple[str, ...] = METRICS,
+                              content_sha256: Optional[str] = None) -> ProcessResults:
+        """
+        Analyze STL file (path or bytes), computing only the requested ``metrics``.
+        
+        Size and shape metrics come straight from the (memory-mapped) triangle
+        array; the trimesh mesh is only built for watertightness and ray casting.
+        ASCII triangles and merged meshes are reused from the mesh cache.
+        """
         try:
-            # Load mesh
-            mesh = trimesh.load(file_path)
-            
-            # Basic metrics
-            bbox = mesh.bounding_box.extents  # in mm
-            volume = mesh.volume / 1000  # convert to cm³
-            surface_area = mesh.area / 100  # convert to cm²
-            
-            # Additional metrics
-            is_watertight = mesh.is_watertight
-            triangle_count = len(mesh.faces)
+            artifact = self._cached_mesh(content_sha256, "stl")
+            context = AnalysisContext(self._stl_providers(source, artifact), stage_names={"triangles": "parse"})
+            values, proxy = self._mesh_values(context, process_types, metrics)
+            self._store_mesh(content_sha256, "stl", context, artifact)
             
-            # Calculate wall thickness (simplified)
-            wall_thickness_min, wall_thickness_avg = self._estimate_wall_thickness(mesh)
-            
-            # Calculate overhang areas for 3D printing
-            overhang_area = None
-            if process_type in ["3d_fff", "3d_sla"]:
-                overhang_area = self._calculate_overhang_area(mesh)
-            
-            metrics = GeometryMetrics(
-                volume_cm3=round(volume, 2),
-                surface_area_cm2=round(surface_area, 2),
-                bbox_mm=BoundingBox(
-                    x=round(bbox[0], 1),
-                    y=round(bbox[1], 1),
-                    z=round(bbox[2], 1)
-                ),
-                overhang_area=round(overhang_area, 2) if overhang_area else None,
-                wall_thickness_min=round(wall_thickness_min, 2) if wall_thickness_min else None,
-                wall_thickness_avg=round(wall_thickness_avg, 2) if wall_thickness_avg else None,
-                triangle_count=triangle_count,
-                is_watertight=is_watertight
-            )
-            
-            # Calculate DFM issues
-            issues = self._calculate_stl_dfm_issues(mesh, metrics, process_type)
-            
-            return metrics, issues
+            results = {}
+            for process_type in process_types:
+                process_metrics = self._mesh_metrics(values, proxy, process_type)
+                # Calculate DFM issues
+                with telemetry.stage("dfm"):
+                    issues = self._calculate_stl_dfm_issues(process_metrics, process_type)
+                results[process_type] = (process_metrics, issues)
+            return results
             
         except Exception as e:
             logger.error(f"Error analyzing STL: {str(e)}")
             raise
     
-    def _estimate_wall_thickness(self, mesh) -> Tuple[Optional[float], Optional[float]]:
-        """Estimate wall thickness using ray casting (simplified)."""
+    def _mesh_metric_names(self, process_types: Sequence[str], metrics: Tuple[str, ...]) -> Set[str]:
+        """The metrics to compute for all ``process_types``."""
+        # Overhangs and build orientation only matter for 3D printing
+        if not any(process_type in PRINT_PROCESS_TYPES for process_type in process_types):
+            metrics = tuple(name for name in metrics if name not in PRINT_METRICS)
+        return set(metrics) | set(BASE_METRICS)
+    
+    def _mesh_values(self, context: AnalysisContext, process_types: Sequence[str], metrics: Tuple[str, ...]):
+        """
+        Compute the requested mesh metrics once for all ``process_types``;
+        returns (values by metric name, decimated proxy or None).
+        """
+        names = self._mesh_metric_names(process_types, metrics)
+        values = {name: context.get(name) for name in names}
+        proxy = context.get("proxy") if "wall_thickness" in names else None
+        return values, proxy
+    
+    def _mesh_metrics(self, values: Dict[str, Any], proxy: Optional[mesh_proxy.MeshProxy], process_type: str,
+                      holes_count: Optional[int] = None) -> GeometryMetrics:
+        """GeometryMetrics for one process type from the values computed by ``_mesh_values``."""
+        bbox = values["bbox"]
+        wall_thickness = values.get("wall_thickness")
+        if process_type in PRINT_PROCESS_TYPES:
+            overhang_area = values.get("overhang_area")
+            orientation_result = values.get("orientation")
+        else:
+            overhang_area = orientation_result = None
+        
+        return GeometryMetrics(
+            volume_cm3=round(values["volume"], 2),
+            surface_area_cm2=round(values["surface_area"], 2),
+            bbox_mm=BoundingBox(
+                x=round(bbox[0], 1),
+                y=round(bbox[1], 1),
+                z=round(bbox[2], 1)
+            ),
+            holes_count=holes_count,
+            overhang_area=round(overhang_area, 2) if overhang_area else None,
+            wall_thickness_min=round(wall_thickness.min, 2) if wall_thickness else None,
+            wall_thickness_avg=round(wall_thickness.avg, 2) if wall_thickness else None,
+            wall_thickness_percentiles={
+                name: round(value, 2) for name, value in wall_thickness.percentiles.items()
+            } if wall_thickness else None,
+            triangle_count=values.get("triangle_count"),
+            is_watertight=values.get("is_watertight"),
+            proxy_triangle_count=proxy.triangle_count if proxy else None,
+            proxy_max_deviation_mm=round(proxy.max_deviation, 3) if proxy else None,
+            orientation=self._orientation_dict(orientation_result)
+        )
+    
+    def _stl_providers(self, source: Union[str, bytes], artifact: Optional[MeshArtifact] = None):
+        """
+        How each STL metric is computed, and from which intermediate values;
+        ``artifact`` supplies triangles and the merged mesh parsed earlier.
+        """
+        def load_triangles():
+            merged = artifact.merged if artifact else None
+            if artifact and artifact.triangles is not None:
+                return STLTriangles(artifact.triangles, merged=merged)
+            stl = STLTriangles.load(source)
+            if merged is not None and stl.file_view:
+                return STLTriangles(stl.triangles, merged=merged, file_view=True)
+            return stl
+        
+        return {
+            "triangles": ((), load_triangles),
+            "summary": (("triangles",), lambda stl: stl.summarize()),
+            "proxy": (("triangles", "summary"), self._mesh_proxy),
+            # Sampling-based metrics run on the decimated proxy when there is one
+            "sampling_mesh": (("triangles", "proxy"), lambda stl, proxy: proxy.mesh if proxy else stl.mesh),
+            "volume": (("summary",), lambda summary: summary.volume / 1000),  # cm³
+            "surface_area": (("summary",), lambda summary: summary.area / 100),  # cm²
+            "bbox": (("summary",), lambda summary: summary.extents),  # mm
+            "triangle_count": (("summary",), lambda summary: summary.triangle_count),
+            "overhang_area": (("summary",), lambda summary: summary.overhang_area / 100),  # cm²
+            "is_watertight": (("triangles",), lambda stl: stl.is_watertight()),
+            "wall_thickness": (("sampling_mesh",), self._estimate_wall_thickness),
+            "orientation": (("triangles", "summary"), orientation.optimize_orientation),
+        }
+    
+    def _cached_mesh(self, content_sha256: Optional[str], kind: str) -> Optional[MeshArtifact]:
+        """The mesh cache entry for a file's content, if there is one."""
+        if not (self.mesh_cache and content_sha256):
+            return None
+        try:
+            with telemetry.stage("mesh_cache_read"):
+                return self.mesh_cache.get(content_sha256, kind)
+        except Exception as e:
+            logger.warning(f"Mesh cache read failed: {e}")
+            return None
+    
+    def _store_mesh(self, content_sha256: Optional[str], kind: str, context: AnalysisContext,
+                    artifact: Optional[MeshArtifact], values: Optional[Dict[str, Any]] = None):
+        """
+        Add what this analysis parsed and the cache entry lacks to the mesh cache:
+        triangles that were not read straight from a binary STL, the merged mesh,
+        and ``values``.
+        """
+        if not (self.mesh_cache and content_sha256):
+            return
+        artifact = artifact or MeshArtifact()
+        arrays = {}
+        stl = context.peek("triangles")
+        if stl is not None:
+            if not stl.file_view and artifact.triangles is None:
+                arrays["triangles"] = np.asarray(stl.triangles)
+            merged = stl.merged_arrays()
+            if merged is not None and artifact.merged is None:
+                arrays["vertices"], arrays["faces"] = merged
+        if artifact.values:
+            values = None
+        if not arrays and not values:
+            return
+        try:
+            with telemetry.stage("mesh_cache_write"):
+                self.mesh_cache.put(content_sha256, kind, arrays, values)
+        except Exception as e:
+            logger.warning(f"Mesh cache write failed: {e}")
+    
+    def _orientation_dict(self, result) -> Optional[Dict[str, Any]]:
+        if result is None:
+            return None
+        best, current = result
+        return {**best.to_dict(), "current": current.to_dict()}
+    
+    def _mesh_proxy(self, stl: STLTriangles, summary) -> Optional[mesh_proxy.MeshProxy]:
+        """Decimated proxy for meshes above MESH_PROXY_MAX_TRIANGLES (0 disables decimation)."""
+        if 0 < MESH_PROXY_MAX_TRIANGLES < stl.triangle_count:
+            return mesh_proxy.decimate(stl, summary, MESH_PROXY_MAX_TRIANGLES)
+        return None
+    
+    def _estimate_wall_thickness(self, mesh) -> Optional[WallThicknessStats]:
+        """
+        Estimate wall thickness by casting one inward ray per surface sample.
+        
+        Rays are cast in batched queries and the first hit of each ray gives the
+        local thickness. Returns None if no ray hits the mesh.
+        """
         try:
-            # Sample points on surface
-            samples = mesh.sample(1000)
+            sample_count = self._wall_thickness_sample_count(len(mesh.faces))
+            # Fixed seed keeps results reproducible for the same mesh
+            points, face_index = trimesh.sample.sample_surface(mesh, sample_count, seed=0)
+            normals = mesh.face_normals[face_index]
+            
+            # Start each ray just inside the surface so it can't hit its own face
+            origins = points - normals * (WALL_THICKNESS_RAY_OFFSET * mesh.scale)
             
-            # For each sample, cast ray inward and find intersection
             thicknesses = []
-            for point, normal in zip(samples, mesh.face_normals[mesh.closest_point(samples)[2]]):
-                # Cast ray inward
-                ray_origin = point
-                ray_direction = -normal
-                
-                # Find intersections
+            for start in range(0, sample_count, WALL_THICKNESS_RAY_BATCH):
+                batch = slice(start, start + WALL_THICKNESS_RAY_BATCH)
                 locations, index_ray, index_tri = mesh.ray.intersects_location(
-                    ray_origins=[ray_origin],
-                    ray_directions=[ray_direction]
+                    ray_origins=origins[batch],
+                    ray_directions=-normals[batch],
+                    multiple_hits=False
                 )
-                
-                if len(locations) > 0:
-                    # Calculate distance to first intersection
-                    thickness = np.linalg.norm(locations[0] - ray_origin)
-                    thicknesses.append(thickness)
+                # A ray leaving the material exits through a face pointing along it; hits on
+                # faces turned towards the ray come from overlapping or folded surfaces
+                exits = np.einsum("ij,ij->i", mesh.face_normals[index_tri], normals[batch][index_ray]) < 0
+                if exits.any():
+                    thicknesses.append(
+                        np.linalg.norm(locations[exits] - points[batch][index_ray[exits]], axis=1)
+                    )
             
-            if thicknesses:
-                return min(thicknesses), np.mean(thicknesses)
-            return None, None
+            if not thicknesses:
+                return None
+            
+            thicknesses = np.concatenate(thicknesses)
+            percentiles = np.percentile(thicknesses, WALL_THICKNESS_PERCENTILES)
+            
+            return WallThicknessStats(
+                min=float(thicknesses.min()),
+                avg=float(thicknesses.mean()),
+                percentiles={
+                    f"p{p}": float(value) for p, value in zip(WALL_THICKNESS_PERCENTILES, percentiles)
+                },
+                sample_count=sample_count,
+                hit_count=len(thicknesses)
+            )
             
-        except:
-            return None, None
+        except Exception as e:
+            logger.warning(f"Wall thickness estimation failed: {str(e)}")
+            return None
     
-    def _calculate_overhang_area(self, mesh) -> float:
-        """Calculate area of surfaces that would need support in 3D printing."""
-        # Get face normals
-        normals = mesh.face_normals
-        
-        # Calculate angle with build direction (Z-axis)
-        z_axis = np.array([0, 0, 1])
-        angles = np.arccos(np.clip(np.dot(normals, z_axis), -1.0, 1.0))
-        
-        # Faces with angle > 45 degrees need support
-        overhang_faces = angles > np.radians(45)
-        
-        # Calculate area of overhang faces
-        overhang_area = np.sum(mesh.area_faces[overhang_faces]) / 100  # convert to cm²
-        
-        return overhang_area
+    def _wall_thickness_sample_count(self, face_count: int) -> int:
+        """Scale the number of thickness samples with mesh resolution."""
+        count = int(np.sqrt(face_count) * WALL_THICKNESS_SAMPLES_PER_SQRT_FACE)
+        max_samples = WALL_THICKNESS_MAX_SAMPLES if trimesh.ray.has_embree else WALL_THICKNESS_FALLBACK_MAX_SAMPLES
+        return int(np.clip(count, WALL_THICKNESS_MIN_SAMPLES, max_samples))
     
-    def _calculate_stl_dfm_issues(self, mesh, metrics: GeometryMetrics, process_type: str) -> List[DFMIssue]:
-        """Calculate DFM issues for STL files."""
+    def _calculate_stl_dfm_issues(self, metrics: GeometryMetrics, process_type: str) -> List[DFMIssue]:
+        """Calculate DFM issues for STL files; checks on metrics that were not computed are skipped."""
         issues = []
         
         # Check if mesh is watertight
-        if not metrics.is_watertight:
+        if metrics.is_watertight is False:
             issues.append(DFMIssue(
                 type="non_watertight",
                 severity="high",
@@ -249,7 +697,19 @@ class GeometryAnalyzer:
                         description=f"Large overhang area ({overhang_ratio*100:.0f}% of surface) will require support material"
                     ))
         
-        elif process_type == "3d_sla":
+        if process_type in PRINT_PROCESS_TYPES and metrics.orientation:
+            # Reorienting the part would save a good share of the support material
+            best = metrics.orientation["support_volume_cm3"]
+            current = metrics.orientation["current"]["support_volume_cm3"]
+            if current >= 1.0 and best < 0.8 * current:
+                issues.append(DFMIssue(
+                    type="suboptimal_orientation",
+                    severity="low",
+                    description=f"Printing along {metrics.orientation['build_direction']} instead of +Z reduces "
+                                f"support volume from {current:.1f}cm³ to {best:.1f}cm³"
+                ))
+        
+        if process_type == "3d_sla":
             # Check for trapped volumes
             if metrics.volume_cm3 > 50 and metrics.is_watertight:
                 issues.append(DFMIssue(
@@ -268,96 +728,111 @@ class GeometryAnalyzer:
         
         return issues
     
-    def analyze_step(self, file_path: str, process_type: str) -> Tuple[GeometryMetrics, List[DFMIssue]]:
-        """Analyze STEP/IGES files using gmsh for meshing."""
+    def analyze_step(self, file_path: str, process_type: str,
+                     metrics: Tuple[str, ...] = METRICS) -> Tuple[GeometryMetrics, List[DFMIssue]]:
+        """Analyze STEP/IGES file for one process type; see ``analyze_step_processes``."""
+        return self.analyze_step_processes(file_path, [process_type], metrics)[process_type]
+    
+    def analyze_step_processes(self, file_path: str, process_types: Sequence[str],
+                               metrics: Tuple[str, ...] = METRICS,
+                               content_sha256: Optional[str] = None) -> ProcessResults:
+        """
+        Analyze STEP/IGES files with gmsh (OpenCASCADE).
+        
+        Volume, area and bounds come from the B-rep. The surface is only
+        meshed when a mesh-derived metric (triangle count, overhang,
+        watertightness, wall thickness, orientation) is requested; those are then computed
+        from the mesh triangles exactly as for an STL.
+        
+        The B-rep measurements, features and surface mesh are kept in the mesh
+        cache; when it holds all that the request needs, the file is not imported.
+        """
         try:
-            import gmsh
-            
-            # Initialize gmsh
-            gmsh.initialize()
-            gmsh.option.setNumber("General.Terminal", 0)  # Disable terminal output
+            artifact = self._cached_mesh(content_sha256, "step")
+            mesh_needed = bool(self._mesh_metric_names(process_types, metrics) - set(BASE_METRICS))
+            if artifact and artifact.values and (artifact.triangles is not None or not mesh_needed):
+                context = AnalysisContext(
+                    {**self._stl_providers(None, artifact), **self._cached_step_providers(artifact.values)},
+                    stage_names={"triangles": "parse"}
+                )
+                values, proxy = self._mesh_values(context, process_types, metrics)
+                features = context.get("features")
+                self._store_mesh(content_sha256, "step", context, artifact)
+            else:
+                with step_engine.session.open(file_path) as gmsh:
+                    context = AnalysisContext(
+                        {**self._stl_providers(None), **self._step_providers(gmsh)},
+                        stage_names={"triangles": "mesh"}
+                    )
+                    values, proxy = self._mesh_values(context, process_types, metrics)
+                    features = context.get("features")
+                self._store_mesh(content_sha256, "step", context, artifact, values={
+                    "volume": float(values["volume"]),
+                    "surface_area": float(values["surface_area"]),
+                    "bbox": [float(value) for value in values["bbox"]],
+                    "features": features.to_dict()
+                })
             
-            try:
-                # Import the STEP/IGES file
-                gmsh.model.occ.importShapes(file_path)
-                gmsh.model.occ.synchronize()
-                
-                # Get model bounds
-                bbox = gmsh.model.getBoundingBox(-1, -1)
-                bbox_x = bbox[3] - bbox[0]
-                bbox_y = bbox[4] - bbox[1] 
-                bbox_z = bbox[5] - bbox[2]
-                
-                # Get volume and surface area
-                volumes = gmsh.model.occ.getEntities(3)  # 3D entities
-                total_volume = 0.0
-                total_surface_area = 0.0
-                
-                for dim, tag in volumes:
-                    mass_props = gmsh.model.occ.getMass(dim, tag)
-                    total_volume += mass_props
-                
-                # Get surfaces
-                surfaces = gmsh.model.occ.getEntities(2)  # 2D entities
-                holes_count = 0
-                small_features = []
-                
-                for dim, tag in surfaces:
-                    area = gmsh.model.occ.getMass(dim, tag)
-                    total_surface_area += area
-                    
-                    # Check for small surfaces (potential holes)
-                    if area < 100:  # mm²
-                        small_features.append(area)
-                        if area < 50:  # Likely a hole
-                            holes_count += 1
-                
-                # Convert units
-                volume_cm3 = total_volume / 1000
-                surface_area_cm2 = total_surface_area / 100
-                
-                # Generate mesh to get more detailed analysis
-                gmsh.model.mesh.generate(2)
-                
-                # Extract edges for CNC feature detection
-                edges = gmsh.model.occ.getEntities(1)  # 1D entities
-                sharp_edges = 0
-                for dim, tag in edges:
-                    # Check for sharp corners (simplified)
-                    sharp_edges += 1
-                
-                metrics = GeometryMetrics(
-                    volume_cm3=round(volume_cm3, 2),
-                    surface_area_cm2=round(surface_area_cm2, 2),
-                    bbox_mm=BoundingBox(
-                        x=round(bbox_x, 1),
-                        y=round(bbox_y, 1),
-                        z=round(bbox_z, 1)
-                    ),
-                    holes_count=holes_count if process_type == "cnc_3axis" else None
+            results = {}
+            for process_type in process_types:
+                process_metrics = self._mesh_metrics(
+                    values, proxy, process_type,
+                    holes_count=len(features.holes) if process_type == "cnc_3axis" else None
                 )
-                
                 # Calculate DFM issues
-                issues = self._calculate_step_dfm_issues(metrics, small_features, sharp_edges, process_type)
-                
-                return metrics, issues
-                
-            finally:
-                gmsh.finalize()
+                with telemetry.stage("dfm"):
+                    issues = self._calculate_step_dfm_issues(process_metrics, features, process_type)
+                results[process_type] = (process_metrics, issues)
+            return results
                 
         except Exception as e:
             logger.error(f"Error analyzing STEP with gmsh: {str(e)}")
             # Try trimesh as fallback
             try:
                 mesh = trimesh.load(file_path)
-                return self.analyze_stl(file_path, process_type)
+                telemetry.record_fallback("trimesh")
+                return self.analyze_stl_processes(file_path, process_types, metrics)
             except:
                 # Final fallback to mock data
-                return self._analyze_step_mock(file_path, process_type)
+                telemetry.record_fallback("mock")
+                return {process_type: self._analyze_step_mock(file_path, process_type)
+                        for process_type in process_types}
+    
+    def _step_providers(self, gmsh):
+        """
+        STEP values from the imported B-rep; mesh-based metrics reuse the STL
+        providers on top of ``triangles``, which meshes the surface on first use.
+        """
+        def mesh_surfaces():
+            gmsh.model.mesh.generate(2)
+            return STLTriangles(step_engine.surface_triangles(gmsh))
+        
+        def bbox():
+            x_min, y_min, z_min, x_max, y_max, z_max = gmsh.model.getBoundingBox(-1, -1)
+            return np.array([x_max - x_min, y_max - y_min, z_max - z_min])
+        
+        return {
+            "triangles": ((), mesh_surfaces),
+            "features": ((), lambda: step_features.extract_features(gmsh)),
+            "volume": ((), lambda: sum(gmsh.model.occ.getMass(dim, tag)
+                                       for dim, tag in gmsh.model.occ.getEntities(3)) / 1000),  # cm³
+            "surface_area": ((), lambda: sum(gmsh.model.occ.getMass(dim, tag)
+                                             for dim, tag in gmsh.model.occ.getEntities(2)) / 100),  # cm²
+            "bbox": ((), bbox),  # mm
+        }
     
-    def _calculate_step_dfm_issues(self, metrics: GeometryMetrics, small_features: List[float], 
-                                   sharp_edges: int, process_type: str) -> List[DFMIssue]:
-        """Calculate DFM issues for STEP files (CNC focused)."""
+    def _cached_step_providers(self, step_values: Dict[str, Any]):
+        """STEP values from the mesh cache instead of the imported B-rep (see ``_step_providers``)."""
+        return {
+            "features": ((), lambda: step_features.StepFeatures.from_dict(step_values["features"])),
+            "volume": ((), lambda: step_values["volume"]),  # cm³
+            "surface_area": ((), lambda: step_values["surface_area"]),  # cm²
+            "bbox": ((), lambda: np.array(step_values["bbox"])),  # mm
+        }
+    
+    def _calculate_step_dfm_issues(self, metrics: GeometryMetrics, features: step_features.StepFeatures,
+                                   process_type: str) -> List[DFMIssue]:
+        """Calculate DFM issues for STEP files (CNC focused) from the recognized B-rep features."""
         issues = []
         
         if process_type == "cnc_3axis":
@@ -379,31 +854,51 @@ class GeometryAnalyzer:
                     description=f"High aspect ratio ({aspect_ratio:.1f}:1) may cause workpiece deflection during machining"
                 ))
             
-            # Check for small features
-            if small_features:
-                min_feature = min(small_features)
-                if min_feature < 50:  # mm²
-                    issues.append(DFMIssue(
-                        type="small_features",
-                        severity="medium",
-                        description=f"Small features detected (min: {min_feature:.1f}mm²) may require special tooling"
-                    ))
+            # Check hole sizes and depths
+            small_holes = [hole.diameter for hole in features.holes if hole.diameter < STEP_MIN_HOLE_DIAMETER_MM]
+            if small_holes:
+                issues.append(DFMIssue(
+                    type="small_holes",
+                    severity="medium",
+                    description=f"{len(small_holes)} hole(s) below {STEP_MIN_HOLE_DIAMETER_MM:.1f}mm diameter "
+                                f"(min: {min(small_holes):.2f}mm) require micro drills"
+                ))
             
-            # Check for deep holes
-            if metrics.holes_count and metrics.holes_count > 0:
-                if metrics.bbox_mm.z > 20:  # Deep part with holes
-                    issues.append(DFMIssue(
-                        type="deep_holes",
-                        severity="medium",
-                        description=f"Deep holes in thick material may require special drilling operations"
-                    ))
+            deep_holes = [hole.depth / hole.diameter for hole in features.holes
+                          if hole.depth > STEP_MAX_HOLE_DEPTH_RATIO * hole.diameter]
+            if deep_holes:
+                issues.append(DFMIssue(
+                    type="deep_holes",
+                    severity="medium",
+                    description=f"{len(deep_holes)} hole(s) deeper than {STEP_MAX_HOLE_DEPTH_RATIO:.0f}x their "
+                                f"diameter (up to {max(deep_holes):.1f}x) require peck drilling"
+                ))
             
-            # Check sharp internal corners
-            if sharp_edges > 50:
+            side_holes = sum(1 for hole in features.holes if not hole.vertical)
+            if side_holes:
                 issues.append(DFMIssue(
-                    type="sharp_corners",
+                    type="side_holes",
                     severity="low",
-                    description="Many sharp internal corners detected. Consider adding fillets for easier machining"
+                    description=f"{side_holes} hole(s) not along the Z axis need additional setups"
+                ))
+            
+            # Check internal corners
+            if features.sharp_internal_corners:
+                issues.append(DFMIssue(
+                    type="sharp_corners",
+                    severity="medium",
+                    description=f"{features.sharp_internal_corners} sharp internal corner(s) cannot be cut with a "
+                                f"rotating tool. Add a radius of at least {STEP_MIN_INTERNAL_RADIUS_MM:.1f}mm"
+                ))
+            
+            small_radii = [radius for radius in features.internal_corner_radii
+                           if radius < STEP_MIN_INTERNAL_RADIUS_MM]
+            if small_radii:
+                issues.append(DFMIssue(
+                    type="small_internal_radius",
+                    severity="medium",
+                    description=f"Internal corner radius down to {min(small_radii):.2f}mm requires small end mills. "
+                                f"Consider at least {STEP_MIN_INTERNAL_RADIUS_MM:.1f}mm"
                 ))
         
         return issues
@@ -508,120 +1003,95 @@ class GeometryAnalyzer:
         
         return issues
     
-    def analyze_dxf(self, file_path: str, process_type: str, material_thickness: float = 3.0) -> Tuple[GeometryMetrics, List[DFMIssue]]:
-        """Analyze DXF files for laser cutting."""
+    def _calculate_contour_dfm_issues(self, contours: ContourSummary, material_thickness: float) -> List[DFMIssue]:
+        """DFM issues found while building DXF contours."""
+        issues = []
+        
+        if contours.open_count:
+            issues.append(DFMIssue(
+                type="open_contours",
+                severity="low",
+                description=f"{contours.open_count} contours are not closed and cannot be cut as parts or holes"
+            ))
+        
+        # Holes narrower than the material is thick do not cut cleanly
+        holes = contours.holes
+        if holes.any():
+            # Equivalent diameter 4A/P is exact for circles and the width for long slots
+            widths = 4 * contours.areas[holes] / contours.perimeters[holes]
+            narrow = widths < material_thickness
+            if narrow.any():
+                issues.append(DFMIssue(
+                    type="small_holes",
+                    severity="medium",
+                    description=f"{int(narrow.sum())} holes are narrower than the material thickness "
+                                f"({material_thickness:.1f}mm, smallest: {widths.min():.2f}mm)"
+                ))
+        
+        return issues
+    
+    def _read_dxf(self, source: Union[str, bytes]):
+        """Load a DXF document from a path or from bytes (ASCII or binary DXF)."""
+        if not isinstance(source, bytes):
+            return ezdxf.readfile(source)
+        
+        if source.startswith(BINARY_DXF_SENTINEL):
+            from ezdxf.lldxf.tagger import binary_tags_loader
+            from ezdxf.document import Drawing
+            return Drawing.load(binary_tags_loader(source, errors="surrogateescape"))
+        
+        # Same encoding detection as ezdxf.readfile: header is ASCII, encoding is declared in it
+        data = source.replace(b"\r\n", b"\n")
+        info = ezdxf.filemanagement.dxf_stream_info(io.StringIO(data.decode("utf-8", errors="ignore")))
+        return ezdxf.read(io.StringIO(data.decode(info.encoding, errors="surrogateescape")))
+    
+    def analyze_dxf(self, source: Union[str, bytes], process_type: str, material_thickness: float = 3.0,
+                    tolerance: float = dxf_pipeline.FLATTEN_TOLERANCE_MM) -> Tuple[GeometryMetrics, List[DFMIssue]]:
+        """Analyze DXF file (path or bytes) for one process type; see ``analyze_dxf_processes``."""
+        return self.analyze_dxf_processes(source, [process_type], material_thickness, tolerance)[process_type]
+    
+    def analyze_dxf_processes(self, source: Union[str, bytes], process_types: Sequence[str],
+                              material_thickness: float = 3.0,
+                              tolerance: float = dxf_pipeline.FLATTEN_TOLERANCE_MM) -> ProcessResults:
+        """
+        Analyze DXF files (path or bytes) for laser cutting.
+        
+        Block references are expanded; splines and ellipses are flattened to
+        within ``tolerance`` mm. The metrics do not depend on the process type;
+        only the DFM rules are evaluated per process type.
+        """
         try:
             # Load DXF document
-            doc = ezdxf.readfile(file_path)
-            msp = doc.modelspace()
-            
-            # Extract all entities and calculate metrics
-            total_length = 0.0
-            min_x = min_y = float('inf')
-            max_x = max_y = float('-inf')
-            small_features = []
-            entity_count = 0
+            with telemetry.stage("parse"):
+                doc = self._read_dxf(source)
+                msp = doc.modelspace()
             
-            for entity in msp:
-                entity_count += 1
-                
-                if entity.dxftype() == 'LINE':
-                    start = entity.dxf.start
-                    end = entity.dxf.end
-                    length = np.sqrt((end[0] - start[0])**2 + (end[1] - start[1])**2)
-                    total_length += length
-                    
-                    # Track small features
-                    if length < 1.0:  # mm
-                        small_features.append(length)
-                    
-                    # Update bounding box
-                    min_x = min(min_x, start[0], end[0])
-                    min_y = min(min_y, start[1], end[1])
-                    max_x = max(max_x, start[0], end[0])
-                    max_y = max(max_y, start[1], end[1])
-                    
-                elif entity.dxftype() == 'CIRCLE':
-                    center = entity.dxf.center
-                    radius = entity.dxf.radius
-                    circumference = 2 * np.pi * radius
-                    total_length += circumference
-                    
-                    # Track small circles
-                    if radius < 0.5:  # mm
-                        small_features.append(radius * 2)
-                    
-                    # Update bounding box
-                    min_x = min(min_x, center[0] - radius)
-                    min_y = min(min_y, center[1] - radius)
-                    max_x = max(max_x, center[0] + radius)
-                    max_y = max(max_y, center[1] + radius)
-                    
-                elif entity.dxftype() == 'ARC':
-                    center = entity.dxf.center
-                    radius = entity.dxf.radius
-                    start_angle = np.radians(entity.dxf.start_angle)
-                    end_angle = np.radians(entity.dxf.end_angle)
-                    angle_span = abs(end_angle - start_angle)
-                    arc_length = radius * angle_span
-                    total_length += arc_length
-                    
-                    # Update bounding box (simplified)
-                    min_x = min(min_x, center[0] - radius)
-                    min_y = min(min_y, center[1] - radius)
-                    max_x = max(max_x, center[0] + radius)
-                    max_y = max(max_y, center[1] + radius)
-                    
-                elif entity.dxftype() == 'LWPOLYLINE' or entity.dxftype() == 'POLYLINE':
-                    # Calculate polyline length
-                    points = list(entity.points())
-                    for i in range(len(points) - 1):
-                        p1 = points[i]
-                        p2 = points[i + 1]
-                        segment_length = np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-                        total_length += segment_length
-                        
-                        if segment_length < 1.0:
-                            small_features.append(segment_length)
-                        
-                        # Update bounding box
-                        min_x = min(min_x, p1[0], p2[0])
-                        min_y = min(min_y, p1[1], p2[1])
-                        max_x = max(max_x, p1[0], p2[0])
-                        max_y = max(max_y, p1[1], p2[1])
-                    
-                    # Check if closed
-                    if entity.dxf.flags & 1:  # closed polyline
-                        p1 = points[-1]
-                        p2 = points[0]
-                        segment_length = np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-                        total_length += segment_length
-                
-                elif entity.dxftype() == 'SPLINE':
-                    # Approximate spline length
-                    try:
-                        points = list(entity.control_points)
-                        for i in range(len(points) - 1):
-                            p1 = points[i]
-                            p2 = points[i + 1]
-                            segment_length = np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-                            total_length += segment_length * 1.2  # Rough approximation
-                            
-                            # Update bounding box
-                            min_x = min(min_x, p1[0], p2[0])
-                            min_y = min(min_y, p1[1], p2[1])
-                            max_x = max(max_x, p1[0], p2[0])
-                            max_y = max(max_y, p1[1], p2[1])
-                    except:
-                        pass  # Skip if spline processing fails
+            # Gather entities into arrays and compute metrics in bulk
+            with telemetry.stage("geometry"):
+                geometry = dxf_pipeline.collect_geometry(msp, tolerance)
+                summary = dxf_pipeline.summarize(geometry)
+            with telemetry.stage("contours"):
+                contours = build_contours(geometry)
+            total_length = summary.cut_length
+            small_features = summary.small_features.tolist()
+            entity_count = summary.entity_count
             
             # Calculate bounding box
-            bbox_x = max_x - min_x if max_x > min_x else 100.0  # Default if no entities
-            bbox_y = max_y - min_y if max_y > min_y else 100.0
+            if summary.bounds is not None:
+                bbox_x, bbox_y = summary.bounds[1] - summary.bounds[0]
+            else:
+                bbox_x = bbox_y = 0.0
+            bbox_x = bbox_x if bbox_x > 0 else 100.0  # Default if no entities
+            bbox_y = bbox_y if bbox_y > 0 else 100.0
             bbox_z = material_thickness
             
-            # Calculate area (simplified - actual area would need proper polygon analysis)
-            area_mm2 = bbox_x * bbox_y * 0.7  # Assume 70% material utilization
+            # Net part area: outer contours minus holes
+            if contours.closed_count:
+                area_mm2 = contours.net_area
+            else:
+                # No closed contours to measure; assume 70% material utilization
+                logger.warning("DXF has no closed contours, estimating area from bounding box")
+                area_mm2 = bbox_x * bbox_y * 0.7
             volume_cm3 = (area_mm2 * bbox_z) / 1000
             surface_area_cm2 = area_mm2 / 100
             
@@ -633,18 +1103,27 @@ class GeometryAnalyzer:
                     y=round(bbox_y, 1),
                     z=round(bbox_z, 1)
                 ),
-                length_cut_mm=round(total_length, 1)
+                length_cut_mm=round(total_length, 1),
+                holes_count=contours.hole_count,
+                pierce_count=contours.pierce_count
             )
             
             # Calculate DFM issues
-            issues = self._calculate_dxf_dfm_issues(metrics, small_features, entity_count, process_type)
+            results = {}
+            with telemetry.stage("dfm"):
+                contour_issues = self._calculate_contour_dfm_issues(contours, material_thickness)
+                for process_type in process_types:
+                    issues = self._calculate_dxf_dfm_issues(metrics, small_features, entity_count, process_type)
+                    results[process_type] = (metrics, issues + contour_issues)
             
-            return metrics, issues
+            return results
             
         except Exception as e:
             logger.error(f"Error analyzing DXF: {str(e)}")
             # Fallback to mock if parsing fails
-            return self._analyze_dxf_mock(file_path, process_type, material_thickness)
+            telemetry.record_fallback("mock")
+            return {process_type: self._analyze_dxf_mock(source, process_type, material_thickness)
+                    for process_type in process_types}
     
     def _analyze_dxf_mock(self, file_path: str, process_type: str, material_thickness: float) -> Tuple[GeometryMetrics, List[DFMIssue]]:
         """Mock DXF analysis until DXF parser is integrated."""
@@ -695,4 +1174,4 @@ class GeometryAnalyzer:
                 description="Complex cutting path will increase processing time and cost"
             ))
         
-        return metrics, issues
\ No newline at end of file
+        return metrics, issues
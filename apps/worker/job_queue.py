@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from redis_pool import RedisPool
+
+logger = logging.getLogger(__name__)
+
+
+class RequeueJob(Exception):
+    """Raised by a job handler to put the job back at the head of the queue."""
+
+
+class JobQueue:
+    """
+    Redis list backed job queue with crash recovery.
+
+    Producers LPUSH onto ``<name>:pending``. Each consumer atomically moves the
+    next job into its own ``<name>:processing:<consumer>`` list with BLMOVE and
+    removes it once the handler returns, so a job is never lost between pop and
+    completion. Consumers keep a heartbeat key alive while running; every
+    HEARTBEAT_TTL, jobs left in processing lists whose heartbeat has expired (a
+    crashed pod or process) are moved back to the pending list.
+    """
+
+    HEARTBEAT_TTL = 30
+    POP_TIMEOUT = 1  # seconds; bounds how long shutdown waits for idle consumers
+    REQUEUE_DELAY = 1.0
+
+    def __init__(self, redis_pool: RedisPool, name: str, consumers: int,
+                 handler: Callable[[Dict[str, Any]], Awaitable[None]], max_length: int = 10000):
+        self.redis_pool = redis_pool
+        self.name = name
+        self.consumers = consumers
+        self.handler = handler
+        self.max_length = max_length
+        self.pending_key = f"{name}:pending"
+        self.consumer_prefix: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+        self._processed = 0
+        self._failed = 0
+        self._requeued = 0
+        self._recovered = 0
+
+    def _processing_key(self, consumer_id: str) -> str:
+        return f"{self.name}:processing:{consumer_id}"
+
+    def _heartbeat_key(self, consumer_id: str) -> str:
+        return f"{self.name}:consumer:{consumer_id}"
+
+    async def enqueue(self, payload: Dict[str, Any]) -> int:
+        """Add a job; returns the queue length after the push."""
+        return await self.redis_pool.client.lpush(self.pending_key, json.dumps(payload))
+
+    async def depth(self) -> Optional[int]:
+        redis_client = self.redis_pool.client
+        if not redis_client:
+            return None
+        try:
+            return await redis_client.llen(self.pending_key)
+        except Exception as e:
+            self.redis_pool.record_failure(e)
+            return None
+
+    async def start(self):
+        # Unique per start: a restarted process (same host and pid in a container)
+        # must not adopt, or keep alive, the processing lists of its predecessor
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        loop = asyncio.get_running_loop()
+        for n in range(self.consumers):
+            consumer_id = f"{self.consumer_prefix}-{n}"
+            self._tasks.append(loop.create_task(self._consume(consumer_id)))
+        self._tasks.append(loop.create_task(self._recover()))
+        logger.info(f"Started {self.consumers} consumers for queue {self.name}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "consumers": self.consumers,
+            "processed": self._processed,
+            "failed": self._failed,
+            "requeued": self._requeued,
+            "recovered": self._recovered,
+        }
+
+    async def recover_orphaned_jobs(self):
+        """Move jobs held by consumers whose heartbeat expired back to the pending list."""
+        redis_client = self.redis_pool.client
+        async for processing_key in redis_client.scan_iter(match=f"{self.name}:processing:*"):
+            processing_key = processing_key.decode()
+            consumer_id = processing_key.rsplit(":", 1)[-1]
+            if await redis_client.exists(self._heartbeat_key(consumer_id)):
+                continue
+            recovered = 0
+            # Recovered jobs go to the consuming end so they run next
+            while await redis_client.lmove(processing_key, self.pending_key, "LEFT", "RIGHT"):
+                recovered += 1
+            if recovered:
+                self._recovered += recovered
+                logger.warning(f"Recovered {recovered} jobs from dead consumer {consumer_id}")
+
+    async def _recover(self):
+        """Recover orphaned jobs now and every HEARTBEAT_TTL, so consumers that die later are noticed."""
+        while True:
+            redis_client = self.redis_pool.client
+            if redis_client:
+                try:
+                    await self.recover_orphaned_jobs()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.redis_pool.record_failure(e)
+                    logger.error(f"Queue {self.name} recovery error: {e}")
+            await asyncio.sleep(self.HEARTBEAT_TTL)
+
+    async def _consume(self, consumer_id: str):
+        processing_key = self._processing_key(consumer_id)
+        heartbeat_key = self._heartbeat_key(consumer_id)
+
+        while True:
+            redis_client = self.redis_pool.client
+            if not redis_client:
+                await asyncio.sleep(self.POP_TIMEOUT)
+                continue
+
+            try:
+                await redis_client.setex(heartbeat_key, self.HEARTBEAT_TTL, "1")
+                raw = await redis_client.blmove(
+                    self.pending_key, processing_key, self.POP_TIMEOUT, "RIGHT", "LEFT"
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.redis_pool.record_failure(e)
+                logger.error(f"Queue {self.name} read error: {e}")
+                await asyncio.sleep(self.POP_TIMEOUT)
+                continue
+
+            if raw is None:
+                continue
+
+            await self._handle(redis_client, raw, processing_key, heartbeat_key)
+
+    async def _handle(self, redis_client, raw: bytes, processing_key: str, heartbeat_key: str):
+        heartbeat = asyncio.get_running_loop().create_task(self._keep_alive(heartbeat_key))
+        requeue = False
+        try:
+            await self.handler(json.loads(raw))
+            self._processed += 1
+        except RequeueJob:
+            requeue = True
+        except Exception as e:
+            self._failed += 1
+            logger.error(f"Queue {self.name} job failed: {e}")
+        finally:
+            heartbeat.cancel()
+
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.lrem(processing_key, 1, raw)
+                if requeue:
+                    pipe.rpush(self.pending_key, raw)
+                await pipe.execute()
+        except Exception as e:
+            # The job stays in the processing list and is recovered after a restart
+            self.redis_pool.record_failure(e)
+            logger.error(f"Queue {self.name} acknowledge error: {e}")
+
+        if requeue:
+            self._requeued += 1
+            await asyncio.sleep(self.REQUEUE_DELAY)
+
+    async def _keep_alive(self, heartbeat_key: str):
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_TTL / 3)
+            redis_client = self.redis_pool.client
+            if redis_client:
+                try:
+                    await redis_client.setex(heartbeat_key, self.HEARTBEAT_TTL, "1")
+                except Exception as e:
+                    self.redis_pool.record_failure(e)
+
+
+def new_job_id() -> str:
+    return str(uuid.uuid4())
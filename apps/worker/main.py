@@ -1,19 +1,38 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Request
+from fastapi.responses import JSONResponse, StreamingResponse, Response, FileResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
-import numpy as np
+from typing import Dict, List, Optional, Any, Callable, Awaitable, Tuple, Union
 from datetime import datetime
 import logging
 import os
 import asyncio
+import random
+import tempfile
+import time
 from dotenv import load_dotenv
-import redis
 import json
+import hashlib
 import traceback
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
 # Import our geometry analyzer
-from geometry_analyzer import GeometryAnalyzer, GeometryMetrics as GeometryMetricsData, DFMIssue as DFMIssueData
+from geometry_analyzer import (
+    GeometryAnalyzer, GeometryMetrics as GeometryMetricsData, DFMIssue as DFMIssueData,
+    SUPPORTED_FILE_TYPES, STEP_FILE_TYPES, RESULT_OPTIONS, ANALYZER_VERSION, METRICS, FileTooLargeError,
+    SourceFileError, MAX_FILE_SIZE_BYTES, DownloadedFile, FileSink,
+    requested_metrics,
+    flatten_tolerance
+)
+from analysis_pool import AnalysisPool, PoolSaturatedError, AnalysisTimeoutError, WorkerCrashedError
+from local_cache import LocalCache
+from redis_pool import RedisPool
+from job_queue import JobQueue, RequeueJob, new_job_id
+import telemetry
+from profiling import ProfileStore
+from multipart_upload import MultipartUpload
+from notifier import Notifier
+from single_flight import SingleFlight
 
 # Load environment variables
 load_dotenv()
@@ -25,14 +44,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize Redis connection
-try:
-    redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
-    redis_client.ping()
-    logger.info("Connected to Redis")
-except Exception as e:
-    logger.warning(f"Redis connection failed: {e}. Running without cache.")
-    redis_client = None
+# Shared asyncio Redis connection pool; reconnects in the background if Redis goes away
+redis_pool = RedisPool(
+    os.getenv("REDIS_URL", "redis://localhost:6379"),
+    max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 20))
+)
 
 app = FastAPI(
     title="MADFAM Geometry Processing Worker",
@@ -40,14 +56,75 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize geometry analyzer
+# Initialize geometry analyzer (used in-process for downloads)
 analyzer = GeometryAnalyzer()
 
+# CPU-bound analysis runs in a bounded pool so it never blocks the event loop.
+# Limits apply per uvicorn worker process.
+analysis_pool = AnalysisPool(
+    mode=os.getenv("ANALYSIS_EXECUTION_MODE", "process"),
+    max_workers=int(os.getenv("MAX_CONCURRENT_ANALYSES", 2)),
+    max_queued=int(os.getenv("ANALYSIS_MAX_QUEUED", 20)),
+    timeout_seconds=float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", 120))
+)
+# STEP/IGES analysis gets its own processes: each keeps a gmsh instance alive
+# between jobs, and slow CAD imports cannot hold up STL/DXF requests
+step_pool = AnalysisPool(
+    mode=os.getenv("ANALYSIS_EXECUTION_MODE", "process"),
+    max_workers=int(os.getenv("STEP_CONCURRENT_ANALYSES", 1)),
+    max_queued=int(os.getenv("STEP_ANALYSIS_MAX_QUEUED", 10)),
+    timeout_seconds=float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", 120)),
+    cpu_limit_seconds=float(os.getenv("STEP_CPU_LIMIT_SECONDS", 90)) or None
+)
+ANALYSIS_RETRY_AFTER_SECONDS = 5
+
+def pool_for(file_type: str) -> AnalysisPool:
+    return step_pool if file_type.lower() in STEP_FILE_TYPES else analysis_pool
+
+# Pub/sub wake-ups (one subscriber connection per process)
+notifier = Notifier(redis_pool, "geometry:notify:")
+# Identical analyses in flight are run once across processes and pods; the lease
+# outlives the analysis timeout, so it only runs out when its holder crashed
+COALESCE_LEASE_SECONDS = float(os.getenv(
+    "COALESCE_LEASE_SECONDS", max(analysis_pool.timeout_seconds, step_pool.timeout_seconds) + 30
+))
+single_flight = SingleFlight(
+    redis_pool, notifier, COALESCE_LEASE_SECONDS,
+    poll_interval=float(os.getenv("COALESCE_POLL_SECONDS", 1))
+)
+
+# Items of one batch analyzed at once; defaults to the pool size so a single
+# batch cannot saturate the pool on its own
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", analysis_pool.max_workers))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 200))
+BATCH_SATURATED_RETRIES = 3
+# Process types analyzed together from one parse (see GeometryAnalysisRequest.process_types)
+MAX_PROCESS_TYPES = 8
+
+@app.on_event("startup")
+async def start_pools():
+    await redis_pool.start()
+    await notifier.start()
+    await analysis_pool.start()
+    await step_pool.start()
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_pools():
+    await job_queue.stop()
+    await step_pool.shutdown()
+    await analysis_pool.shutdown()
+    await notifier.stop()
+    await redis_pool.close()
+
 # Pydantic models for API
 class GeometryAnalysisRequest(BaseModel):
     file_url: str
     file_type: str
-    process_type: str
+    # Either one process type, or several: the file is then downloaded and parsed
+    # once, and each process type gets its own result and cache entry
+    process_type: Optional[str] = None
+    process_types: Optional[List[str]] = None
     options: Dict[str, Any] = {}
     job_id: Optional[str] = None
 
@@ -62,11 +139,16 @@ class GeometryMetrics(BaseModel):
     bbox_mm: BoundingBox
     length_cut_mm: Optional[float] = None
     holes_count: Optional[int] = None
+    pierce_count: Optional[int] = None
     overhang_area: Optional[float] = None
     wall_thickness_min: Optional[float] = None
     wall_thickness_avg: Optional[float] = None
+    wall_thickness_percentiles: Optional[Dict[str, float]] = None
     triangle_count: Optional[int] = None
     is_watertight: Optional[bool] = None
+    proxy_triangle_count: Optional[int] = None
+    proxy_max_deviation_mm: Optional[float] = None
+    orientation: Optional[Dict[str, Any]] = None
 
 class DFMIssue(BaseModel):
     type: str
@@ -74,12 +156,32 @@ class DFMIssue(BaseModel):
     description: str
     location: Optional[str] = None
 
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatusRequest(BaseModel):
+    job_ids: List[str]
+
 class GeometryAnalysisResponse(BaseModel):
     metrics: GeometryMetrics
     issues: List[DFMIssue]
     risk_score: int
     processing_time_ms: int
     cached: bool = False
+    # Milliseconds per stage, when requested with options["timings"]
+    timings_ms: Optional[Dict[str, float]] = None
+    # Set when this analysis was profiled and the profile kept (see /profiles)
+    profile_id: Optional[str] = None
+
+class MultiProcessAnalysisResponse(BaseModel):
+    # One analysis per requested process type, in request order
+    results: Dict[str, GeometryAnalysisResponse]
+    processing_time_ms: int
+    # Every result came from the cache
+    cached: bool = False
+    timings_ms: Optional[Dict[str, float]] = None
 
 @app.get("/")
 def read_root():
@@ -92,23 +194,163 @@ def read_root():
     }
 
 @app.get("/health")
-def health_check():
+async def health_check():
     checks = {
         "status": "ok",
         "timestamp": datetime.utcnow(),
-        "redis": "connected" if redis_client else "disconnected",
-        "s3": "configured" if os.getenv("AWS_ACCESS_KEY_ID") else "not configured"
+        "redis": "connected" if redis_pool.available else "disconnected",
+        "s3": "configured" if os.getenv("AWS_ACCESS_KEY_ID") else "not configured",
+        "redis_pool": redis_pool.stats(),
+        "analysis_pool": analysis_pool.stats(),
+        "step_pool": step_pool.stats(),
+        "local_cache": local_cache.stats(),
+        # Walks the cache directory, so off the event loop
+        "mesh_cache": await asyncio.get_running_loop().run_in_executor(None, analyzer.mesh_cache.stats)
+                      if analyzer.mesh_cache else None,
+        "job_queue": {**job_queue.stats(), "depth": await job_queue.depth()},
+        "notifier": notifier.stats(),
+        "single_flight": single_flight.stats()
     }
     
     # Overall health
-    if checks["redis"] == "disconnected":
+    if checks["redis"] == "disconnected" or analysis_pool.saturated:
         checks["status"] = "degraded"
     
     return checks
 
-def get_cache_key(request: GeometryAnalysisRequest) -> str:
-    """Generate cache key for request."""
-    return f"geometry:{request.file_type}:{request.process_type}:{hash(request.file_url)}"
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: stage timings, cache hit rates, fallbacks, pool and queue load."""
+    for name, pool in (("analysis", analysis_pool), ("step", step_pool)):
+        stats = pool.stats()
+        telemetry.POOL_JOBS.labels(pool=name, state="running").set(stats["running"])
+        telemetry.POOL_JOBS.labels(pool=name, state="queued").set(stats["queued"])
+    depth = await job_queue.depth()
+    if depth is not None:
+        telemetry.JOB_QUEUE_DEPTH.set(depth)
+    content, content_type = telemetry.render()
+    return Response(content=content, media_type=content_type)
+
+# Results are keyed by file content, so they can be kept much longer than URL mappings
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL_SECONDS", 86400))
+URL_DIGEST_CACHE_TTL = int(os.getenv("URL_DIGEST_CACHE_TTL_SECONDS", 3600))
+JOB_TTL = 86400  # 24 hours
+
+# Presigned URL parameters that differ between URLs for the same object
+VOLATILE_URL_PARAMS = {
+    "x-amz-algorithm", "x-amz-credential", "x-amz-date", "x-amz-expires",
+    "x-amz-signedheaders", "x-amz-signature", "x-amz-security-token",
+    "awsaccesskeyid", "signature", "expires"
+}
+
+# Resolve URL -> content digest -> result in a single round-trip
+LOOKUP_RESULT_SCRIPT = """
+local digest = redis.call('GET', KEYS[1])
+if not digest then
+    return nil
+end
+return {digest, redis.call('GET', ARGV[1] .. digest .. ARGV[2])}
+"""
+lookup_result_script = redis_pool.register_script(LOOKUP_RESULT_SCRIPT)
+
+# In-process tier in front of Redis for results and job lookups
+local_cache = LocalCache(
+    max_entries=int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 1024)),
+    max_bytes=int(os.getenv("LOCAL_CACHE_MAX_MB", 64)) * 1024 * 1024,
+    default_ttl=float(os.getenv("LOCAL_CACHE_TTL_SECONDS", 300))
+)
+# Other processes may update a running job, so its local copy expires quickly
+LOCAL_JOB_CACHE_TTL = float(os.getenv("LOCAL_JOB_CACHE_TTL_SECONDS", 1))
+LOCAL_FINISHED_JOB_CACHE_TTL = 60
+FINISHED_JOB_STATUSES = ("completed", "failed")
+
+def normalize_file_url(file_url: str) -> str:
+    """Strip presigned-URL signing parameters so URLs for the same object compare equal."""
+    parsed = urlparse(file_url)
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k.lower() not in VOLATILE_URL_PARAMS]
+    return urlunparse(parsed._replace(query=urlencode(sorted(query))))
+
+def get_url_cache_key(file_url: str) -> str:
+    """Cache key mapping a file URL to the SHA-256 of its content."""
+    url_digest = hashlib.sha256(normalize_file_url(file_url).encode()).hexdigest()
+    return f"geometry:url:{url_digest}"
+
+def get_result_key_parts(request: GeometryAnalysisRequest):
+    """Prefix and suffix around the content digest in a result cache key."""
+    options = {name: request.options[name] for name in RESULT_OPTIONS if name in request.options}
+    # Equivalent metric selections share a key; the default (all metrics) keeps the plain key
+    options.pop("profile", None)
+    metrics = requested_metrics(request.options)
+    if metrics == METRICS:
+        options.pop("metrics", None)
+    else:
+        options["metrics"] = list(metrics)
+    options_digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()[:16]
+    prefix = f"geometry:result:v{ANALYZER_VERSION}:"
+    suffix = f":{request.file_type.lower()}:{request.process_type}:{options_digest}"
+    return prefix, suffix
+
+def get_result_cache_key(content_digest: str, request: GeometryAnalysisRequest) -> str:
+    """Cache key for the analysis result of a file's content under the request's settings."""
+    prefix, suffix = get_result_key_parts(request)
+    return f"{prefix}{content_digest}{suffix}"
+
+async def lookup_cached_result_by_url(request: GeometryAnalysisRequest):
+    """Return (content_digest, cached_result) for the request's URL; either may be None."""
+    prefix, suffix = get_result_key_parts(request)
+    found = await lookup_result_script(keys=[get_url_cache_key(request.file_url)], args=[prefix, suffix])
+    if not found:
+        return None, None
+    digest, cached_result = found
+    return digest.decode(), cached_result
+
+async def get_cached_result(request: GeometryAnalysisRequest, url_cache_key: str) -> Optional[dict]:
+    """Find a cached result for the request's URL, checking the local tier before Redis."""
+    content_digest = local_cache.get(url_cache_key)
+    if content_digest:
+        result = local_cache.get(get_result_cache_key(content_digest, request))
+        if result:
+            telemetry.count_cache_lookup("local", hit=True)
+            return result
+    telemetry.count_cache_lookup("local", hit=False)
+    
+    if not redis_pool.client:
+        return None
+    
+    try:
+        content_digest, cached_result = await lookup_cached_result_by_url(request)
+        telemetry.count_cache_lookup("redis", hit=bool(cached_result))
+        if content_digest:
+            local_cache.set(url_cache_key, content_digest, len(content_digest))
+        if cached_result:
+            result = json.loads(cached_result)
+            local_cache.set(get_result_cache_key(content_digest, request), result, len(cached_result))
+            return result
+    except Exception as e:
+        redis_pool.record_failure(e)
+        logger.warning(f"Cache read error: {e}")
+    return None
+
+async def get_cached_result_for_content(cache_key: str) -> Optional[dict]:
+    """Find a cached result by its content-addressed key, checking the local tier before Redis."""
+    result = local_cache.get(cache_key)
+    telemetry.count_cache_lookup("local", hit=result is not None)
+    redis_client = redis_pool.client
+    if result or not redis_client:
+        return result
+    
+    try:
+        cached_result = await redis_client.get(cache_key)
+        telemetry.count_cache_lookup("redis", hit=cached_result is not None)
+        if cached_result:
+            result = json.loads(cached_result)
+            local_cache.set(cache_key, result, len(cached_result))
+            return result
+    except Exception as e:
+        redis_pool.record_failure(e)
+        logger.warning(f"Cache read error: {e}")
+    return None
 
 def calculate_risk_score(issues: List[DFMIssueData]) -> int:
     """Calculate overall risk score from DFM issues."""
@@ -121,102 +363,494 @@ def calculate_risk_score(issues: List[DFMIssueData]) -> int:
     # Normalize to 0-100 scale
     return min(100, total_score)
 
-@app.post("/analyze", response_model=GeometryAnalysisResponse)
-async def analyze_geometry(request: GeometryAnalysisRequest, background_tasks: BackgroundTasks):
+def validate_request(request: GeometryAnalysisRequest):
+    """Reject unsupported file types, missing process types and invalid analysis options with a 400."""
+    if request.file_type.lower() not in SUPPORTED_FILE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type: {request.file_type}"
+        )
+    if bool(request.process_type) == bool(request.process_types):
+        raise HTTPException(status_code=400, detail="Send either process_type or a non-empty process_types list")
+    if request.process_types and len(set(request.process_types)) > MAX_PROCESS_TYPES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PROCESS_TYPES} process_types per request")
+    try:
+        requested_metrics(request.options)
+        flatten_tolerance(request.options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+ProgressCallback = Callable[[str, int], Awaitable[None]]
+AnalysisResponse = Union[GeometryAnalysisResponse, MultiProcessAnalysisResponse]
+
+def process_requests(request: GeometryAnalysisRequest) -> List[GeometryAnalysisRequest]:
+    """The request as one single-process request per process type it targets."""
+    if not request.process_types:
+        return [request]
+    return [
+        request.copy(update={"process_type": process_type, "process_types": None})
+        for process_type in dict.fromkeys(request.process_types)
+    ]
+
+def process_label(request: GeometryAnalysisRequest) -> str:
+    """process_type label for Prometheus; multi-process requests share one label."""
+    return "multi" if request.process_types else request.process_type
+
+def build_response(request: GeometryAnalysisRequest, results: Dict[str, Tuple[dict, bool]], elapsed: float,
+                   timings_ms: Optional[Dict[str, float]] = None) -> AnalysisResponse:
+    """
+    Response from (result, cached) by process type: a GeometryAnalysisResponse,
+    or a MultiProcessAnalysisResponse when the request named process_types.
+    """
+    processing_time_ms = int(elapsed * 1000)
+    responses = {
+        process_type: GeometryAnalysisResponse(**{
+            **result,
+            "processing_time_ms": processing_time_ms,
+            "cached": cached,
+            "timings_ms": None if request.process_types else timings_ms
+        })
+        for process_type, (result, cached) in results.items()
+    }
+    if not request.process_types:
+        return responses[request.process_type]
+    return MultiProcessAnalysisResponse(
+        results=responses,
+        processing_time_ms=processing_time_ms,
+        cached=all(response.cached for response in responses.values()),
+        timings_ms=timings_ms
+    )
+
+# Sampling profiler: a share of analyses (or those sent with "X-Profile: 1") run
+# under it, and profiles of the slow ones are kept for /profiles
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_SLOW_THRESHOLD_SECONDS = float(os.getenv("PROFILE_SLOW_THRESHOLD_SECONDS", 10))
+profile_store = ProfileStore(
+    os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "geometry-profiles")),
+    max_entries=int(os.getenv("PROFILE_MAX_ENTRIES", 50))
+)
+
+@app.post("/analyze", response_model=AnalysisResponse)
+async def analyze_geometry(request: GeometryAnalysisRequest, background_tasks: BackgroundTasks,
+                           x_profile: Optional[str] = Header(None)):
     """
     Analyze geometry file and return metrics and DFM issues.
+    
+    With process_types instead of process_type (e.g. comparing 3d_fff, 3d_sla
+    and cnc_3axis for one part), the file is downloaded and parsed once and
+    the response holds one result per process type.
+    
+    With "X-Profile: 1" a fresh analysis runs under the sampling profiler and
+    its profile is kept whatever its duration; the response carries its profile_id.
+    """
+    return await run_analysis(request, background_tasks, profile=x_profile in ("1", "true"))
+
+# Uploads may exceed the file size limit by this much multipart framing and form fields
+UPLOAD_OVERHEAD_BYTES = 1024 * 1024
+# Default process per uploaded file type, when the upload does not name one
+DEFAULT_UPLOAD_PROCESS_TYPES = {"dxf": "laser_2d"}
+UPLOAD_REQUEST_FIELDS = ("file_type", "process_type", "process_types", "options")
+# DFM severities as the API names them
+API_SEVERITIES = {"high": "critical", "medium": "warning", "low": "info"}
+THIN_WALL_ISSUES = {"thin_wall", "thin_walls", "thin_geometry", "thin_material"}
+SMALL_FEATURE_ISSUES = {"small_features", "small_holes", "thin_feature", "small_internal_radius"}
+UNDERCUT_ISSUES = {"excessive_overhang", "side_holes"}
+
+def upload_request(filename: str, fields: Dict[str, str]) -> GeometryAnalysisRequest:
+    """Analysis request for an uploaded file from its name and the query / form fields."""
+    file_type = (fields.get("file_type") or os.path.splitext(filename)[1].lstrip(".")).lower()
+    try:
+        options = json.loads(fields["options"]) if fields.get("options") else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    if not isinstance(options, dict):
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    # process_types is comma-separated: "3d_fff,3d_sla,cnc_3axis"
+    process_types = [name.strip() for name in (fields.get("process_types") or "").split(",") if name.strip()]
+    if process_types:
+        process_type = None
+    else:
+        process_type = fields.get("process_type") or DEFAULT_UPLOAD_PROCESS_TYPES.get(file_type, "3d_fff")
+    request = GeometryAnalysisRequest(
+        file_url=f"upload:{filename}",
+        file_type=file_type,
+        process_type=process_type,
+        process_types=process_types or None,
+        options=options
+    )
+    validate_request(request)
+    return request
+
+def to_api_response(response: GeometryAnalysisResponse, content_sha256: str) -> Dict[str, Any]:
     """
-    start_time = datetime.utcnow()
+    An analysis in the format the API's file-analysis processor reads
+    (geometry, dfm_analysis, features, processing_time), plus the worker's own fields.
+    """
+    metrics = response.metrics
+    issue_types = {issue.type for issue in response.issues}
+    if response.risk_score >= 50 or (metrics.holes_count or 0) > 20 or (metrics.triangle_count or 0) > 500000:
+        complexity = "complex"
+    elif response.risk_score >= 20 or (metrics.holes_count or 0) > 5 or (metrics.triangle_count or 0) > 50000:
+        complexity = "moderate"
+    else:
+        complexity = "simple"
+    return {
+        "geometry": {
+            "volume": metrics.volume_cm3,
+            "surfaceArea": metrics.surface_area_cm2,
+            "boundingBox": metrics.bbox_mm.dict(),
+            "partCount": 1,
+            "triangleCount": metrics.triangle_count
+        },
+        "dfm_analysis": {
+            "issues": [
+                {"type": issue.type, "severity": API_SEVERITIES.get(issue.severity, "info"),
+                 "description": issue.description}
+                for issue in response.issues
+            ],
+            "score": 100 - response.risk_score,
+            "manufacturable": not any(issue.severity == "high" for issue in response.issues)
+        },
+        "features": {
+            "hasUndercuts": bool(issue_types & UNDERCUT_ISSUES),
+            "hasThinWalls": bool(issue_types & THIN_WALL_ISSUES),
+            "hasSmallFeatures": bool(issue_types & SMALL_FEATURE_ISSUES),
+            "complexity": complexity
+        },
+        "processing_time": response.processing_time_ms,
+        "content_sha256": content_sha256,
+        **jsonable_encoder(response, exclude_none=True)
+    }
+
+def to_upload_response(response: AnalysisResponse, content_sha256: str) -> Dict[str, Any]:
+    """to_api_response, per process type for a multi-process upload."""
+    if isinstance(response, GeometryAnalysisResponse):
+        return to_api_response(response, content_sha256)
+    return {
+        "results": {
+            process_type: to_api_response(result, content_sha256)
+            for process_type, result in response.results.items()
+        },
+        "processing_time": response.processing_time_ms,
+        "content_sha256": content_sha256,
+        "cached": response.cached
+    }
+
+@app.post("/api/v1/analyze")
+async def analyze_upload(http_request: Request, background_tasks: BackgroundTasks,
+                         file_type: Optional[str] = None, process_type: Optional[str] = None,
+                         process_types: Optional[str] = None, options: Optional[str] = None,
+                         x_content_sha256: Optional[str] = Header(None),
+                         x_profile: Optional[str] = Header(None)):
+    """
+    Analyze a file pushed as multipart/form-data (a "file" part) and answer in
+    the API's format (see to_api_response).
+    
+    The body is parsed and hashed as it streams in, and the file goes to the
+    analyzer from memory (or from the one temporary file that large and
+    STEP/IGES uploads are written to). file_type, process_type (or
+    comma-separated process_types, answered per process type) and options
+    (JSON) are query parameters or form fields sent before the file part;
+    file_type defaults to the file name's extension. When the caller sends the
+    file's SHA-256 in X-Content-SHA256, a cached result is returned as soon as
+    the file part starts, without reading the rest of the body; otherwise the
+    content cache is checked once the upload is complete.
+    """
+    start_time = time.perf_counter()
+    content_length = http_request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE_BYTES + UPLOAD_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload is {content_length} bytes, limit is {MAX_FILE_SIZE_BYTES}")
+    query_fields = {
+        "file_type": file_type, "process_type": process_type, "process_types": process_types, "options": options
+    }
+    claimed_digest = x_content_sha256.strip().lower() if x_content_sha256 else None
+    request: Optional[GeometryAnalysisRequest] = None
+    
+    def open_file(filename: str) -> FileSink:
+        nonlocal request
+        fields = {name: parts.fields.get(name) or query_fields[name] for name in UPLOAD_REQUEST_FIELDS}
+        request = upload_request(filename, fields)
+        # gmsh can only import STEP/IGES from disk; everything else may stay in memory
+        return FileSink(in_memory=request.file_type not in STEP_FILE_TYPES)
+    
+    try:
+        parts = MultipartUpload(http_request.headers.get("content-type"), "file", open_file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    looked_up = not claimed_digest
+    try:
+        async for chunk in http_request.stream():
+            parts.write(chunk)
+            if looked_up or not parts.file_started:
+                continue
+            looked_up = True
+            # Reject before receiving the file when the pool is already full
+            pool_for(request.file_type).check_admission()
+            cached_results = {}
+            for target in process_requests(request):
+                cached_result = await get_cached_result_for_content(get_result_cache_key(claimed_digest, target))
+                if not cached_result:
+                    break
+                cached_results[target.process_type] = (cached_result, True)
+            else:
+                logger.info(f"Cache hit for uploaded content {claimed_digest}")
+                parts.discard()
+                elapsed = time.perf_counter() - start_time
+                telemetry.REQUEST_SECONDS.labels(
+                    file_type=request.file_type, process_type=process_label(request), cached="true"
+                ).observe(elapsed)
+                return to_upload_response(build_response(request, cached_results, elapsed), claimed_digest)
+        upload = parts.finish()
+    except HTTPException:
+        parts.discard()
+        raise
+    except PoolSaturatedError as e:
+        parts.discard()
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis capacity exhausted, retry later",
+            headers={"Retry-After": str(ANALYSIS_RETRY_AFTER_SECONDS)}
+        )
+    except FileTooLargeError as e:
+        parts.discard()
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        parts.discard()
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {e}")
+    except BaseException:
+        # Client went away mid-upload (or the request was cancelled)
+        parts.discard()
+        raise
+    
+    if claimed_digest and claimed_digest != upload.sha256:
+        upload.cleanup()
+        raise HTTPException(status_code=400, detail="X-Content-SHA256 does not match the uploaded file")
+    if parts.late_fields & set(UPLOAD_REQUEST_FIELDS):
+        # Settings after the file part came too late for how it was received and looked up
+        upload.cleanup()
+        raise HTTPException(
+            status_code=400, detail=f"{', '.join(UPLOAD_REQUEST_FIELDS)} must be sent before the file part"
+        )
+    
+    logger.info(f"Received upload {parts.filename} ({upload.size_bytes} bytes, {upload.sha256})")
+    telemetry.STAGE_SECONDS.labels(
+        stage="upload", file_type=request.file_type, process_type=process_label(request)
+    ).observe(time.perf_counter() - start_time)
+    response = await run_analysis(request, background_tasks, profile=x_profile in ("1", "true"), upload=upload)
+    # Upload time counts towards the processing time
+    processing_time_ms = int((time.perf_counter() - start_time) * 1000)
+    response.processing_time_ms = processing_time_ms
+    if isinstance(response, MultiProcessAnalysisResponse):
+        for result in response.results.values():
+            result.processing_time_ms = processing_time_ms
+    return to_upload_response(response, upload.sha256)
+
+async def run_analysis(request: GeometryAnalysisRequest, background_tasks: BackgroundTasks,
+                       progress: Optional[ProgressCallback] = None,
+                       profile: bool = False,
+                       upload: Optional[DownloadedFile] = None) -> AnalysisResponse:
+    """
+    Cache lookup, download and analysis for one request.
     
-    # Check cache first
-    cache_key = get_cache_key(request)
-    if redis_client:
+    Cache writes and job status updates are added to ``background_tasks``;
+    ``progress`` (if given) is awaited with a stage name and percentage.
+    Stage timings are exported to Prometheus, and returned in ``timings_ms``
+    when options["timings"] is set. ``profile`` forces profiling (see
+    lookup_or_analyze). ``upload`` is an already received (and validated) file
+    to analyze instead of downloading request.file_url.
+    """
+    start_time = time.perf_counter()
+    if upload is None:
+        validate_request(request)
+    
+    with telemetry.recording() as timings:
         try:
-            cached_result = redis_client.get(cache_key)
-            if cached_result:
-                logger.info(f"Cache hit for {cache_key}")
-                result = json.loads(cached_result)
-                result["cached"] = True
-                return GeometryAnalysisResponse(**result)
-        except Exception as e:
-            logger.warning(f"Cache read error: {e}")
+            results = await lookup_or_analyze(request, background_tasks, progress, profile, upload)
+        finally:
+            telemetry.observe(timings, request.file_type, process_label(request))
+    
+    # Time taken by this request: a cached record keeps the time of the original analysis
+    elapsed = time.perf_counter() - start_time
+    response = build_response(
+        request, results, elapsed, timings.to_dict() if request.options.get("timings") else None
+    )
+    telemetry.REQUEST_SECONDS.labels(
+        file_type=request.file_type.lower(),
+        process_type=process_label(request),
+        cached=str(response.cached).lower()
+    ).observe(elapsed)
+    # Fresh single-process results complete their job along with the cache write;
+    # multi-process jobs complete once all their results are in
+    if request.job_id and (response.cached or request.process_types):
+        background_tasks.add_task(
+            update_job_status, request.job_id, "completed", jsonable_encoder(response, exclude={"timings_ms"})
+        )
+    return response
+
+async def lookup_or_analyze(request: GeometryAnalysisRequest, background_tasks: BackgroundTasks,
+                            progress: Optional[ProgressCallback] = None, profile: bool = False,
+                            upload: Optional[DownloadedFile] = None) -> Dict[str, Tuple[dict, bool]]:
+    """
+    Return {process_type: (result, cached)} for each process type of the request:
+    a cached result for its file, or a fresh analysis of it. Process types
+    without a cached result are analyzed together, from a single parse.
+    An identical analysis already running (in this process or any other) is
+    waited for instead of repeated (see SingleFlight).
+    
+    Fresh analyses run under the sampling profiler when ``profile`` is set
+    (the profile is always kept) or with probability PROFILE_SAMPLE_RATE (kept
+    when the analysis took PROFILE_SLOW_THRESHOLD_SECONDS or longer).
+    
+    With ``upload`` (an already received file, which is cleaned up here) there
+    is no URL to look up or download; the content cache is still checked.
+    """
+    targets = process_requests(request)
+    results: Dict[str, Tuple[dict, bool]] = {}
+    url_cache_key = None
+    if upload is None:
+        # Check cache first: URL -> content digest -> result
+        url_cache_key = get_url_cache_key(request.file_url)
+        with telemetry.stage("cache_read"):
+            for target in targets:
+                cached_result = await get_cached_result(target, url_cache_key)
+                if cached_result:
+                    results[target.process_type] = (cached_result, True)
+        if len(results) == len(targets):
+            logger.info(f"Cache hit for {request.file_url}")
+            return results
     
     try:
-        logger.info(f"Analyzing {request.file_type} file for {request.process_type}")
+        pending = [target for target in targets if target.process_type not in results]
+        logger.info(f"Analyzing {request.file_type} file for {', '.join(t.process_type for t in pending)}")
+        loop = asyncio.get_running_loop()
         
-        # Download file
-        temp_file_path = None
+        # Reject before downloading when the pool is already full
+        pool = pool_for(request.file_type)
+        downloaded = upload
         try:
-            temp_file_path = analyzer.download_file(request.file_url)
+            pool.check_admission()
             
-            # Analyze based on file type
-            if request.file_type.lower() == "stl":
-                metrics_data, issues_data = analyzer.analyze_stl(temp_file_path, request.process_type)
-            elif request.file_type.lower() in ["step", "stp", "iges", "igs"]:
-                metrics_data, issues_data = analyzer.analyze_step(temp_file_path, request.process_type)
-            elif request.file_type.lower() == "dxf":
-                material_thickness = request.options.get("material_thickness", 3.0)
-                metrics_data, issues_data = analyzer.analyze_dxf(
-                    temp_file_path, request.process_type, material_thickness
-                )
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {request.file_type}"
-                )
+            # Download file (I/O bound, runs in a thread)
+            if downloaded is None:
+                if progress:
+                    await progress("downloading", 10)
+                # gmsh can only import STEP/IGES from disk; everything else may stay in memory
+                in_memory = request.file_type.lower() not in STEP_FILE_TYPES
+                with telemetry.stage("download"):
+                    downloaded = await loop.run_in_executor(
+                        None, analyzer.download_file, request.file_url, in_memory
+                    )
+            cache_keys = {target.process_type: get_result_cache_key(downloaded.sha256, target) for target in pending}
+            
+            # Same content may already be cached under a different URL
+            with telemetry.stage("cache_read"):
+                for target in pending:
+                    cached_result = await get_cached_result_for_content(cache_keys[target.process_type])
+                    if cached_result:
+                        results[target.process_type] = (cached_result, True)
+            pending = [target for target in pending if target.process_type not in results]
+            if not pending:
+                logger.info(f"Cache hit for content {downloaded.sha256}")
+                if url_cache_key:
+                    background_tasks.add_task(cache_url_digest, url_cache_key, downloaded.sha256)
+                return {target.process_type: results[target.process_type] for target in targets}
+            
+            # Identical analyses already running here or elsewhere are waited for, not repeated
+            analyzed = False
+            while pending:
+                leases = {}
+                for target in pending:
+                    lease = await single_flight.acquire(cache_keys[target.process_type])
+                    if lease:
+                        leases[target.process_type] = lease
+                
+                if leases:
+                    owned = [target for target in pending if target.process_type in leases]
+                    try:
+                        fresh = await analyze_targets(request, owned, downloaded, pool, progress, profile)
+                    except BaseException:
+                        # Waiters take over (and most likely fail the same way)
+                        for lease in leases.values():
+                            await single_flight.release(lease)
+                        raise
+                    analyzed = True
+                    for target in owned:
+                        response_data = fresh[target.process_type]
+                        lease = leases[target.process_type]
+                        single_flight.resolve(lease, response_data)
+                        # Cache the result and mark a single-process job completed in one round-trip
+                        background_tasks.add_task(
+                            cache_result,
+                            cache_keys[target.process_type],
+                            response_data,
+                            ttl=RESULT_CACHE_TTL,
+                            url_cache_key=url_cache_key,
+                            content_digest=downloaded.sha256,
+                            job_id=None if request.process_types else request.job_id,
+                            stage_labels={"file_type": request.file_type.lower(), "process_type": target.process_type}
+                        )
+                        # Remote waiters look the result up once it is cached
+                        background_tasks.add_task(single_flight.release, lease)
+                        results[target.process_type] = (response_data, False)
+                
+                waiting = [target for target in pending if target.process_type not in leases]
+                with telemetry.stage("coalesced_wait"):
+                    for target in waiting:
+                        cache_key = cache_keys[target.process_type]
+                        result = await single_flight.wait(
+                            cache_key, lambda cache_key=cache_key: get_cached_result_for_content(cache_key)
+                        )
+                        if result is not None:
+                            logger.info(f"Coalesced with in-flight analysis of {downloaded.sha256}")
+                            results[target.process_type] = (result, True)
+                # Leaders that failed or vanished: try to lead those ourselves
+                pending = [target for target in waiting if target.process_type not in results]
+            
+            if url_cache_key and not analyzed:
+                background_tasks.add_task(cache_url_digest, url_cache_key, downloaded.sha256)
             
         finally:
             # Clean up temporary file
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            if downloaded:
+                downloaded.cleanup()
         
-        # Convert internal data structures to API models
-        metrics = GeometryMetrics(**metrics_data.to_dict())
-        issues = [DFMIssue(**issue.to_dict()) for issue in issues_data]
+        return {target.process_type: results[target.process_type] for target in targets}
         
-        # Calculate risk score
-        risk_score = calculate_risk_score(issues_data)
-        
-        # Calculate processing time
-        processing_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
-        
-        # Prepare response
-        response_data = {
-            "metrics": metrics,
-            "issues": issues,
-            "risk_score": risk_score,
-            "processing_time_ms": processing_time_ms,
-            "cached": False
-        }
-        
-        # Cache the result
-        if redis_client:
-            background_tasks.add_task(
-                cache_result,
-                cache_key,
-                response_data,
-                ttl=3600  # 1 hour cache
-            )
-        
-        # If job_id provided, update job status
-        if request.job_id and redis_client:
+    except HTTPException:
+        raise
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except SourceFileError as e:
+        # The URL is wrong or not readable for us: the request's fault, not the worker's
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis capacity exhausted, retry later",
+            headers={"Retry-After": str(ANALYSIS_RETRY_AFTER_SECONDS)}
+        )
+    except (AnalysisTimeoutError, WorkerCrashedError) as e:
+        logger.error(f"Analysis aborted: {e}")
+        if request.job_id:
             background_tasks.add_task(
                 update_job_status,
                 request.job_id,
-                "completed",
-                response_data
+                "failed",
+                {"error": str(e)}
             )
-        
-        return GeometryAnalysisResponse(**response_data)
-        
-    except HTTPException:
-        raise
+        raise HTTPException(
+            status_code=504 if isinstance(e, AnalysisTimeoutError) else 500,
+            detail=f"Analysis failed: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Error analyzing geometry: {str(e)}")
         logger.error(traceback.format_exc())
         
         # Update job status to failed if job_id provided
-        if request.job_id and redis_client:
+        if request.job_id:
             background_tasks.add_task(
                 update_job_status,
                 request.job_id,
@@ -229,78 +863,483 @@ async def analyze_geometry(request: GeometryAnalysisRequest, background_tasks: B
             detail=f"Analysis failed: {str(e)}"
         )
 
-def cache_result(cache_key: str, data: dict, ttl: int):
-    """Cache analysis result in Redis."""
-    try:
-        # Convert Pydantic models to dict for serialization
-        cache_data = {
-            "metrics": data["metrics"].dict(),
-            "issues": [issue.dict() for issue in data["issues"]],
-            "risk_score": data["risk_score"],
-            "processing_time_ms": data["processing_time_ms"],
-            "cached": data["cached"]
+async def analyze_targets(request: GeometryAnalysisRequest, targets: List[GeometryAnalysisRequest],
+                          downloaded: DownloadedFile, pool: AnalysisPool,
+                          progress: Optional[ProgressCallback] = None, profile: bool = False) -> Dict[str, dict]:
+    """Analyze a downloaded file in the pool for the targets' process types; results by process type."""
+    # Analyze in the pool (CPU bound); the worker reports its own stage timings
+    if progress:
+        await progress("analyzing", 30)
+    process_types = [target.process_type for target in targets]
+    profiled = profile or random.random() < PROFILE_SAMPLE_RATE
+    analysis_start = time.perf_counter()
+    if profiled:
+        analyses, worker_timings, profile_data = await pool.run(
+            "analyze_profiled", downloaded.source, request.file_type, process_types, request.options,
+            downloaded.sha256
+        )
+    else:
+        analyses, worker_timings = await pool.run(
+            "analyze_timed", downloaded.source, request.file_type, process_types, request.options,
+            downloaded.sha256
+        )
+    analysis_seconds = time.perf_counter() - analysis_start
+    telemetry.merge(worker_timings)
+    
+    profile_id = None
+    if profiled and (profile or analysis_seconds >= PROFILE_SLOW_THRESHOLD_SECONDS):
+        metadata = {
+            "content_sha256": downloaded.sha256,
+            "file_type": request.file_type.lower(),
+            "process_type": ",".join(process_types),
+            "options": request.options,
+            "analysis_seconds": round(analysis_seconds, 3),
+            "timings_ms": worker_timings.to_dict(),
+            "requested": profile
+        }
+        profile_id = await asyncio.get_running_loop().run_in_executor(
+            None, profile_store.save, profile_data, metadata
+        )
+    
+    results = {}
+    for process_type in process_types:
+        metrics_data, issues_data = analyses[process_type]
+        results[process_type] = {
+            # Convert internal data structures to API models
+            "metrics": GeometryMetrics(**metrics_data.to_dict()),
+            "issues": [DFMIssue(**issue.to_dict()) for issue in issues_data],
+            "risk_score": calculate_risk_score(issues_data),
+            "processing_time_ms": int(analysis_seconds * 1000),
+            "cached": False,
+            "profile_id": profile_id
         }
-        redis_client.setex(cache_key, ttl, json.dumps(cache_data))
+    return results
+
+async def cache_url_digest(url_cache_key: str, content_digest: str):
+    """Record which content a URL resolved to."""
+    local_cache.set(url_cache_key, content_digest, len(content_digest))
+    redis_client = redis_pool.client
+    if not redis_client:
+        return
+    try:
+        await redis_client.setex(url_cache_key, URL_DIGEST_CACHE_TTL, content_digest)
+    except Exception as e:
+        redis_pool.record_failure(e)
+        logger.error(f"Cache write error: {e}")
+
+async def cache_result(cache_key: str, data: dict, ttl: int,
+                       url_cache_key: Optional[str] = None, content_digest: Optional[str] = None,
+                       job_id: Optional[str] = None, stage_labels: Optional[Dict[str, str]] = None):
+    """
+    Cache analysis result, plus the URL -> content digest mapping and the completed
+    job status if given, in a single pipelined Redis round-trip.
+    
+    With ``stage_labels`` (file_type, process_type) the write is timed as the
+    cache_write stage.
+    """
+    start_time = time.perf_counter()
+    # Convert Pydantic models to dict for serialization
+    cache_data = {
+        "metrics": data["metrics"].dict(),
+        "issues": [issue.dict() for issue in data["issues"]],
+        "risk_score": data["risk_score"],
+        "processing_time_ms": data["processing_time_ms"],
+        "cached": data["cached"]
+    }
+    serialized = json.dumps(cache_data)
+    local_cache.set(cache_key, cache_data, len(serialized))
+    if url_cache_key and content_digest:
+        local_cache.set(url_cache_key, content_digest, len(content_digest))
+    if job_id:
+        job_serialized = set_local_job_status(job_id, "completed", cache_data)
+    
+    redis_client = redis_pool.client
+    if not redis_client:
+        return
+    
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(cache_key, ttl, serialized)
+            if url_cache_key and content_digest:
+                pipe.setex(url_cache_key, URL_DIGEST_CACHE_TTL, content_digest)
+            if job_id:
+                pipe.setex(f"job:{job_id}", JOB_TTL, job_serialized)
+                pipe.publish(notifier.channel_name(f"job:{job_id}"), "completed")
+            await pipe.execute()
+        if stage_labels:
+            telemetry.STAGE_SECONDS.labels(stage="cache_write", **stage_labels).observe(
+                time.perf_counter() - start_time
+            )
         logger.info(f"Cached result for {cache_key}")
+        if job_id:
+            logger.info(f"Updated job {job_id} status to completed")
     except Exception as e:
+        redis_pool.record_failure(e)
         logger.error(f"Cache write error: {e}")
 
-def update_job_status(job_id: str, status: str, data: dict):
-    """Update job status in Redis."""
+def local_job_cache_ttl(status: Optional[str]) -> float:
+    """Finished jobs no longer change, so their local copies can live longer."""
+    return LOCAL_FINISHED_JOB_CACHE_TTL if status in FINISHED_JOB_STATUSES else LOCAL_JOB_CACHE_TTL
+
+def set_local_job_status(job_id: str, status: str, data: Optional[dict],
+                         progress: Optional[int] = None, stage: Optional[str] = None) -> str:
+    """Build the job status record, store it in the local tier and return it serialized."""
+    job_data = jsonable_encoder({
+        "status": status,
+        "progress": 100 if status == "completed" else progress,
+        "stage": stage,
+        "updated_at": datetime.utcnow().isoformat(),
+        "result": data
+    })
+    serialized = json.dumps(job_data)
+    # Write through so polls served from this process see the new status immediately
+    local_cache.set(f"job:{job_id}", job_data, len(serialized), ttl=local_job_cache_ttl(status))
+    notifier.wake(f"job:{job_id}")
+    return serialized
+
+async def update_job_status(job_id: str, status: str, data: Optional[dict],
+                            progress: Optional[int] = None, stage: Optional[str] = None):
+    """Update job status in Redis and wake its long-polls and event streams on every pod."""
+    serialized = set_local_job_status(job_id, status, data, progress, stage)
+    redis_client = redis_pool.client
+    if not redis_client:
+        return
     try:
-        job_key = f"job:{job_id}"
-        job_data = {
-            "status": status,
-            "updated_at": datetime.utcnow().isoformat(),
-            "result": data
-        }
-        redis_client.setex(job_key, 86400, json.dumps(job_data))  # 24 hour TTL
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(f"job:{job_id}", JOB_TTL, serialized)
+            pipe.publish(notifier.channel_name(f"job:{job_id}"), status)
+            await pipe.execute()
         logger.info(f"Updated job {job_id} status to {status}")
     except Exception as e:
+        redis_pool.record_failure(e)
         logger.error(f"Job status update error: {e}")
 
+def get_batch_item_key(request: GeometryAnalysisRequest) -> str:
+    """Identity of a batch item for de-duplication: same file, same analysis settings."""
+    return json.dumps([
+        normalize_file_url(request.file_url),
+        request.file_type.lower(),
+        request.process_type,
+        request.process_types,
+        request.options
+    ], sort_keys=True, default=str)
+
+async def analyze_batch_item(request: GeometryAnalysisRequest) -> GeometryAnalysisResponse:
+    """Analyze one batch item, retrying while the pool is saturated by other traffic."""
+    for attempt in range(BATCH_SATURATED_RETRIES + 1):
+        background_tasks = BackgroundTasks()
+        try:
+            result = await run_analysis(request, background_tasks)
+        except HTTPException as e:
+            if e.status_code != 503 or attempt == BATCH_SATURATED_RETRIES:
+                raise
+            await asyncio.sleep(2 ** attempt)
+            continue
+        finally:
+            # Cache writes and job updates happen per item, not after the whole batch
+            await background_tasks()
+        return result
+
 @app.post("/analyze/batch")
 async def analyze_batch(requests: List[GeometryAnalysisRequest]):
     """
-    Analyze multiple geometry files in parallel.
+    Analyze multiple geometry files concurrently.
+    
+    Results are streamed as NDJSON, one line per request in completion order:
+    {"index": i, "status": "success", "result": {...}} or
+    {"index": i, "status": "failed", "error": "...", "status_code": 500}.
+    Identical requests within the batch are analyzed once.
     """
-    tasks = []
-    for req in requests:
-        tasks.append(analyze_geometry(req, BackgroundTasks()))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Format results
-    batch_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            batch_results.append({
-                "index": i,
-                "status": "failed",
-                "error": str(result)
-            })
-        else:
-            batch_results.append({
-                "index": i,
-                "status": "success",
-                "result": result
-            })
-    
-    return {"results": batch_results}
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({len(requests)} items, max {BATCH_MAX_ITEMS})"
+        )
+    
+    groups: Dict[str, List[int]] = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(get_batch_item_key(request), []).append(index)
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def run_group(indices: List[int]) -> List[str]:
+        first = requests[indices[0]]
+        async with semaphore:
+            try:
+                result = jsonable_encoder(await analyze_batch_item(first))
+            except Exception as e:
+                status_code = e.status_code if isinstance(e, HTTPException) else 500
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                return [
+                    json.dumps({"index": i, "status": "failed", "error": error, "status_code": status_code})
+                    for i in indices
+                ]
+        
+        # Duplicates share the result; their jobs still need to be marked completed
+        for i in indices[1:]:
+            if requests[i].job_id and requests[i].job_id != first.job_id:
+                await update_job_status(requests[i].job_id, "completed", result)
+        return [json.dumps({"index": i, "status": "success", "result": result}) for i in indices]
+    
+    async def stream_results():
+        tasks = [asyncio.ensure_future(run_group(indices)) for indices in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for line in await next_done:
+                    yield line + "\n"
+        finally:
+            # Client went away: stop analyses that haven't started or finished yet
+            for task in tasks:
+                task.cancel()
+    
+    logger.info(f"Batch of {len(requests)} requests ({len(groups)} unique)")
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
-@app.get("/job/{job_id}")
-async def get_job_status(job_id: str):
-    """Get job status from Redis."""
+# Asynchronous jobs: POST /jobs enqueues, consumers in every worker process run them
+JOB_QUEUE_MAX_LENGTH = int(os.getenv("JOB_QUEUE_MAX_LENGTH", 10000))
+
+async def process_queued_job(payload: Dict[str, Any]):
+    """Queue consumer: run one enqueued analysis, reporting progress in job:{id}."""
+    request = GeometryAnalysisRequest(**payload)
+    
+    async def report_progress(stage: str, percentage: int):
+        await update_job_status(request.job_id, "running", None, progress=percentage, stage=stage)
+    
+    background_tasks = BackgroundTasks()
+    try:
+        await report_progress("starting", 0)
+        await run_analysis(request, background_tasks, progress=report_progress)
+    except HTTPException as e:
+        if e.status_code == 503:
+            # Pool busy with synchronous traffic; try again shortly
+            await update_job_status(request.job_id, "queued", None, progress=0, stage="waiting for capacity")
+            raise RequeueJob()
+        if e.status_code in (400, 413):
+            # Bad input: the job is done (failed), not a consumer failure
+            await update_job_status(request.job_id, "failed", {"error": e.detail})
+            return
+        # Failures inside the analysis already queued a failed status
+        raise
+    finally:
+        await background_tasks()
+
+job_queue = JobQueue(
+    redis_pool,
+    os.getenv("QUEUE_NAME", "geometry-analysis"),
+    consumers=int(os.getenv("JOB_CONSUMERS", analysis_pool.max_workers)),
+    handler=process_queued_job,
+    max_length=JOB_QUEUE_MAX_LENGTH
+)
+
+@app.post("/jobs", response_model=JobAccepted, status_code=202)
+async def create_job(request: GeometryAnalysisRequest):
+    """
+    Enqueue an analysis and return its job_id immediately.
+    
+    Poll /job/{job_id} for status (queued, running, completed, failed) and
+    progress, long-poll it with ?wait=30, or follow /job/{job_id}/events (SSE).
+    Many jobs can be checked at once with POST /jobs/status.
+    """
+    validate_request(request)
+    if not redis_pool.client:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    depth = await job_queue.depth()
+    if depth is not None and depth >= JOB_QUEUE_MAX_LENGTH:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue full, retry later",
+            headers={"Retry-After": str(ANALYSIS_RETRY_AFTER_SECONDS)}
+        )
+    
+    job_id = request.job_id or new_job_id()
+    payload = jsonable_encoder(request.copy(update={"job_id": job_id}))
+    try:
+        # Status first so a fast consumer's "running" update is not overwritten
+        await update_job_status(job_id, "queued", None, progress=0, stage="queued")
+        await job_queue.enqueue(payload)
+    except Exception as e:
+        redis_pool.record_failure(e)
+        logger.error(f"Failed to enqueue job {job_id}: {e}")
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    logger.info(f"Enqueued job {job_id}")
+    return JobAccepted(job_id=job_id, status="queued", status_url=f"/job/{job_id}")
+
+@app.get("/profiles")
+async def list_profiles():
+    """Captured analysis profiles (slow or requested), newest first."""
+    return {"profiles": await asyncio.get_running_loop().run_in_executor(None, profile_store.list)}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Metadata of one captured profile: content digest, settings, timings."""
+    metadata = await asyncio.get_running_loop().run_in_executor(None, profile_store.get, profile_id)
+    if not metadata:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return metadata
+
+@app.get("/profiles/{profile_id}/collapsed")
+async def download_profile(profile_id: str):
+    """
+    The profile as collapsed stacks ("frame;frame;frame milliseconds" lines),
+    for flamegraph.pl or speedscope.
+    """
+    path = await asyncio.get_running_loop().run_in_executor(None, profile_store.collapsed_path, profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.collapsed")
+
+# Long-polls and event streams are woken by job updates over pub/sub; they also
+# re-read the job this often, in case a notification was missed
+JOB_WAIT_MAX_SECONDS = 60
+JOB_WAIT_POLL_SECONDS = float(os.getenv("JOB_WAIT_POLL_SECONDS", 5))
+JOB_STREAM_MAX_SECONDS = float(os.getenv("JOB_STREAM_MAX_SECONDS", 600))
+JOB_STREAM_KEEPALIVE_SECONDS = 15
+JOB_STATUS_MAX_IDS = 500
+
+async def read_job(job_id: str, fresh: bool = False) -> Optional[dict]:
+    """
+    A job's status record, or None if there is no such job. The local tier is
+    skipped when ``fresh`` is set and Redis is available (another process may
+    have just updated the job). Raises 503 when neither has it and Redis is down.
+    """
+    job_key = f"job:{job_id}"
+    redis_client = redis_pool.client
+    if not (fresh and redis_client):
+        job = local_cache.get(job_key)
+        if job:
+            return job
+    
     if not redis_client:
         raise HTTPException(status_code=503, detail="Job tracking not available")
     
-    job_key = f"job:{job_id}"
-    job_data = redis_client.get(job_key)
+    try:
+        job_data = await redis_client.get(job_key)
+    except Exception as e:
+        redis_pool.record_failure(e)
+        raise HTTPException(status_code=503, detail="Job tracking not available")
     
     if not job_data:
+        return None
+    
+    job = json.loads(job_data)
+    local_cache.set(job_key, job, len(job_data), ttl=local_job_cache_ttl(job.get("status")))
+    return job
+
+async def wait_for_update(updated: asyncio.Event, timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds for ``updated``; re-arms it for the next update."""
+    try:
+        await asyncio.wait_for(updated.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        updated.clear()
+
+@app.get("/job/{job_id}")
+async def get_job_status(job_id: str, wait: float = 0):
+    """
+    Get job status from Redis.
+    
+    With ``wait`` (seconds, up to JOB_WAIT_MAX_SECONDS) an unfinished job is
+    long-polled: the response comes as soon as the job completes or fails,
+    or with its current status once the wait is over.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(max(wait, 0), JOB_WAIT_MAX_SECONDS)
+    # Listening before the first read, so an update in between is not missed
+    with notifier.listen(f"job:{job_id}") as updated:
+        job = await read_job(job_id)
+        while job and job.get("status") not in FINISHED_JOB_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await wait_for_update(updated, min(remaining, JOB_WAIT_POLL_SECONDS))
+            job = await read_job(job_id, fresh=True)
+    
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/job/{job_id}/events")
+async def stream_job_status(job_id: str):
+    """
+    Server-Sent Events stream of a job's status: a "status" event with the job
+    record on every change, ending once the job completes or fails (or after
+    JOB_STREAM_MAX_SECONDS).
+    """
+    job = await read_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + JOB_STREAM_MAX_SECONDS
+        current, sent, last_sent = job, None, loop.time()
+        with notifier.listen(f"job:{job_id}") as updated:
+            while True:
+                if current is None:
+                    yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                    return
+                if current != sent:
+                    yield f"event: status\ndata: {json.dumps(current)}\n\n"
+                    sent, last_sent = current, loop.time()
+                if current.get("status") in FINISHED_JOB_STATUSES:
+                    return
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                await wait_for_update(updated, min(remaining, JOB_WAIT_POLL_SECONDS))
+                if loop.time() - last_sent >= JOB_STREAM_KEEPALIVE_SECONDS:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    last_sent = loop.time()
+                try:
+                    current = await read_job(job_id, fresh=True)
+                except HTTPException as e:
+                    yield f"event: error\ndata: {json.dumps({'error': e.detail})}\n\n"
+                    return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/status")
+async def get_jobs_status(request: JobStatusRequest):
+    """
+    Status of many jobs at once: {"jobs": {job_id: record, or null if unknown}}.
+    
+    Records come from the local tier, and the rest from Redis in a single MGET.
+    """
+    if len(request.job_ids) > JOB_STATUS_MAX_IDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many job IDs ({len(request.job_ids)}, max {JOB_STATUS_MAX_IDS})"
+        )
+    
+    jobs = {job_id: local_cache.get(f"job:{job_id}") for job_id in dict.fromkeys(request.job_ids)}
+    missing = [job_id for job_id, job in jobs.items() if job is None]
+    if not missing:
+        return {"jobs": jobs}
+    
+    redis_client = redis_pool.client
+    if not redis_client:
+        raise HTTPException(status_code=503, detail="Job tracking not available")
+    try:
+        found = await redis_client.mget([f"job:{job_id}" for job_id in missing])
+    except Exception as e:
+        redis_pool.record_failure(e)
+        raise HTTPException(status_code=503, detail="Job tracking not available")
     
-    return json.loads(job_data)
+    for job_id, job_data in zip(missing, found):
+        if job_data:
+            job = json.loads(job_data)
+            local_cache.set(f"job:{job_id}", job, len(job_data), ttl=local_job_cache_ttl(job.get("status")))
+            jobs[job_id] = job
+    return {"jobs": jobs}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored arrays or values change meaning, so old artifacts are not loaded
+MESH_CACHE_FORMAT = 1
+# Temporary files older than this were left by a killed writer
+STALE_TEMP_SECONDS = 3600
+ARRAY_NAMES = ("triangles", "vertices", "faces")
+
+
+@dataclass
+class MeshArtifact:
+    """
+    Pre-parsed geometry of one file, as far as earlier analyses produced it.
+
+    Arrays are memory-mapped read-only. ``triangles`` is the (n, 3, 3) triangle
+    soup, ``vertices`` / ``faces`` the merged mesh; ``values`` holds other
+    parse results (e.g. the B-rep measurements of a STEP model).
+    """
+    triangles: Optional[np.ndarray] = None
+    vertices: Optional[np.ndarray] = None
+    faces: Optional[np.ndarray] = None
+    values: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def merged(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if self.vertices is None or self.faces is None:
+            return None
+        return self.vertices, self.faces
+
+
+class MeshCache:
+    """
+    Content-addressed, size-bounded cache of parsed meshes on local disk.
+
+    Each entry is a directory named after the file's SHA-256 and kind (stl,
+    step) holding .npy arrays and a values.json. Files are written under a
+    temporary name and renamed into place, so every worker process on the
+    host can share the directory and readers never see partial files. Entries
+    are evicted least recently used first (by directory mtime, touched on
+    every read) once the directory exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.join(directory, f"v{MESH_CACHE_FORMAT}")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, digest: str, kind: str) -> Optional[MeshArtifact]:
+        """The stored artifact for a file's content, or None."""
+        path = self._entry_path(digest, kind)
+        try:
+            names = os.listdir(path)
+            artifact = MeshArtifact()
+            for name in ARRAY_NAMES:
+                if f"{name}.npy" in names:
+                    setattr(artifact, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+            if "values.json" in names:
+                with open(os.path.join(path, "values.json")) as f:
+                    artifact.values = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable mesh cache entry {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return artifact
+
+    def put(self, digest: str, kind: str, arrays: Dict[str, np.ndarray], values: Optional[Dict[str, Any]] = None):
+        """
+        Add arrays (by ARRAY_NAMES name) and values to a file's entry; what the
+        entry already holds is kept.
+        """
+        path = self._entry_path(digest, kind)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            for name, array in arrays.items():
+                target = os.path.join(path, f"{name}.npy")
+                if not os.path.exists(target):
+                    self._write(target, lambda f: np.save(f, np.ascontiguousarray(array)))
+            if values:
+                target = os.path.join(path, "values.json")
+                try:
+                    with open(target) as f:
+                        values = {**json.load(f), **values}
+                except (OSError, ValueError):
+                    pass
+                self._write(target, lambda f: f.write(json.dumps(values).encode()))
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _write(self, target: str, write):
+        temp_path = f"{target}.tmp-{uuid.uuid4().hex}"
+        try:
+            with open(temp_path, "wb") as f:
+                write(f)
+            os.replace(temp_path, target)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """(path, size in bytes, last use) of every entry."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                size = 0
+                for file_name in os.listdir(path):
+                    file_path = os.path.join(path, file_name)
+                    stat = os.stat(file_path)
+                    if ".tmp-" in file_name and now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        os.unlink(file_path)
+                        continue
+                    size += stat.st_size
+                entries.append((path, size, os.path.getmtime(path)))
+            except FileNotFoundError:
+                # Evicted by another process meanwhile
+                continue
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda entry: entry[2])
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            # Readers that already mapped the files keep them until they are done
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def _entry_path(self, digest: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{digest}.{kind}")
@@ -0,0 +1,115 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import trimesh
+
+from stl_reader import STL_CHUNK_TRIANGLES, MeshSummary, STLTriangles, face_normals_and_areas
+
+logger = logging.getLogger(__name__)
+
+# Triangles left per grid cell crossed by the surface (measured on smooth scans,
+# including cells split by normal direction)
+PROXY_TRIANGLES_PER_CELL = 3.0
+# Attempts at growing the cell size when a clustering pass still exceeds the budget
+PROXY_MAX_PASSES = 4
+
+
+@dataclass
+class MeshProxy:
+    """Decimated stand-in for a mesh too large for sampling-based analysis."""
+    mesh: trimesh.Trimesh
+    source_triangle_count: int
+    cell_size: float  # mm
+    max_deviation: float  # furthest any original vertex moved, mm
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.mesh.faces)
+
+
+def decimate(stl: STLTriangles, summary: MeshSummary, max_triangles: int) -> MeshProxy:
+    """
+    Vertex-clustering decimation to at most ``max_triangles`` triangles.
+
+    Vertices are snapped to the mean of their cell in a uniform grid and
+    triangles that collapse are dropped. The cell size starts from the
+    surface area (a surface crosses about area / cell² cells, and leaves
+    about PROXY_TRIANGLES_PER_CELL triangles in each) and grows until the
+    budget is met. Features
+    thinner than a cell may close up, so the maximum vertex displacement is
+    reported with the proxy.
+    """
+    cell_size = max(np.sqrt(PROXY_TRIANGLES_PER_CELL * summary.area / max(max_triangles, 1)), 1e-6)
+
+    for _ in range(PROXY_MAX_PASSES):
+        proxy = _cluster(stl, summary.bounds, cell_size)
+        if proxy.triangle_count <= max_triangles:
+            break
+        cell_size *= 1.1 * np.sqrt(proxy.triangle_count / max_triangles)
+
+    logger.info(f"Decimated {proxy.source_triangle_count} triangles to {proxy.triangle_count} "
+                f"(cell {proxy.cell_size:.3g}mm, max deviation {proxy.max_deviation:.3g}mm)")
+    return proxy
+
+
+def _cluster(stl: STLTriangles, bounds: np.ndarray, cell_size: float) -> MeshProxy:
+    # Cell of every triangle corner, as one integer key per cell
+    lower = bounds[0]
+    span = np.floor((bounds[1] - lower) / cell_size).astype(np.int64) + 1
+    keys = np.empty(stl.triangle_count * 3, dtype=np.int64)
+    for start, triangles in _chunks(stl):
+        cells = np.floor((triangles.reshape(-1, 3) - lower) / cell_size).astype(np.int64)
+        # Corners are also split by the octant of their triangle's normal, so the
+        # two sides of a wall thinner than a cell never merge into one vertex
+        normals, _ = face_normals_and_areas(triangles)
+        octants = np.repeat((normals > 0) @ np.array([4, 2, 1]), 3)
+        keys[start * 3:(start + len(triangles)) * 3] = (
+            ((cells[:, 0] * span[1] + cells[:, 1]) * span[2] + cells[:, 2]) * 8 + octants
+        )
+    cell_keys, corner_cells = np.unique(keys, return_inverse=True)
+    del keys
+
+    # Cluster representative: mean of the corners in the cell
+    cell_count = len(cell_keys)
+    sums = np.zeros((cell_count, 3))
+    counts = np.bincount(corner_cells, minlength=cell_count)
+    for start, triangles in _chunks(stl):
+        index = corner_cells[start * 3:(start + len(triangles)) * 3]
+        points = triangles.reshape(-1, 3)
+        for axis in range(3):
+            sums[:, axis] += np.bincount(index, weights=points[:, axis], minlength=cell_count)
+    representatives = sums / counts[:, None]
+
+    max_deviation = 0.0
+    for start, triangles in _chunks(stl):
+        index = corner_cells[start * 3:(start + len(triangles)) * 3]
+        offsets = triangles.reshape(-1, 3) - representatives[index]
+        max_deviation = max(max_deviation, float(np.sqrt(np.einsum("ij,ij->i", offsets, offsets).max())))
+
+    # Drop triangles whose corners share a cell, then duplicates
+    faces = corner_cells.reshape(-1, 3)
+    sources = np.flatnonzero((faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0]))
+    _, first = np.unique(np.sort(faces[sources], axis=1), axis=0, return_index=True)
+    sources = sources[np.sort(first)]
+    faces = faces[sources]
+
+    # Snapping can turn a triangle over, folding the surface onto itself; drop
+    # triangles that now face away from the original they came from
+    proxy_normals, _ = face_normals_and_areas(representatives[faces])
+    source_normals, _ = face_normals_and_areas(np.asarray(stl.triangles[sources], dtype=np.float64))
+    faces = faces[np.einsum("ij,ij->i", proxy_normals, source_normals) > 0]
+
+    used, faces = np.unique(faces, return_inverse=True)
+    mesh = trimesh.Trimesh(vertices=representatives[used], faces=faces.reshape(-1, 3), process=False)
+    return MeshProxy(
+        mesh=mesh,
+        source_triangle_count=stl.triangle_count,
+        cell_size=float(cell_size),
+        max_deviation=max_deviation
+    )
+
+
+def _chunks(stl: STLTriangles):
+    for number, triangles in enumerate(stl.chunks()):
+        yield number * STL_CHUNK_TRIANGLES, triangles
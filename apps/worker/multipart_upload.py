@@ -0,0 +1,114 @@
+from typing import Callable, Dict, Optional, Set
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from geometry_analyzer import DownloadedFile, FileSink
+
+# Form fields other than the file are small (analysis options); anything bigger is a mistake
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class MultipartUpload:
+    """
+    Incremental multipart/form-data reader for a single file upload.
+
+    Feed it the request body chunk by chunk with ``write``. Small fields are
+    collected in ``fields``; the bytes of the file part go straight into the
+    FileSink returned by ``open_file(filename)`` (called once the part's headers
+    are in), so the file is hashed as it arrives and never copied through an
+    intermediate spooled file. Fields that follow the file part are also
+    named in ``late_fields``. Malformed bodies raise ValueError.
+    """
+
+    def __init__(self, content_type: Optional[str], file_field: str,
+                 open_file: Callable[[str], FileSink]):
+        media_type, params = parse_options_header(content_type or "")
+        if media_type != b"multipart/form-data" or b"boundary" not in params:
+            raise ValueError("Expected a multipart/form-data body with a boundary")
+        self.file_field = file_field
+        self.fields: Dict[str, str] = {}
+        self.late_fields: Set[str] = set()
+        self.filename: Optional[str] = None
+        self.sink: Optional[FileSink] = None
+        self.file_complete = False
+        self._open_file = open_file
+        self._part_name: Optional[str] = None
+        self._part_data = bytearray()
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    @property
+    def file_started(self) -> bool:
+        return self.sink is not None
+
+    def write(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finish(self) -> DownloadedFile:
+        """End of body: the received file, if the body held a complete one."""
+        self._parser.finalize()
+        if not self.file_complete:
+            raise ValueError(f"No complete '{self.file_field}' file part in the upload")
+        return self.sink.finish()
+
+    def discard(self):
+        if self.sink:
+            self.sink.discard()
+
+    def _on_part_begin(self):
+        self._part_name = None
+        self._part_data = bytearray()
+        self._in_file = False
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise ValueError('A multipart part has no Content-Disposition "name"')
+        self._part_name = options[b"name"].decode("utf-8", "replace")
+        if self._part_name != self.file_field:
+            return
+        if self.sink is not None:
+            raise ValueError(f"More than one '{self.file_field}' part in the upload")
+        self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        self._in_file = True
+        self.sink = self._open_file(self.filename)
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.sink.write(data[start:end])
+            return
+        self._part_data += data[start:end]
+        if len(self._part_data) > MAX_FIELD_BYTES:
+            raise ValueError(f"Form field '{self._part_name}' exceeds {MAX_FIELD_BYTES} bytes")
+
+    def _on_part_end(self):
+        if self._in_file:
+            self.file_complete = True
+        else:
+            self.fields[self._part_name] = self._part_data.decode("utf-8", "replace")
+            if self.sink is not None:
+                self.late_fields.add(self._part_name)
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+from redis_pool import RedisPool
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier:
+    """
+    Redis pub/sub wake-ups for waiters in this process.
+
+    A single connection per process pattern-subscribes to ``<prefix>*`` and
+    sets the asyncio events registered for each channel with ``listen``.
+    Messages only wake waiters up: they re-read the state they wait for
+    (a cached result, a job status) and keep polling as a fallback, so a
+    message missed while Redis reconnects costs no more than a poll interval.
+    """
+
+    RETRY_DELAY = 1.0
+    READ_TIMEOUT = 1.0
+
+    def __init__(self, redis_pool: RedisPool, prefix: str):
+        self.redis_pool = redis_pool
+        self.prefix = prefix
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._received = 0
+
+    async def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @contextmanager
+    def listen(self, channel: str) -> Iterator[asyncio.Event]:
+        """
+        Event set whenever a message arrives on ``<prefix><channel>``. Register
+        before checking the state waited for, so a message sent in between is not missed.
+        """
+        event = asyncio.Event()
+        waiters = self._waiters.setdefault(channel, set())
+        waiters.add(event)
+        try:
+            yield event
+        finally:
+            waiters.discard(event)
+            if not waiters:
+                self._waiters.pop(channel, None)
+
+    def channel_name(self, channel: str) -> str:
+        """The Redis channel of ``channel``, e.g. to publish from a pipeline."""
+        return f"{self.prefix}{channel}"
+
+    def wake(self, channel: str):
+        """Wake this process's waiters on ``channel`` directly (no Redis round-trip)."""
+        for event in self._waiters.get(channel, ()):
+            event.set()
+
+    async def publish(self, channel: str, message: str = ""):
+        redis_client = self.redis_pool.client
+        if not redis_client:
+            return
+        try:
+            await redis_client.publish(self.channel_name(channel), message)
+        except Exception as e:
+            self.redis_pool.record_failure(e)
+            logger.warning(f"Publish to {channel} failed: {e}")
+
+    def stats(self):
+        return {
+            "connected": self._task is not None and not self._task.done(),
+            "channels": len(self._waiters),
+            "received": self._received,
+        }
+
+    async def _listen(self):
+        while True:
+            redis_client = self.redis_pool.client
+            if not redis_client:
+                await asyncio.sleep(self.RETRY_DELAY)
+                continue
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{self.prefix}*")
+                while True:
+                    # Bounded reads: a blocking one would hit the pool's socket timeout while idle
+                    message = await pubsub.get_message(timeout=self.READ_TIMEOUT)
+                    if not message or message["type"] != "pmessage":
+                        continue
+                    self._received += 1
+                    self.wake(message["channel"].decode()[len(self.prefix):])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.redis_pool.record_failure(e)
+                logger.warning(f"Notification listener error: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
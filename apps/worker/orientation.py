@@ -0,0 +1,185 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+from stl_reader import OVERHANG_ANGLE_DEGREES, MeshSummary, STLTriangles, face_normals_and_areas
+
+logger = logging.getLogger(__name__)
+
+# Downward-facing surfaces tilted more than this from vertical need support
+SUPPORT_ANGLE_DEGREES = 45
+# Faces this close to the build plate rest on it and need no support (mm)
+PLATE_TOLERANCE_MM = 0.2
+# Candidate build directions spread evenly over the sphere
+FIBONACCI_DIRECTIONS = 128
+# Largest convex hull facets tried as the face resting on the plate
+HULL_CANDIDATES = 48
+# Points the convex hull is computed from (a random subset of the corners)
+HULL_MAX_POINTS = 20_000
+# Faces evaluated per candidate; larger meshes are sampled and the sums scaled
+SAMPLE_FACES = 50_000
+# Faces evaluated against all candidates at once; bounds the (faces x directions) matrices
+EVALUATION_CHUNK_FACES = 8192
+# Taller builds take longer: each mm of height costs this fraction of the
+# surface area in equivalent support volume (mm³)
+HEIGHT_COST_PER_AREA = 0.02
+
+
+@dataclass
+class OrientationResult:
+    direction: np.ndarray  # build (up) direction in model coordinates
+    overhang_area: float  # mm², faces tilted more than OVERHANG_ANGLE_DEGREES from the build direction
+    support_volume: float  # mm³, supported surfaces extruded down to the plate
+    build_height: float  # mm
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "build_direction": [round(float(value), 4) for value in self.direction],
+            "overhang_area": round(self.overhang_area / 100, 2),  # cm²
+            "support_volume_cm3": round(self.support_volume / 1000, 2),
+            "build_height_mm": round(self.build_height, 1),
+        }
+
+
+def optimize_orientation(stl: STLTriangles, summary: MeshSummary) -> Tuple[OrientationResult, OrientationResult]:
+    """
+    Search build directions minimizing support volume and build height.
+
+    Candidates are the resting positions on the largest convex hull facets,
+    the principal axes, the coordinate axes and an even spread over the
+    sphere (a few hundred in total). All of them are scored at once from a
+    (faces x directions) matrix of normal/direction dot products; meshes
+    above SAMPLE_FACES are scored on a fixed random sample of faces. The
+    best orientation and the file's own (+Z) one, returned for comparison,
+    are then measured on every triangle. Their overhang area follows the
+    ``overhang_area`` metric (``summary``'s value is reported for +Z).
+    """
+    face_count = stl.triangle_count
+    if face_count > SAMPLE_FACES:
+        index = np.sort(np.random.default_rng(0).choice(face_count, SAMPLE_FACES, replace=False))
+        triangles = np.asarray(stl.triangles[index], dtype=np.float64)
+    else:
+        triangles = np.asarray(stl.triangles, dtype=np.float64)
+    scale = face_count / max(len(triangles), 1)
+    normals, areas = face_normals_and_areas(triangles)
+    centroids = triangles.mean(axis=1)
+
+    directions = _candidate_directions(triangles, centroids, areas)
+    lowest, highest = _extents(triangles, directions)
+    support_volume = _support_volume(normals, areas * scale, centroids, lowest, directions)
+    cost = support_volume + HEIGHT_COST_PER_AREA * areas.sum() * scale * (highest - lowest)
+
+    # The file's own orientation is always the first candidate
+    chosen = directions[[int(np.argmin(cost)), 0]]
+    overhang_area, support_volume, build_height = _measure(stl, chosen)
+    overhang_area[1] = summary.overhang_area
+
+    results = [
+        OrientationResult(
+            direction=chosen[n],
+            overhang_area=float(overhang_area[n]),
+            support_volume=float(support_volume[n]),
+            build_height=float(build_height[n])
+        )
+        for n in range(len(chosen))
+    ]
+    logger.debug(f"Evaluated {len(directions)} build directions, best {results[0].direction}")
+    return results[0], results[1]
+
+
+def fibonacci_sphere(count: int) -> np.ndarray:
+    """``count`` nearly evenly spaced unit vectors."""
+    index = np.arange(count) + 0.5
+    z = 1 - 2 * index / count
+    radius = np.sqrt(1 - z ** 2)
+    angle = np.pi * (1 + 5 ** 0.5) * index
+    return np.column_stack([radius * np.cos(angle), radius * np.sin(angle), z])
+
+
+def _candidate_directions(triangles: np.ndarray, centroids: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    # Coordinate axes, +Z first: the file's own orientation
+    axes = np.array([[0, 0, 1], [1, 0, 0], [0, 1, 0], [0, 0, -1], [-1, 0, 0], [0, -1, 0]], dtype=np.float64)
+
+    # Principal axes of the surface (area weighted)
+    centered = centroids - np.average(centroids, axis=0, weights=areas)
+    covariance = (centered * areas[:, None]).T @ centered
+    _, principal = np.linalg.eigh(covariance)
+    principal = np.vstack([principal.T, -principal.T])
+
+    directions = [axes, principal, _hull_directions(triangles.reshape(-1, 3)), fibonacci_sphere(FIBONACCI_DIRECTIONS)]
+    directions = np.vstack(directions)
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    _, first = np.unique(np.round(directions, 3), axis=0, return_index=True)
+    return directions[np.sort(first)]
+
+
+def _hull_directions(points: np.ndarray) -> np.ndarray:
+    """Build directions that rest the part on its largest convex hull facets."""
+    if len(points) > HULL_MAX_POINTS:
+        points = points[np.random.default_rng(0).choice(len(points), HULL_MAX_POINTS, replace=False)]
+    try:
+        hull = ConvexHull(points)
+    except Exception as e:
+        logger.debug(f"No convex hull candidates: {e}")
+        return np.zeros((0, 3))
+
+    # Merge the triangles of each flat facet by their (rounded) normal
+    facet_normals = hull.equations[:, :3]
+    corners = points[hull.simplices]
+    facet_areas = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1) / 2
+    keys, facets = np.unique(np.round(facet_normals, 3), axis=0, return_inverse=True)
+    merged_areas = np.bincount(facets.ravel(), weights=facet_areas, minlength=len(keys))
+    largest = np.argsort(merged_areas)[::-1][:HULL_CANDIDATES]
+    # Facet on the plate: its outward normal points down
+    return -keys[largest]
+
+
+def _extents(triangles: np.ndarray, directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lowest and highest corner of the triangles along each direction."""
+    lowest = np.full(len(directions), np.inf)
+    highest = np.full(len(directions), -np.inf)
+    for start in range(0, len(triangles), EVALUATION_CHUNK_FACES):
+        heights = triangles[start:start + EVALUATION_CHUNK_FACES].reshape(-1, 3) @ directions.T
+        lowest = np.minimum(lowest, heights.min(axis=0))
+        highest = np.maximum(highest, heights.max(axis=0))
+    return lowest, highest
+
+
+def _measure(stl: STLTriangles, directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Overhang area, support volume and build height along each direction, over every triangle."""
+    lowest = np.full(len(directions), np.inf)
+    highest = np.full(len(directions), -np.inf)
+    for chunk in stl.chunks():
+        chunk_lowest, chunk_highest = _extents(chunk, directions)
+        lowest, highest = np.minimum(lowest, chunk_lowest), np.maximum(highest, chunk_highest)
+
+    overhang_cos = np.cos(np.radians(OVERHANG_ANGLE_DEGREES))
+    overhang_area = np.zeros(len(directions))
+    support_volume = np.zeros(len(directions))
+    for chunk in stl.chunks():
+        normals, areas = face_normals_and_areas(chunk)
+        overhang_area += areas @ (normals @ directions.T < overhang_cos)
+        support_volume += _support_volume(normals, areas, chunk.mean(axis=1), lowest, directions)
+    if not stl.triangle_count:
+        lowest = highest = np.zeros(len(directions))
+    return overhang_area, support_volume, highest - lowest
+
+
+def _support_volume(normals: np.ndarray, areas: np.ndarray, centroids: np.ndarray, lowest: np.ndarray,
+                    directions: np.ndarray) -> np.ndarray:
+    """Support volume for every direction: supported faces extruded down to the plate."""
+    support_cos = -np.sin(np.radians(SUPPORT_ANGLE_DEGREES))
+    support_volume = np.zeros(len(directions))
+    directions32 = directions.T.astype(np.float32)
+
+    for start in range(0, len(normals), EVALUATION_CHUNK_FACES):
+        chunk = slice(start, start + EVALUATION_CHUNK_FACES)
+        cosines = normals[chunk].astype(np.float32) @ directions32
+        heights = centroids[chunk].astype(np.float32) @ directions32 - lowest.astype(np.float32)
+        supported = (cosines < support_cos) & (heights > PLATE_TOLERANCE_MM)
+        # Projected area of each supported face times its height above the plate
+        support_volume += areas[chunk].astype(np.float32) @ np.where(supported, -cosines * heights, 0)
+    return support_volume
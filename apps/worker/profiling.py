@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often the analysis thread's stack is sampled
+PROFILE_SAMPLE_INTERVAL_SECONDS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 10)) / 1000
+# Deeper stacks are cut at the leaf end
+PROFILE_MAX_STACK_DEPTH = 128
+PROFILE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+@dataclass
+class Profile:
+    """Sampled stacks of one analysis in the collapsed (flamegraph) format."""
+    # "outer;...;inner" -> milliseconds spent with that stack on top
+    stacks: Dict[str, float] = field(default_factory=dict)
+    samples: int = 0
+    duration: float = 0.0  # seconds
+    interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS
+
+    def collapsed(self) -> str:
+        """One "stack count" line per stack, as read by flamegraph.pl, speedscope and similar tools."""
+        lines = sorted((stack, round(ms)) for stack, ms in self.stacks.items())
+        return "".join(f"{stack} {ms}\n" for stack, ms in lines if ms > 0)
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of the thread that enters it.
+
+    A background thread reads the stack every ``interval`` seconds through
+    ``sys._current_frames()``; the profiled code runs unmodified, so the
+    overhead is a few microseconds per sample. Samples are weighted by the
+    time since the previous one: while native code holds the GIL the
+    sampler is late, and the whole delay is charged to the stack that held
+    it.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target = None
+        self._start = 0.0
+        self._duration = 0.0
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._target = threading.get_ident()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._duration = time.perf_counter() - self._start
+
+    def profile(self) -> Profile:
+        return Profile(
+            stacks={stack: seconds * 1000 for stack, seconds in self._stacks.items()},
+            samples=self._samples,
+            duration=self._duration,
+            interval=self.interval
+        )
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            now = time.perf_counter()
+            if frame is None:
+                last = now
+                continue
+            names = []
+            while frame is not None and len(names) < PROFILE_MAX_STACK_DEPTH:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                             .replace(";", ":"))
+                frame = frame.f_back
+            self._stacks[";".join(reversed(names))] += now - last
+            self._samples += 1
+            last = now
+
+
+class ProfileStore:
+    """
+    Captured profiles on local disk; only the newest ``max_entries`` are kept.
+
+    Each profile is a collapsed-stacks file plus a JSON metadata file. Disk
+    rather than memory, so every worker process on the host lists the same
+    profiles.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 50):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+
+    def save(self, profile: Profile, metadata: Dict[str, Any]) -> str:
+        profile_id = uuid.uuid4().hex
+        metadata = {
+            **metadata,
+            "id": profile_id,
+            "created_at": time.time(),
+            "samples": profile.samples,
+            "profiled_seconds": round(profile.duration, 3),
+            "sample_interval_ms": round(profile.interval * 1000, 2),
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(profile_id, "collapsed"), "w") as f:
+                f.write(profile.collapsed())
+            # Metadata last, through a rename: listings never see half-written profiles
+            temp_path = self._path(profile_id, "json.tmp")
+            with open(temp_path, "w") as f:
+                json.dump(metadata, f)
+            os.replace(temp_path, self._path(profile_id, "json"))
+            self._evict()
+        logger.info(f"Captured profile {profile_id} ({profile.samples} samples)")
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of all stored profiles, newest first."""
+        profiles = []
+        for profile_id in self._ids():
+            metadata = self.get(profile_id)
+            if metadata:
+                profiles.append(metadata)
+        return sorted(profiles, key=lambda metadata: metadata["created_at"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, "json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def collapsed_path(self, profile_id: str) -> Optional[str]:
+        """Path of a profile's collapsed stacks file, if it exists."""
+        if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+            return None
+        path = self._path(profile_id, "collapsed")
+        return path if os.path.exists(path) else None
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-5] for name in names if name.endswith(".json") and PROFILE_ID_PATTERN.fullmatch(name[:-5])]
+
+    def _evict(self):
+        ids = self._ids()
+        if len(ids) <= self.max_entries:
+            return
+        ids.sort(key=self._mtime)
+        for profile_id in ids[:len(ids) - self.max_entries]:
+            for extension in ("json", "collapsed"):
+                try:
+                    os.unlink(self._path(profile_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def _mtime(self, profile_id: str) -> float:
+        try:
+            return os.path.getmtime(self._path(profile_id, "json"))
+        except FileNotFoundError:
+            # Evicted by another process meanwhile
+            return 0.0
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
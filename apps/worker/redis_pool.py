@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError, ConnectionError, OSError)
+
+
+class RedisPool:
+    """
+    Shared asyncio Redis client backed by a bounded connection pool.
+
+    When Redis is unreachable (at startup or after a connection error reported via
+    ``record_failure``) the pool is marked unavailable and a background task
+    reconnects with exponential backoff; callers check ``client`` and skip Redis
+    while it is None instead of paying a connect timeout on every request.
+    """
+
+    def __init__(self, url: str, max_connections: int = 20, socket_timeout: float = 5.0,
+                 min_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.url = url
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        # Not BlockingConnectionPool: in redis-py 5.0 it leaks a slot on every failed connect
+        self.pool = aioredis.ConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            health_check_interval=30
+        )
+        self._client = aioredis.Redis(connection_pool=self.pool)
+        self.available = False
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._reconnects = 0
+
+    @property
+    def client(self) -> Optional[aioredis.Redis]:
+        """The Redis client, or None while Redis is unavailable."""
+        return self._client if self.available else None
+
+    async def start(self):
+        try:
+            await self._client.ping()
+            self.available = True
+            logger.info("Connected to Redis")
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}. Running without cache until it recovers.")
+            self._schedule_reconnect()
+
+    async def close(self):
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        await self._client.aclose()
+        await self.pool.disconnect()
+
+    def register_script(self, script: str):
+        return self._client.register_script(script)
+
+    def record_failure(self, error: Exception):
+        """Report an error from a Redis call; connection errors trigger reconnection."""
+        if not isinstance(error, CONNECTION_ERRORS):
+            return
+        if "Too many connections" in str(error):
+            # Pool exhausted under load; Redis itself is fine
+            return
+        self._failures += 1
+        if self.available:
+            logger.warning(f"Redis connection lost: {error}")
+            self.available = False
+        self._schedule_reconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "max_connections": self.pool.max_connections,
+            "in_use_connections": len(self.pool._in_use_connections),
+            "idle_connections": len(self.pool._available_connections),
+            "connection_failures": self._failures,
+            "reconnects": self._reconnects,
+        }
+
+    def _schedule_reconnect(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = self.min_backoff
+        while not self.available:
+            await asyncio.sleep(delay)
+            try:
+                await self._client.ping()
+            except Exception as e:
+                logger.debug(f"Redis reconnect failed: {e}")
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            self.available = True
+            self._reconnects += 1
+            logger.info("Reconnected to Redis")
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from notifier import Notifier
+from redis_pool import RedisPool
+
+logger = logging.getLogger(__name__)
+
+# Delete the lease only if it is still ours (it may have expired and been taken over)
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+"""
+
+
+@dataclass
+class Lease:
+    key: str
+    token: str
+    future: asyncio.Future
+
+
+class SingleFlight:
+    """
+    Single-flight runs of identical work across processes and pods.
+
+    The first caller for a key becomes its leader: it registers an
+    in-process future and takes a Redis lease (SET NX with a random token
+    and a TTL). Callers in the same process await the leader's future;
+    callers elsewhere wait for a notification on ``done:<key>`` (polling as
+    a fallback) and look the result up themselves. A leader that fails
+    releases its lease at once; one that crashes holds duplicates back only
+    until the lease expires. Either way waiters get None and try to lead.
+
+    Without Redis, only callers within this process are coalesced.
+    """
+
+    def __init__(self, redis_pool: RedisPool, notifier: Notifier, lease_seconds: float,
+                 poll_interval: float = 1.0, prefix: str = "geometry:lease:"):
+        self.redis_pool = redis_pool
+        self.notifier = notifier
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._local: Dict[str, asyncio.Future] = {}
+        self._release_script = redis_pool.register_script(RELEASE_SCRIPT)
+        self._led = 0
+        self._coalesced = 0
+        self._takeovers = 0
+
+    async def acquire(self, key: str) -> Optional[Lease]:
+        """Become the leader for ``key``; None if another caller already is."""
+        if key in self._local:
+            return None
+        # Registered before the Redis round-trip, so concurrent local callers see it
+        future = asyncio.get_running_loop().create_future()
+        self._local[key] = future
+        lease = Lease(key, uuid.uuid4().hex, future)
+
+        redis_client = self.redis_pool.client
+        if redis_client:
+            try:
+                acquired = await redis_client.set(
+                    self.prefix + key, lease.token, nx=True, px=int(self.lease_seconds * 1000)
+                )
+            except Exception as e:
+                self.redis_pool.record_failure(e)
+                logger.warning(f"Lease acquisition failed, running uncoalesced: {e}")
+                acquired = True
+            if not acquired:
+                # Led elsewhere: local callers that saw our future wait for that leader too
+                self._resolve(lease, None)
+                return None
+        self._led += 1
+        return lease
+
+    def resolve(self, lease: Lease, result: Any):
+        """Hand the leader's result to waiters in this process."""
+        self._resolve(lease, result)
+
+    async def release(self, lease: Lease):
+        """
+        Drop the lease and notify waiters elsewhere; call once the result can be
+        looked up (or after a failure, so waiters take over).
+        """
+        self._resolve(lease, None)
+        redis_client = self.redis_pool.client
+        if not redis_client:
+            return
+        try:
+            await self._release_script(keys=[self.prefix + lease.key], args=[lease.token])
+        except Exception as e:
+            self.redis_pool.record_failure(e)
+            logger.warning(f"Lease release failed: {e}")
+        await self.notifier.publish(f"done:{lease.key}")
+
+    async def wait(self, key: str, lookup: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """
+        Wait for the leader of ``key``: its result (from this process, or through
+        ``lookup`` once a leader elsewhere is done), or None if it finished
+        without one or its lease ran out; the caller should then try to lead.
+        """
+        self._coalesced += 1
+        future = self._local.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lease_seconds
+        with self.notifier.listen(f"done:{key}") as done:
+            while True:
+                result = await lookup()
+                if result is not None:
+                    return result
+                if not await self._lease_held(key) or loop.time() >= deadline:
+                    self._takeovers += 1
+                    # The leader may have finished just after the lookup
+                    return await lookup()
+                try:
+                    await asyncio.wait_for(done.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                done.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._local),
+            "led": self._led,
+            "coalesced": self._coalesced,
+            "takeovers": self._takeovers,
+        }
+
+    def _resolve(self, lease: Lease, result: Any):
+        if self._local.get(lease.key) is lease.future:
+            del self._local[lease.key]
+        if not lease.future.done():
+            lease.future.set_result(result)
+
+    async def _lease_held(self, key: str) -> bool:
+        redis_client = self.redis_pool.client
+        if not redis_client:
+            return False
+        try:
+            return bool(await redis_client.exists(self.prefix + key))
+        except Exception as e:
+            self.redis_pool.record_failure(e)
+            return False
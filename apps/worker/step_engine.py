@@ -0,0 +1,80 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+# gmsh element type of 3-node triangles
+GMSH_TRIANGLE = 2
+
+
+class GmshSession:
+    """
+    A gmsh instance kept alive for the lifetime of the process.
+
+    gmsh is initialized on first use; between jobs the model is cleared
+    instead of finalizing and re-initializing the library. gmsh keeps global
+    state and is not thread-safe, so each job holds ``lock`` from import to
+    its last query (in thread mode, STEP jobs of one process run one at a time).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._gmsh = None
+
+    @contextmanager
+    def open(self, file_path: str) -> Iterator:
+        """Import a STEP/IGES file into an empty model and yield the gmsh module."""
+        with self.lock:
+            gmsh = self._start()
+            try:
+                with telemetry.stage("parse"):
+                    gmsh.model.occ.importShapes(file_path)
+                    gmsh.model.occ.synchronize()
+                yield gmsh
+            finally:
+                try:
+                    gmsh.clear()
+                except Exception as e:
+                    # Don't reuse an instance in an unknown state
+                    logger.warning(f"Resetting gmsh after failed clear: {e}")
+                    self._stop()
+
+    def _start(self):
+        if self._gmsh is None:
+            import gmsh
+            # Not interruptible: installing its SIGINT handler fails outside the main thread
+            gmsh.initialize(readConfigFiles=False, interruptible=False)
+            gmsh.option.setNumber("General.Terminal", 0)  # Disable terminal output
+            self._gmsh = gmsh
+            logger.info("gmsh initialized")
+        return self._gmsh
+
+    def _stop(self):
+        try:
+            self._gmsh.finalize()
+        except Exception:
+            pass
+        self._gmsh = None
+
+
+def surface_triangles(gmsh) -> np.ndarray:
+    """(n, 3, 3) triangles of the current model's surface mesh."""
+    node_tags, coords, _ = gmsh.model.mesh.getNodes(returnParametricCoord=False)
+    _, element_nodes = gmsh.model.mesh.getElementsByType(GMSH_TRIANGLE)
+    if not len(node_tags) or not len(element_nodes):
+        return np.zeros((0, 3, 3))
+    node_tags = np.asarray(node_tags, dtype=np.int64)
+    index = np.zeros(node_tags.max() + 1, dtype=np.int64)
+    index[node_tags] = np.arange(len(node_tags))
+    points = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    return points[index[np.asarray(element_nodes, dtype=np.int64)]].reshape(-1, 3, 3)
+
+
+# One session per process (pool workers each get their own)
+session = GmshSession()
@@ -0,0 +1,192 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Concave cylindrical faces around one axis sweeping at least this angle form a hole (radians)
+HOLE_MIN_SWEEP = 0.99 * 2 * np.pi
+# Edges and axes within this angle of Z are vertical, i.e. along the tool axis of 3-axis machining
+VERTICAL_ANGLE_DEGREES = 10.0
+# Axis positions and radii are compared at this precision when grouping faces (mm)
+AXIS_TOLERANCE_MM = 1e-3
+
+
+@dataclass
+class Hole:
+    diameter: float  # mm
+    depth: float  # mm
+    vertical: bool  # axis along Z
+
+
+@dataclass
+class StepFeatures:
+    """Machining features recognized on the B-rep of a STEP/IGES model."""
+    holes: List[Hole] = field(default_factory=list)
+    # Concave cylindrical blends and toroidal blends (mm)
+    fillet_radii: List[float] = field(default_factory=list)
+    # Concave cylindrical blends with a vertical axis: the radius an end mill leaves in a corner (mm)
+    internal_corner_radii: List[float] = field(default_factory=list)
+    # Vertical concave edges between two planes, which no rotating tool can cut
+    sharp_internal_corners: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain JSON-serializable form (numpy scalars converted)."""
+        return {
+            "holes": [
+                {"diameter": float(hole.diameter), "depth": float(hole.depth), "vertical": bool(hole.vertical)}
+                for hole in self.holes
+            ],
+            "fillet_radii": [float(radius) for radius in self.fillet_radii],
+            "internal_corner_radii": [float(radius) for radius in self.internal_corner_radii],
+            "sharp_internal_corners": int(self.sharp_internal_corners),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StepFeatures":
+        return cls(
+            holes=[Hole(**hole) for hole in data["holes"]],
+            fillet_radii=list(data["fillet_radii"]),
+            internal_corner_radii=list(data["internal_corner_radii"]),
+            sharp_internal_corners=data["sharp_internal_corners"],
+        )
+
+
+@dataclass
+class _Cylinder:
+    radius: float
+    axis: np.ndarray  # unit direction, sign normalized
+    origin: np.ndarray  # point of the axis closest to the coordinate origin
+    concave: bool
+    sweep: float  # radians
+    axial_range: np.ndarray  # (2,) positions along the axis
+
+
+def extract_features(gmsh) -> StepFeatures:
+    """
+    Classify the faces and edges of the current gmsh model.
+
+    Face types, normals and curvature come straight from the OCC surfaces
+    (a few evaluations per face), and the curve-to-face adjacency is built in
+    one pass, so the cost is linear in the number of faces and edges. Outward
+    face normals are assumed, as OCC provides for closed solids.
+    """
+    faces = [tag for _, tag in gmsh.model.getEntities(2)]
+    face_types = {face: gmsh.model.getType(2, face) for face in faces}
+    curve_faces: Dict[int, List[int]] = defaultdict(list)
+    for face in faces:
+        _, curves = gmsh.model.getAdjacencies(2, face)
+        for curve in curves:
+            curve_faces[int(curve)].append(face)
+
+    features = StepFeatures()
+    vertical_cos = np.cos(np.radians(VERTICAL_ANGLE_DEGREES))
+
+    # Holes: concave cylinders grouped by axis and radius (CAD often splits a hole into halves)
+    hole_groups: Dict[tuple, List[_Cylinder]] = defaultdict(list)
+    for face in faces:
+        if face_types[face] == "Cylinder":
+            cylinder = _cylinder(gmsh, face)
+            if cylinder is not None and cylinder.concave:
+                key = tuple(np.round(np.r_[cylinder.axis, cylinder.origin, cylinder.radius] / AXIS_TOLERANCE_MM))
+                hole_groups[key].append(cylinder)
+        elif face_types[face] == "Torus":
+            curvature = gmsh.model.getCurvature(2, face, _center_uv(gmsh, face))[0]
+            if curvature > 0:
+                features.fillet_radii.append(1.0 / curvature)
+
+    for cylinders in hole_groups.values():
+        first = cylinders[0]
+        vertical = abs(first.axis[2]) >= vertical_cos
+        if sum(cylinder.sweep for cylinder in cylinders) >= HOLE_MIN_SWEEP:
+            ranges = np.array([cylinder.axial_range for cylinder in cylinders])
+            features.holes.append(Hole(
+                diameter=2 * first.radius,
+                depth=float(ranges.max() - ranges.min()),
+                vertical=bool(vertical)
+            ))
+            continue
+        for cylinder in cylinders:
+            features.fillet_radii.append(cylinder.radius)
+            if vertical:
+                features.internal_corner_radii.append(cylinder.radius)
+
+    # Sharp internal corners: vertical straight edges where two planes meet concavely
+    plane_normals: Dict[int, np.ndarray] = {}
+    plane_centers: Dict[int, np.ndarray] = {}
+    for curve, adjacent in curve_faces.items():
+        if len(adjacent) != 2 or any(face_types[face] != "Plane" for face in adjacent):
+            continue
+        if gmsh.model.getType(1, curve) != "Line":
+            continue
+        ends = _curve_ends(gmsh, curve)
+        direction = ends[1] - ends[0]
+        length = np.linalg.norm(direction)
+        if length == 0 or abs(direction[2]) < vertical_cos * length:
+            continue
+        a, b = adjacent
+        for face in adjacent:
+            if face not in plane_normals:
+                plane_normals[face] = np.array(gmsh.model.getNormal(face, _center_uv(gmsh, face)))
+                plane_centers[face] = np.array(gmsh.model.occ.getCenterOfMass(2, face))
+        # Face b lies entirely on one side of face a's plane (it contains the shared edge);
+        # above it, along a's outward normal, the corner is concave
+        if np.dot(plane_normals[a], plane_centers[b] - ends[0]) > AXIS_TOLERANCE_MM:
+            features.sharp_internal_corners += 1
+
+    return features
+
+
+def _center_uv(gmsh, face: int) -> List[float]:
+    lower, upper = gmsh.model.getParametrizationBounds(2, face)
+    return [(lower[0] + upper[0]) / 2, (lower[1] + upper[1]) / 2]
+
+
+def _curve_ends(gmsh, curve: int) -> np.ndarray:
+    lower, upper = gmsh.model.getParametrizationBounds(1, curve)
+    return np.array(gmsh.model.getValue(1, curve, [lower[0], upper[0]])).reshape(2, 3)
+
+
+def _cylinder(gmsh, face: int) -> Optional[_Cylinder]:
+    """
+    Axis, radius and orientation of a cylindrical face.
+
+    OCC parametrizes cylinders by angle (u) and axial position (v). Of the
+    two possible axes at distance r along the normal, the one that is also at
+    distance r from a second point of the face is the real one; if the
+    outward normal points towards it, the face is concave (a hole wall).
+    """
+    (u0, v0), (u1, v1) = gmsh.model.getParametrizationBounds(2, face)
+    points = np.array(gmsh.model.getValue(2, face, [u0, v0, (u0 + u1) / 2, v0, u0, v1])).reshape(3, 3)
+    curvature = gmsh.model.getCurvature(2, face, [u0, v0])[0]
+    axis = points[2] - points[0]
+    height = np.linalg.norm(axis)
+    if curvature <= 0 or height == 0:
+        return None
+    radius = 1.0 / curvature
+    axis /= height
+    normal = np.array(gmsh.model.getNormal(face, [u0, v0]))
+
+    def radial_error(center):
+        offset = points[1] - center
+        return abs(np.linalg.norm(offset - np.dot(offset, axis) * axis) - radius)
+
+    inward_center = points[0] + radius * normal
+    concave = radial_error(inward_center) <= radial_error(points[0] - radius * normal)
+    center = inward_center if concave else points[0] - radius * normal
+
+    # Sign-normalize the axis so faces of one hole share a grouping key
+    if axis[np.argmax(np.abs(axis))] < 0:
+        axis = -axis
+    positions = points[[0, 2]] @ axis
+    return _Cylinder(
+        radius=radius,
+        axis=axis,
+        origin=center - np.dot(center, axis) * axis,
+        concave=bool(concave),
+        sweep=abs(u1 - u0),
+        axial_range=np.array([positions.min(), positions.max()])
+    )
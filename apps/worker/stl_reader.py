@@ -0,0 +1,207 @@
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+import trimesh
+
+logger = logging.getLogger(__name__)
+
+STL_HEADER_BYTES = 80
+# 80 byte header, uint32 triangle count, then one 50 byte record per triangle
+STL_DATA_OFFSET = STL_HEADER_BYTES + 4
+STL_RECORD_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attributes", "<u2"),
+])
+
+# Triangles converted to float64 at a time; bounds temporary memory for huge files
+STL_CHUNK_TRIANGLES = 1_000_000
+
+# Odd 64-bit multipliers mixing the x, y and z bits of a vertex into one hash
+VERTEX_HASH_MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+
+# Faces whose normal is more than this far from +Z count as overhangs
+OVERHANG_ANGLE_DEGREES = 45
+
+
+@dataclass
+class MeshSummary:
+    """Metrics computed straight from the triangle array, in file units (mm)."""
+    triangle_count: int
+    volume: float
+    area: float
+    bounds: np.ndarray  # (2, 3) min / max corner
+    overhang_area: float
+
+    @property
+    def extents(self) -> np.ndarray:
+        return self.bounds[1] - self.bounds[0]
+
+
+class STLTriangles:
+    """
+    Triangle soup of an STL file.
+
+    Binary files are memory-mapped (paths) or viewed in place (bytes) as
+    STL_RECORD_DTYPE records, so volume, area, bounds, normals and overhang
+    area are computed without a trimesh.Trimesh and without copying the file.
+    The full mesh, which merges vertices and builds adjacency, is only
+    created by ``mesh`` when watertightness or ray casting is needed; with
+    ``merged`` (vertices and faces merged earlier, e.g. from the mesh cache)
+    it is built without merging again.
+    """
+
+    def __init__(self, triangles: np.ndarray, mesh: Optional[trimesh.Trimesh] = None,
+                 merged: Optional[Tuple[np.ndarray, np.ndarray]] = None, file_view: bool = False):
+        self.triangles = triangles  # (n, 3, 3), possibly a strided float32 view
+        self._mesh = mesh
+        self._merged = merged
+        # The triangles are a zero-copy view of a binary STL file
+        self.file_view = file_view
+
+    @classmethod
+    def load(cls, source: Union[str, bytes]) -> "STLTriangles":
+        """Read an STL from a path or bytes, using the fast path for binary files."""
+        records = read_binary_stl(source)
+        if records is not None:
+            return cls(records["vertices"], file_view=True)
+
+        # ASCII STL: fall back to trimesh's parser
+        if isinstance(source, bytes):
+            mesh = trimesh.load(io.BytesIO(source), file_type="stl")
+        else:
+            mesh = trimesh.load(source, file_type="stl")
+        return cls(mesh.triangles, mesh=mesh)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.triangles)
+
+    @property
+    def mesh(self) -> trimesh.Trimesh:
+        """Full trimesh mesh with merged vertices, built on first access."""
+        if self._mesh is None and self._merged is not None:
+            vertices, faces = self._merged
+            self._mesh = trimesh.Trimesh(
+                vertices=np.array(vertices, dtype=np.float64), faces=np.array(faces, dtype=np.int64), process=False
+            )
+        if self._mesh is None:
+            vertices = np.asarray(self.triangles, dtype=np.float64).reshape(-1, 3)
+            faces = np.arange(len(vertices), dtype=np.int64).reshape(-1, 3)
+            self._mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
+        return self._mesh
+
+    def merged_arrays(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Vertices and faces of the merged mesh, if it has been built."""
+        if self._mesh is None:
+            return None
+        return np.asarray(self._mesh.vertices), np.asarray(self._mesh.faces)
+
+    def is_watertight(self) -> bool:
+        """
+        Whether every edge is shared by exactly two triangles, after merging
+        identical vertices (the same test as trimesh, without building a mesh).
+
+        Vertices are identified by a 64-bit hash of their float32 bits; a false
+        merge needs a hash collision between two of the mesh's vertices.
+        """
+        if self._mesh is not None:
+            return bool(self._mesh.is_watertight)
+        if not self.triangle_count:
+            return False
+        # Adding zero turns -0.0 into 0.0 so both merge
+        corners = np.asarray(self.triangles, dtype=np.float32).reshape(-1, 3) + np.float32(0)
+        bits = corners.view(np.uint32).astype(np.uint64)
+        hashes = bits[:, 0] * VERTEX_HASH_MULTIPLIERS[0]
+        hashes ^= bits[:, 1] * VERTEX_HASH_MULTIPLIERS[1]
+        hashes ^= bits[:, 2] * VERTEX_HASH_MULTIPLIERS[2]
+        _, vertex_ids = np.unique(hashes, return_inverse=True)
+
+        faces = vertex_ids.reshape(-1, 3).astype(np.int64)
+        edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+        keys = np.sort(edges[:, 0] * (faces.max() + 1) + edges[:, 1])
+        # Sorted, every key must come in exactly one pair
+        if len(keys) % 2:
+            return False
+        return bool(np.all(keys[0::2] == keys[1::2]) and np.all(keys[1:-1:2] != keys[2::2]))
+
+    def chunks(self, chunk_size: int = STL_CHUNK_TRIANGLES) -> Iterator[np.ndarray]:
+        """Yield the triangles as float64 arrays of at most ``chunk_size`` faces."""
+        for start in range(0, self.triangle_count, chunk_size):
+            yield np.asarray(self.triangles[start:start + chunk_size], dtype=np.float64)
+
+    def summarize(self, chunk_size: int = STL_CHUNK_TRIANGLES) -> MeshSummary:
+        """Volume, area, bounds and overhang area in one pass over the triangles."""
+        volume = 0.0
+        area = 0.0
+        overhang_area = 0.0
+        lower = np.full(3, np.inf)
+        upper = np.full(3, -np.inf)
+        overhang_cos = np.cos(np.radians(OVERHANG_ANGLE_DEGREES))
+
+        for triangles in self.chunks(chunk_size):
+            normals, areas = face_normals_and_areas(triangles)
+            # Signed tetrahedron volumes against the origin (divergence theorem)
+            volume += np.einsum(
+                "ij,ij->", triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])
+            ) / 6.0
+            area += areas.sum()
+            overhang_area += areas[normals[:, 2] < overhang_cos].sum()
+            points = triangles.reshape(-1, 3)
+            lower = np.minimum(lower, points.min(axis=0))
+            upper = np.maximum(upper, points.max(axis=0))
+
+        if not self.triangle_count:
+            lower = upper = np.zeros(3)
+
+        return MeshSummary(
+            triangle_count=self.triangle_count,
+            volume=float(volume),
+            area=float(area),
+            bounds=np.array([lower, upper]),
+            overhang_area=float(overhang_area)
+        )
+
+
+def face_normals_and_areas(triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Unit normals (zero for degenerate faces) and areas of an (n, 3, 3) triangle array."""
+    cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    doubled_areas = np.linalg.norm(cross, axis=1)
+    normals = np.zeros_like(cross)
+    nonzero = doubled_areas > 0
+    normals[nonzero] = cross[nonzero] / doubled_areas[nonzero, None]
+    return normals, doubled_areas / 2.0
+
+
+def read_binary_stl(source: Union[str, bytes]) -> Optional[np.ndarray]:
+    """
+    Return the triangle records of a binary STL without copying, or None if the
+    data is not binary STL.
+
+    A file is treated as binary when its size matches the triangle count in the
+    header exactly; ASCII files (which may also start with "solid") never do.
+    """
+    if isinstance(source, bytes):
+        size = len(source)
+        if size < STL_DATA_OFFSET:
+            return None
+        count = int(np.frombuffer(source, dtype="<u4", count=1, offset=STL_HEADER_BYTES)[0])
+        if size != STL_DATA_OFFSET + count * STL_RECORD_DTYPE.itemsize:
+            return None
+        return np.frombuffer(source, dtype=STL_RECORD_DTYPE, count=count, offset=STL_DATA_OFFSET)
+
+    size = os.path.getsize(source)
+    if size < STL_DATA_OFFSET:
+        return None
+    with open(source, "rb") as f:
+        f.seek(STL_HEADER_BYTES)
+        count = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    if size != STL_DATA_OFFSET + count * STL_RECORD_DTYPE.itemsize:
+        return None
+    if count == 0:
+        return np.zeros(0, dtype=STL_RECORD_DTYPE)
+    return np.memmap(source, dtype=STL_RECORD_DTYPE, mode="r", offset=STL_DATA_OFFSET, shape=(count,))
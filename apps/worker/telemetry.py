@@ -0,0 +1,137 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+
+# Seconds; analysis stages range from sub-millisecond lookups to multi-minute CAD imports
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "geometry_stage_duration_seconds",
+    "Time spent in one stage of an analysis request (download, parse, a metric, DFM rules, cache I/O)",
+    ["stage", "file_type", "process_type"],
+    buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "geometry_request_duration_seconds",
+    "Total time to answer an analysis request",
+    ["file_type", "process_type", "cached"],
+    buckets=STAGE_BUCKETS
+)
+CACHE_LOOKUPS = Counter(
+    "geometry_cache_lookups_total",
+    "Result cache lookups by tier (local, redis) and outcome (hit, miss)",
+    ["tier", "result"]
+)
+FALLBACKS = Counter(
+    "geometry_analysis_fallbacks_total",
+    "Analyses that fell back to a degraded path (trimesh import, mock results)",
+    ["file_type", "fallback"]
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "geometry_job_queue_depth",
+    "Jobs waiting in the Redis job queue",
+    multiprocess_mode="max"
+)
+POOL_JOBS = Gauge(
+    "geometry_pool_jobs",
+    "Jobs running or queued in an analysis pool",
+    ["pool", "state"],
+    multiprocess_mode="livesum"
+)
+
+
+@dataclass
+class StageTimings:
+    """Seconds spent per stage of one request, and the fallbacks it took."""
+    stages: Dict[str, float] = field(default_factory=dict)
+    fallbacks: List[str] = field(default_factory=list)
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def merge(self, other: "StageTimings"):
+        for stage, seconds in other.stages.items():
+            self.add(stage, seconds)
+        self.fallbacks.extend(other.fallbacks)
+
+    def to_dict(self) -> Dict[str, float]:
+        """Stage durations in milliseconds."""
+        return {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+
+
+# Timings of the request being handled in this task / thread / pool worker, if recorded
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def recording() -> Iterator[StageTimings]:
+    """Collect the stages timed inside the block (in this context) into a new StageTimings."""
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block (monotonic clock) as ``name`` in the current recording; a no-op outside one."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def merge(timings: StageTimings):
+    """Add timings recorded elsewhere (e.g. by a pool worker) to the current recording."""
+    current = _current.get()
+    if current is not None:
+        current.merge(timings)
+
+
+def record_fallback(name: str):
+    timings = _current.get()
+    if timings is not None:
+        timings.fallbacks.append(name)
+
+
+def observe(timings: StageTimings, file_type: str, process_type: str):
+    """Export a request's stage timings and fallbacks to Prometheus."""
+    file_type = file_type.lower()
+    for name, seconds in timings.stages.items():
+        STAGE_SECONDS.labels(stage=name, file_type=file_type, process_type=process_type).observe(seconds)
+    for name in timings.fallbacks:
+        FALLBACKS.labels(file_type=file_type, fallback=name).inc()
+
+
+def count_cache_lookup(tier: str, hit: bool):
+    CACHE_LOOKUPS.labels(tier=tier, result="hit" if hit else "miss").inc()
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Current metrics in the Prometheus text format, and its content type.
+
+    With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR so every
+    process writes its metrics there and any of them can serve the total.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,36 @@
+import fakeredis
+import pytest
+
+from redis_pool import RedisPool
+
+
+@pytest.fixture
+async def redis_pool():
+    """A RedisPool whose client is an in-memory fake Redis."""
+    pool = RedisPool("redis://localhost:6379")
+    pool._client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+    pool.available = True
+    yield pool
+    await pool._client.aclose()
+
+
+@pytest.fixture
+def step_file(tmp_path):
+    """Writes the shape ``build(gmsh.model.occ)`` creates to a STEP file and returns its path."""
+    pytest.importorskip("gmsh")
+    import step_engine
+
+    def write(name, build):
+        path = str(tmp_path / f"{name}.step")
+        # Through the shared session: gmsh state is global to the process
+        with step_engine.session.lock:
+            gmsh = step_engine.session._start()
+            try:
+                build(gmsh.model.occ)
+                gmsh.model.occ.synchronize()
+                gmsh.write(path)
+            finally:
+                gmsh.clear()
+        return path
+
+    return write
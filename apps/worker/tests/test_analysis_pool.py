@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from analysis_pool import AnalysisPool, AnalysisTimeoutError, PoolSaturatedError, WorkerCrashedError
+
+MODES = ["process", "thread"]
+
+
+class FakeAnalyzer:
+    """Stands in for GeometryAnalyzer; module-level so spawned workers can unpickle it."""
+
+    def echo(self, value):
+        return value
+
+    def pid(self):
+        return os.getpid()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+    def spin(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            pass
+
+    def fail(self):
+        raise ValueError("bad geometry")
+
+    def crash(self):
+        os._exit(3)
+
+
+@pytest.fixture
+async def make_pool():
+    pools = []
+
+    async def make(mode="process", **kwargs):
+        kwargs.setdefault("max_workers", 1)
+        kwargs.setdefault("max_queued", 0)
+        pool = AnalysisPool(mode=mode, analyzer_factory=FakeAnalyzer, **kwargs)
+        await pool.start()
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        await pool.shutdown()
+
+
+async def wait_until_running(pool):
+    while pool.stats()["running"] == 0:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("mode", MODES)
+async def test_results_and_errors_come_back(make_pool, mode):
+    pool = await make_pool(mode)
+    payload = os.urandom(16 * 1024 * 1024)
+
+    assert await pool.run("echo", payload) == payload
+    with pytest.raises(ValueError, match="bad geometry"):
+        await pool.run("fail")
+    assert await pool.run("echo", "still usable") == "still usable"
+
+
+@pytest.mark.parametrize("mode", MODES)
+async def test_rejects_jobs_beyond_running_and_queued_limit(make_pool, mode):
+    pool = await make_pool(mode, max_workers=1, max_queued=1)
+    running = asyncio.create_task(pool.run("sleep", 0.5))
+    queued = asyncio.create_task(pool.run("sleep", 0))
+    await wait_until_running(pool)
+
+    assert pool.saturated
+    with pytest.raises(PoolSaturatedError):
+        await pool.run("echo", 1)
+    assert await asyncio.gather(running, queued) == [0.5, 0]
+    assert pool.stats()["rejected"] == 1
+    assert await pool.run("echo", 1) == 1
+
+
+async def test_timed_out_worker_is_killed_and_replaced(make_pool):
+    pool = await make_pool()
+    pid = await pool.run("pid")
+    # Only now: a freshly spawned worker can take longer than this to start
+    pool.timeout_seconds = 0.5
+
+    with pytest.raises(AnalysisTimeoutError):
+        await pool.run("sleep", 30)
+    assert pool.stats()["timeouts"] == 1
+    pool.timeout_seconds = 120
+    assert await pool.run("pid") != pid
+
+
+async def test_thread_mode_times_out_without_stopping_the_job(make_pool):
+    pool = await make_pool("thread", timeout_seconds=0.2)
+
+    with pytest.raises(AnalysisTimeoutError):
+        await pool.run("sleep", 0.5)
+    assert pool.stats()["timeouts"] == 1
+    assert pool.stats()["running"] == 0
+
+
+async def test_cpu_limit_stops_the_job_with_a_timeout(make_pool):
+    pool = await make_pool(timeout_seconds=30, cpu_limit_seconds=1)
+    pid = await pool.run("pid")
+
+    with pytest.raises(AnalysisTimeoutError, match="CPU limit"):
+        await pool.run("spin", 30)
+    assert pool.stats()["timeouts"] == 1
+    assert await pool.run("pid") != pid
+
+
+async def test_crashed_worker_is_replaced(make_pool):
+    pool = await make_pool()
+    pid = await pool.run("pid")
+
+    with pytest.raises(WorkerCrashedError):
+        await pool.run("crash")
+    assert pool.stats()["crashes"] == 1
+    assert await pool.run("pid") != pid
+
+
+async def test_cancelled_job_replaces_the_busy_worker(make_pool):
+    pool = await make_pool()
+    pid = await pool.run("pid")
+    job = asyncio.create_task(pool.run("sleep", 30))
+    await wait_until_running(pool)
+
+    job.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await job
+    stats = pool.stats()
+    assert (stats["running"], stats["queued"]) == (0, 0)
+    assert await asyncio.wait_for(pool.run("pid"), 10) != pid
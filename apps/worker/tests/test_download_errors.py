@@ -0,0 +1,81 @@
+import pytest
+import requests
+from botocore.exceptions import ClientError
+from fastapi import BackgroundTasks, HTTPException
+
+import main
+from geometry_analyzer import GeometryAnalyzer, SourceFileError
+
+
+def respond_with(status_code):
+    def get(url, **kwargs):
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = url
+        return response
+    return get
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = GeometryAnalyzer()
+    monkeypatch.setattr(analyzer.http, "get", respond_with(404))
+    return analyzer
+
+
+def test_client_error_keeps_its_status(analyzer):
+    with pytest.raises(SourceFileError, match="HTTP 404") as raised:
+        analyzer.download_file("https://files.example.com/part.stl")
+
+    assert raised.value.status_code == 404
+
+
+@pytest.mark.parametrize("status_code", [429, 500])
+def test_transient_errors_stay_generic(analyzer, monkeypatch, status_code):
+    monkeypatch.setattr(analyzer.http, "get", respond_with(status_code))
+
+    with pytest.raises(Exception, match="Failed to download file") as raised:
+        analyzer.download_file("https://files.example.com/part.stl")
+
+    assert not isinstance(raised.value, SourceFileError)
+
+
+def test_missing_s3_object(analyzer, monkeypatch):
+    class S3:
+        def get_object(self, Bucket, Key):
+            raise ClientError(
+                {"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {"HTTPStatusCode": 404}}, "GetObject"
+            )
+
+    monkeypatch.setattr(analyzer, "_get_s3_client", lambda: S3())
+
+    with pytest.raises(SourceFileError, match="HTTP 404"):
+        analyzer.download_file("s3://bucket/part.stl")
+
+
+async def test_source_client_error_is_a_bad_request(monkeypatch):
+    monkeypatch.setattr(main.analyzer.http, "get", respond_with(403))
+    request = main.GeometryAnalysisRequest(
+        file_url="https://files.example.com/part.stl", file_type="stl", process_type="3d_fff"
+    )
+
+    with pytest.raises(HTTPException) as raised:
+        await main.run_analysis(request, BackgroundTasks())
+
+    assert raised.value.status_code == 400
+    assert "HTTP 403" in raised.value.detail
+
+
+async def test_queued_job_with_bad_url_fails_without_raising(monkeypatch):
+    monkeypatch.setattr(main.analyzer.http, "get", respond_with(404))
+    job_id = main.new_job_id()
+
+    # Returning (not raising) counts the job as handled rather than as a consumer failure
+    await main.process_queued_job({
+        "file_url": "https://files.example.com/part.stl", "file_type": "stl",
+        "process_type": "3d_fff", "job_id": job_id,
+    })
+
+    job = await main.read_job(job_id)
+    assert job["status"] == "failed"
+    assert "HTTP 404" in job["result"]["error"]
@@ -0,0 +1,63 @@
+import ezdxf
+import numpy as np
+
+from dxf_contours import build_contours
+from dxf_pipeline import collect_geometry
+
+
+def contours_of(draw):
+    doc = ezdxf.new()
+    draw(doc.modelspace())
+    return build_contours(collect_geometry(doc.modelspace()))
+
+
+def square(msp, x, y, size):
+    msp.add_lwpolyline([(x, y), (x + size, y), (x + size, y + size), (x, y + size)], close=True)
+
+
+def test_nested_contours_alternate_between_material_and_holes():
+    def draw(msp):
+        square(msp, 0, 0, 100)  # outline
+        square(msp, 10, 10, 40)  # hole
+        msp.add_circle((30, 30), 5)  # island in the hole
+        msp.add_circle((75, 75), 10)  # hole
+
+    contours = contours_of(draw)
+
+    order = np.argsort(-contours.areas)
+    np.testing.assert_allclose(contours.areas[order], [10000, 1600, 100 * np.pi, 25 * np.pi])
+    np.testing.assert_array_equal(contours.depths[order], [0, 1, 1, 2])
+    assert contours.hole_count == 2
+    np.testing.assert_allclose(contours.net_area, 10000 - 1600 - 100 * np.pi + 25 * np.pi)
+    np.testing.assert_allclose(contours.perimeters[order][:2], [400, 160])
+
+
+def test_lines_and_arcs_are_chained_into_closed_contours():
+    def draw(msp):
+        # A 20 x 10 slot: two lines joined by half circles, drawn in no particular direction
+        msp.add_line((0, 0), (20, 0))
+        msp.add_line((0, 10), (20, 10))
+        msp.add_arc((20, 5), 5, -90, 90)
+        msp.add_arc((0, 5), 5, 90, 270)
+        # A stray open line
+        msp.add_line((50, 50), (60, 50))
+
+    contours = contours_of(draw)
+
+    assert contours.closed_count == 1
+    assert contours.open_count == 1
+    assert contours.pierce_count == 2
+    np.testing.assert_allclose(contours.areas, [20 * 10 + 25 * np.pi])
+    np.testing.assert_allclose(contours.perimeters, [40 + 10 * np.pi])
+
+
+def test_end_points_within_tolerance_are_connected():
+    def draw(msp):
+        msp.add_line((0, 0), (10, 0))
+        msp.add_line((10.005, 0), (10, 10))
+        msp.add_line((10, 10), (0, 0))
+
+    contours = contours_of(draw)
+
+    assert (contours.closed_count, contours.open_count) == (1, 0)
+    np.testing.assert_allclose(contours.areas, [50], rtol=1e-3)
@@ -0,0 +1,133 @@
+import ezdxf
+import numpy as np
+
+import dxf_pipeline
+
+
+def summarize(draw):
+    doc = ezdxf.new()
+    draw(doc.modelspace())
+    return dxf_pipeline.summarize(dxf_pipeline.collect_geometry(doc.modelspace()))
+
+
+def test_lines_polylines_and_circles():
+    def draw(msp):
+        msp.add_lwpolyline([(0, 0), (10, 0), (10, 5), (0, 5)], close=True)
+        msp.add_line((20, 0), (20.5, 0))
+        msp.add_circle((30, 0), 2)
+
+    summary = summarize(draw)
+
+    np.testing.assert_allclose(summary.cut_length, 30 + 0.5 + 4 * np.pi)
+    np.testing.assert_allclose(summary.bounds, [[0, -2], [32, 5]])
+    # The half millimetre line is the only feature below SMALL_FEATURE_MM
+    np.testing.assert_allclose(summary.small_features, [0.5])
+
+
+def test_bulged_edge_length_and_bounds():
+    def draw(msp):
+        # Semicircle below the chord from (0, 0) to (2, 0), closed by the chord
+        msp.add_lwpolyline([(0, 0, 0, 0, 1.0), (2, 0, 0, 0, 0)], format="xyseb", close=True)
+
+    summary = summarize(draw)
+
+    np.testing.assert_allclose(summary.cut_length, np.pi + 2)
+    np.testing.assert_allclose(summary.bounds, [[0, -1], [2, 0]], atol=1e-12)
+
+
+def test_clockwise_bulge_turns_the_other_way():
+    def draw(msp):
+        msp.add_lwpolyline([(0, 0, 0, 0, -1.0), (2, 0, 0, 0, 0)], format="xyseb")
+
+    summary = summarize(draw)
+
+    np.testing.assert_allclose(summary.cut_length, np.pi)
+    np.testing.assert_allclose(summary.bounds, [[0, 0], [2, 1]], atol=1e-12)
+
+
+def test_arc_extreme_points_include_crossed_quadrants():
+    # Counter-clockwise from 45 to 135 degrees crosses the top of the circle only
+    points = dxf_pipeline.arc_extreme_points(np.array([[0.0, 0.0, 2.0, 45.0]]), np.array([90.0]))
+
+    assert len(points) == 3
+    np.testing.assert_allclose(points[:, 1].max(), 2)
+    np.testing.assert_allclose(np.sort(points[:, 0]), [-np.sqrt(2), 0, np.sqrt(2)], atol=1e-12)
+
+
+def test_edge_table_keeps_polyline_edges_in_one_path():
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    msp.add_lwpolyline([(0, 0), (10, 0), (10, 5), (0, 5)], close=True)
+    msp.add_line((20, 0), (25, 0))
+
+    geometry = dxf_pipeline.collect_geometry(msp)
+
+    # The line comes first as its own path, then the four sides of the closed square
+    np.testing.assert_array_equal(geometry.edge_paths, [0, 1, 1, 1, 1])
+    np.testing.assert_array_equal(geometry.path_closed, [False, True])
+    np.testing.assert_array_equal(
+        geometry.edge_kinds, [dxf_pipeline.EDGE_LINE] + [dxf_pipeline.EDGE_POLYLINE] * 4
+    )
+    np.testing.assert_allclose(geometry.edge_ends[-1], [0, 0])
+    np.testing.assert_allclose(dxf_pipeline.edge_lengths(geometry), [5, 10, 5, 10, 5])
+
+
+def test_bulge_arcs():
+    quarter = np.tan(np.radians(90) / 4)
+    starts = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    ends = np.array([[2.0, 0.0], [0.0, 1.0], [1.0, 0.0]])
+    bulges = np.array([1.0, quarter, -quarter])
+
+    arcs, spans = dxf_pipeline.bulge_arcs(starts, ends, bulges)
+
+    # Semicircle over (0, 0)-(2, 0) turning left from 180 degrees; the quarter
+    # circle around the origin, once counter-clockwise and once clockwise
+    np.testing.assert_allclose(arcs, [[1, 0, 1, 180], [0, 0, 1, 0], [0, 0, 1, 0]], atol=1e-12)
+    np.testing.assert_allclose(spans, [180, 90, 90])
+
+
+def test_mirrored_block_reverses_bulges():
+    doc = ezdxf.new()
+    block = doc.blocks.new("ARC")
+    block.add_lwpolyline([(0, 0, 0, 0, 1.0), (2, 0, 0, 0, 0)], format="xyseb")
+    doc.modelspace().add_blockref("ARC", (0, 0), dxfattribs={"xscale": -1})
+
+    geometry = dxf_pipeline.collect_geometry(doc.modelspace())
+
+    np.testing.assert_allclose(geometry.edge_starts, [[0, 0]])
+    np.testing.assert_allclose(geometry.edge_ends, [[-2, 0]])
+    # Mirrored, the semicircle still bulges below the x axis
+    np.testing.assert_allclose(geometry.edge_bulges, [-1])
+    np.testing.assert_allclose(dxf_pipeline.summarize(geometry).bounds, [[-2, -1], [0, 0]], atol=1e-12)
+
+
+def test_entity_count_without_inserts():
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    for x in range(3):
+        msp.add_line((x, 0), (x, 1))
+    msp.add_circle((10, 10), 2)
+
+    geometry = dxf_pipeline.collect_geometry(doc.modelspace())
+
+    assert geometry.entity_count == 4
+    assert len(geometry.edge_starts) == 3
+    assert len(geometry.circles) == 1
+
+
+def test_entity_count_counts_placed_block_entities_once():
+    doc = ezdxf.new()
+    block = doc.blocks.new("PART")
+    block.add_line((0, 0), (1, 0))
+    block.add_circle((0, 0), 1)
+    msp = doc.modelspace()
+    msp.add_line((0, 0), (0, 5))
+    msp.add_blockref("PART", (10, 0))
+    msp.add_blockref("PART", (20, 0))
+
+    geometry = dxf_pipeline.collect_geometry(doc.modelspace())
+
+    # One modelspace line plus two copies of a two-entity block; the INSERTs themselves don't count
+    assert geometry.entity_count == 5
+    assert len(geometry.edge_starts) == 3
+    np.testing.assert_allclose(np.sort(geometry.circles[:, 0]), [10, 20])
@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from notifier import Notifier
+
+
+@pytest.fixture
+async def shared_redis(redis_pool, monkeypatch):
+    """Point main at the fake Redis, with a running pub/sub listener; yields the notifier."""
+    notifier = Notifier(redis_pool, "geometry:notify:")
+    monkeypatch.setattr(main, "redis_pool", redis_pool)
+    monkeypatch.setattr(main, "notifier", notifier)
+    await notifier.start()
+    while not await redis_pool.client.pubsub_numpat():
+        await asyncio.sleep(0.01)
+    yield notifier
+    await notifier.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_polling(monkeypatch):
+    # Waiters must be woken by notifications, not by the fallback re-read
+    monkeypatch.setattr(main, "JOB_WAIT_POLL_SECONDS", 30)
+
+
+async def finish_elsewhere(job_id):
+    """Complete a job the way another worker process would: in Redis, plus a notification."""
+    job = {"status": "completed", "progress": 100, "stage": None, "result": {"risk_score": 0.1}}
+    async with main.redis_pool.client.pipeline(transaction=False) as pipe:
+        pipe.setex(f"job:{job_id}", 60, json.dumps(job))
+        pipe.publish(main.notifier.channel_name(f"job:{job_id}"), "completed")
+        await pipe.execute()
+
+
+async def started_job():
+    job_id = main.new_job_id()
+    await main.update_job_status(job_id, "processing", None, progress=30, stage="analyzing")
+    return job_id
+
+
+async def test_long_poll_wakes_on_local_update():
+    job_id = await started_job()
+    poll = asyncio.create_task(main.get_job_status(job_id, wait=30))
+    await asyncio.sleep(0.05)
+    assert not poll.done()
+
+    await main.update_job_status(job_id, "completed", {"risk_score": 0.1})
+
+    assert (await asyncio.wait_for(poll, 5))["status"] == "completed"
+
+
+async def test_long_poll_wakes_on_update_from_another_process(shared_redis):
+    job_id = await started_job()
+    poll = asyncio.create_task(main.get_job_status(job_id, wait=30))
+    await asyncio.sleep(0.05)
+    assert not poll.done()
+
+    await finish_elsewhere(job_id)
+
+    assert (await asyncio.wait_for(poll, 5))["status"] == "completed"
+    assert shared_redis.stats()["received"] >= 1
+
+
+async def test_long_poll_returns_current_status_when_wait_is_over():
+    job_id = await started_job()
+
+    assert (await main.get_job_status(job_id, wait=0.05))["status"] == "processing"
+
+
+async def test_event_stream_ends_with_terminal_status(shared_redis):
+    job_id = await started_job()
+    response = await main.stream_job_status(job_id)
+
+    async def read_events():
+        events = []
+        async for chunk in response.body_iterator:
+            event, data = chunk.strip().split("\n")
+            events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+        return events
+
+    reader = asyncio.create_task(read_events())
+    await asyncio.sleep(0.05)
+    assert not reader.done()
+
+    await finish_elsewhere(job_id)
+
+    events = await asyncio.wait_for(reader, 5)
+    assert [(event, data["status"]) for event, data in events] == [
+        ("status", "processing"), ("status", "completed")
+    ]
+    assert events[-1][1]["result"] == {"risk_score": 0.1}
+
+
+async def test_event_stream_of_unknown_job(shared_redis):
+    with pytest.raises(HTTPException) as raised:
+        await main.stream_job_status(main.new_job_id())
+
+    assert raised.value.status_code == 404
+
+
+async def test_bulk_status_reads_missing_jobs_in_one_mget(shared_redis, monkeypatch):
+    local_job = await started_job()
+    remote_job, unknown_job = main.new_job_id(), main.new_job_id()
+    await main.redis_pool.client.set(f"job:{remote_job}", json.dumps({"status": "queued"}))
+    mget = main.redis_pool.client.mget
+    calls = []
+
+    async def counting_mget(keys):
+        calls.append(keys)
+        return await mget(keys)
+
+    monkeypatch.setattr(main.redis_pool.client, "mget", counting_mget)
+    request = main.JobStatusRequest(job_ids=[local_job, remote_job, unknown_job, remote_job])
+
+    jobs = (await main.get_jobs_status(request))["jobs"]
+
+    assert list(jobs) == [local_job, remote_job, unknown_job]
+    assert (jobs[local_job]["status"], jobs[remote_job]["status"], jobs[unknown_job]) == (
+        "processing", "queued", None
+    )
+    assert calls == [[f"job:{remote_job}", f"job:{unknown_job}"]]
+
+    # The remote job is now cached locally
+    await main.get_jobs_status(main.JobStatusRequest(job_ids=[local_job, remote_job]))
+    assert len(calls) == 1
+
+
+async def test_bulk_status_limits():
+    too_many = main.JobStatusRequest(job_ids=[str(i) for i in range(main.JOB_STATUS_MAX_IDS + 1)])
+    with pytest.raises(HTTPException) as raised:
+        await main.get_jobs_status(too_many)
+    assert raised.value.status_code == 413
+
+    # Jobs missing from the local tier need Redis
+    with pytest.raises(HTTPException) as raised:
+        await main.get_jobs_status(main.JobStatusRequest(job_ids=[main.new_job_id()]))
+    assert raised.value.status_code == 503
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from job_queue import JobQueue, RequeueJob
+
+
+def make_queue(redis_pool, handler, consumers=1):
+    queue = JobQueue(redis_pool, "test-queue", consumers, handler)
+    queue.HEARTBEAT_TTL = 1
+    queue.POP_TIMEOUT = 0.1
+    queue.REQUEUE_DELAY = 0
+    return queue
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+async def test_completed_job_is_removed(redis_pool):
+    handled = []
+
+    async def handler(payload):
+        handled.append(payload)
+
+    queue = make_queue(redis_pool, handler)
+    await queue.start()
+    try:
+        await queue.enqueue({"job_id": "a"})
+        await wait_for(lambda: handled)
+        await wait_for(lambda: queue.stats()["processed"] == 1)
+    finally:
+        await queue.stop()
+
+    assert handled == [{"job_id": "a"}]
+    client = redis_pool.client
+    assert await client.llen(queue.pending_key) == 0
+    assert not [key async for key in client.scan_iter(match="test-queue:processing:*") if await client.llen(key)]
+
+
+async def test_requeued_job_runs_again(redis_pool):
+    attempts = []
+
+    async def handler(payload):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise RequeueJob()
+
+    queue = make_queue(redis_pool, handler)
+    await queue.start()
+    try:
+        await queue.enqueue({"job_id": "a"})
+        await wait_for(lambda: queue.stats()["processed"] == 1)
+    finally:
+        await queue.stop()
+
+    assert attempts == [{"job_id": "a"}] * 2
+    assert queue.stats()["requeued"] == 1
+
+
+async def test_job_of_killed_consumer_is_requeued(redis_pool):
+    started = asyncio.Event()
+
+    async def hang(payload):
+        started.set()
+        await asyncio.Event().wait()
+
+    handled = []
+
+    async def handler(payload):
+        handled.append(payload)
+
+    dying = make_queue(redis_pool, hang)
+    survivor = make_queue(redis_pool, handler)
+    await dying.start()
+    try:
+        await dying.enqueue({"job_id": "a"})
+        await asyncio.wait_for(started.wait(), 5)
+        # Already running when the other consumer dies: only periodic recovery notices
+        await survivor.start()
+        assert survivor.consumer_prefix != dying.consumer_prefix
+        # Killed mid-job: nothing is acknowledged and the heartbeat is left to expire
+        await dying.stop()
+        await wait_for(lambda: handled)
+    finally:
+        await dying.stop()
+        await survivor.stop()
+
+    assert handled == [{"job_id": "a"}]
+    assert survivor.stats()["recovered"] == 1
@@ -0,0 +1,72 @@
+import json
+
+import main
+from local_cache import LocalCache
+
+
+def test_evicts_least_recently_used_beyond_byte_limit():
+    cache = LocalCache(max_entries=10, max_bytes=100)
+    cache.set("a", "A", 40)
+    cache.set("b", "B", 40)
+    cache.get("a")
+
+    cache.set("c", "C", 40)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats()["bytes"] == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_replacing_an_entry_releases_its_bytes():
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", "A", 60)
+    cache.set("a", "AA", 30)
+    cache.set("b", "B", 60)
+
+    assert (cache.get("a"), cache.get("b")) == ("AA", "B")
+    assert cache.stats()["evictions"] == 0
+
+
+def test_oversized_values_are_not_cached():
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", "A", 40)
+
+    cache.set("big", "BIG", 101)
+
+    assert cache.get("big") is None
+    assert cache.get("a") == "A"
+
+
+def test_expired_entries_are_dropped():
+    cache = LocalCache(default_ttl=0)
+    cache.set("short", "S", 10)
+    cache.set("long", "L", 10, ttl=60)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == "L"
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["expirations"]) == (1, 10, 1)
+
+
+async def test_job_status_change_replaces_the_local_copy():
+    job_id = main.new_job_id()
+    await main.update_job_status(job_id, "processing", None, progress=30)
+    assert (await main.read_job(job_id))["status"] == "processing"
+
+    await main.update_job_status(job_id, "completed", {"risk_score": 0.1})
+
+    job = await main.read_job(job_id)
+    assert (job["status"], job["progress"]) == ("completed", 100)
+
+
+async def test_fresh_read_replaces_a_stale_local_copy(redis_pool, monkeypatch):
+    monkeypatch.setattr(main, "redis_pool", redis_pool)
+    job_id = main.new_job_id()
+    await main.update_job_status(job_id, "processing", None, progress=30)
+    # Another worker process finishes the job; only Redis has the new status
+    await redis_pool.client.set(f"job:{job_id}", json.dumps({"status": "completed", "progress": 100}))
+
+    assert (await main.read_job(job_id))["status"] == "processing"
+    assert (await main.read_job(job_id, fresh=True))["status"] == "completed"
+    assert (await main.read_job(job_id))["status"] == "completed"
@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import mesh_cache
+from mesh_cache import MeshCache
+
+
+def triangles(seed, count=100):
+    return np.random.default_rng(seed).random((count, 3, 3))
+
+
+def test_round_trip(tmp_path):
+    cache = MeshCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    soup = triangles(0)
+    cache.put("abc", "step", {"triangles": soup}, {"volume": 12.0})
+    cache.put("abc", "step", {"triangles": triangles(1)}, {"bbox": [1, 2, 3]})
+
+    artifact = cache.get("abc", "step")
+
+    # Arrays already stored are kept; values are merged
+    np.testing.assert_array_equal(artifact.triangles, soup)
+    assert not artifact.triangles.flags.writeable
+    assert artifact.merged is None
+    assert artifact.values == {"volume": 12.0, "bbox": [1, 2, 3]}
+    assert cache.get("abc", "stl") is None
+
+
+def test_evicts_least_recently_used_beyond_byte_limit(tmp_path):
+    cache = MeshCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    cache.put("a", "stl", {"triangles": triangles(0)})
+    entry_bytes = cache.stats()["bytes"]
+    cache.max_bytes = int(2.5 * entry_bytes)
+    os.utime(cache._entry_path("a", "stl"), (1000, 1000))
+    cache.put("b", "stl", {"triangles": triangles(1)})
+    os.utime(cache._entry_path("b", "stl"), (2000, 2000))
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a", "stl") is not None
+    cache.put("c", "stl", {"triangles": triangles(2)})
+
+    assert cache.get("b", "stl") is None
+    assert cache.get("a", "stl") is not None
+    assert cache.get("c", "stl") is not None
+    assert cache.stats() == {"entries": 2, "bytes": 2 * entry_bytes, "max_bytes": cache.max_bytes}
+
+
+def test_entry_evicted_while_reading_is_a_miss(tmp_path, monkeypatch):
+    cache = MeshCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    cache.put("abc", "stl", {"triangles": triangles(0), "vertices": triangles(1)[0]})
+    load = np.load
+
+    def load_after_eviction(path, **kwargs):
+        # Another process evicts the entry between listing and loading it
+        shutil.rmtree(cache._entry_path("abc", "stl"), ignore_errors=True)
+        return load(path, **kwargs)
+
+    monkeypatch.setattr(mesh_cache.np, "load", load_after_eviction)
+
+    assert cache.get("abc", "stl") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = MeshCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    cache.put("abc", "stl", {"triangles": triangles(0)})
+    with open(os.path.join(cache._entry_path("abc", "stl"), "triangles.npy"), "wb") as f:
+        f.write(b"not an array")
+
+    assert cache.get("abc", "stl") is None
+    assert not os.path.exists(cache._entry_path("abc", "stl"))
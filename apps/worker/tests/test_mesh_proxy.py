@@ -0,0 +1,32 @@
+import numpy as np
+import trimesh
+
+import mesh_proxy
+from stl_reader import STLTriangles
+
+
+def decimate(mesh, max_triangles):
+    stl = STLTriangles(np.asarray(mesh.triangles))
+    return mesh_proxy.decimate(stl, stl.summarize(), max_triangles)
+
+
+def test_mesh_within_budget_is_unchanged():
+    # Cells are far smaller than the box, so every corner keeps a cell of its own
+    proxy = decimate(trimesh.creation.box((10, 10, 10)), 1000)
+
+    assert proxy.source_triangle_count == 12
+    assert proxy.triangle_count == 12
+    assert proxy.max_deviation == 0
+    np.testing.assert_allclose(proxy.mesh.volume, 1000)
+
+
+def test_sphere_is_decimated_to_budget():
+    mesh = trimesh.creation.icosphere(subdivisions=5, radius=10)
+    proxy = decimate(mesh, 2000)
+
+    assert proxy.source_triangle_count == len(mesh.faces)
+    assert 0 < proxy.triangle_count <= 2000
+    # A vertex moves at most to the far corner of its cell
+    assert 0 < proxy.max_deviation <= proxy.cell_size * np.sqrt(3)
+    radii = np.linalg.norm(proxy.mesh.vertices, axis=1)
+    assert np.all(np.abs(radii - 10) <= proxy.max_deviation + 1e-9)
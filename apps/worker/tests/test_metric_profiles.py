@@ -0,0 +1,12 @@
+from geometry_analyzer import requested_metrics
+
+
+def test_explicit_metrics_do_not_add_orientation():
+    assert requested_metrics({"metrics": ["volume", "bbox"]}) == ("volume", "surface_area", "bbox")
+
+
+def test_orientation_only_under_full_dfm_or_when_listed():
+    assert "orientation" not in requested_metrics({"profile": "instant_quote"})
+    assert "orientation" in requested_metrics({"profile": "full_dfm"})
+    assert "orientation" in requested_metrics(None)
+    assert "orientation" in requested_metrics({"metrics": ["orientation"]})
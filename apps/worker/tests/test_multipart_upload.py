@@ -0,0 +1,77 @@
+import hashlib
+
+import pytest
+
+from geometry_analyzer import FileSink
+from multipart_upload import MAX_FIELD_BYTES, MultipartUpload
+
+BOUNDARY = "----boundary1234"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def body(*parts) -> bytes:
+    """Encode (name, value, filename or None) parts."""
+    chunks = []
+    for name, value, filename in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        chunks.append(f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + value + b"\r\n")
+    return b"".join(chunks) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def upload(data: bytes, chunk_size: int = 7) -> MultipartUpload:
+    opened = []
+
+    def open_file(filename):
+        opened.append(filename)
+        return FileSink()
+
+    parser = MultipartUpload(CONTENT_TYPE, "file", open_file)
+    # Small chunks split boundaries and headers between writes
+    for start in range(0, len(data), chunk_size):
+        parser.write(data[start:start + chunk_size])
+    assert len(opened) <= 1
+    return parser
+
+
+def test_fields_and_file_are_separated():
+    content = bytes(range(256)) * 40 + b"\r\n--not-a-boundary\r\n"
+    parser = upload(body(
+        ("file_type", b"stl", None),
+        ("file", content, "part.stl"),
+        ("process_type", b"3d_fff", None),
+    ))
+    received = parser.finish()
+
+    assert parser.fields == {"file_type": "stl", "process_type": "3d_fff"}
+    assert parser.late_fields == {"process_type"}
+    assert parser.filename == "part.stl"
+    assert received.data == content
+    assert received.size_bytes == len(content)
+    assert received.sha256 == hashlib.sha256(content).hexdigest()
+
+
+def test_missing_file_part():
+    parser = upload(body(("file_type", b"stl", None)))
+
+    assert not parser.file_started
+    with pytest.raises(ValueError, match="No complete 'file'"):
+        parser.finish()
+
+
+def test_duplicate_file_part():
+    with pytest.raises(ValueError, match="More than one"):
+        upload(body(("file", b"a", "a.stl"), ("file", b"b", "b.stl")))
+
+
+def test_oversized_field():
+    with pytest.raises(ValueError, match="exceeds"):
+        upload(body(("options", b"x" * (MAX_FIELD_BYTES + 1), None)), chunk_size=4096)
+
+
+def test_content_type_must_be_multipart():
+    with pytest.raises(ValueError, match="boundary"):
+        MultipartUpload("multipart/form-data", "file", lambda filename: FileSink())
+    with pytest.raises(ValueError):
+        MultipartUpload("application/json", "file", lambda filename: FileSink())
@@ -0,0 +1,37 @@
+import numpy as np
+import trimesh
+
+import orientation
+from stl_reader import OVERHANG_ANGLE_DEGREES, STLTriangles
+
+
+def optimize(mesh):
+    stl = STLTriangles(np.asarray(mesh.triangles))
+    summary = stl.summarize()
+    return summary, orientation.optimize_orientation(stl, summary)
+
+
+def test_box_needs_no_support():
+    summary, (best, current) = optimize(trimesh.creation.box((10, 20, 30)))
+
+    # Resting on a face: nothing hangs over, and the shortest build wins
+    assert best.support_volume == 0
+    np.testing.assert_allclose(best.build_height, 10)
+    np.testing.assert_allclose(np.abs(best.direction), [1, 0, 0], atol=1e-9)
+    np.testing.assert_allclose(current.build_height, 30)
+    # Side walls and bottom of the file's own orientation, as the overhang_area metric counts them
+    assert current.overhang_area == summary.overhang_area
+    np.testing.assert_allclose(current.overhang_area, 2 * 10 * 30 + 2 * 20 * 30 + 10 * 20)
+
+
+def test_sampled_mesh_is_measured_on_every_face():
+    mesh = trimesh.creation.icosphere(subdivisions=6, radius=10)
+    assert len(mesh.faces) > orientation.SAMPLE_FACES
+    summary, (best, current) = optimize(mesh)
+
+    cosines = mesh.face_normals @ best.direction
+    expected = mesh.area_faces[cosines < np.cos(np.radians(OVERHANG_ANGLE_DEGREES))].sum()
+    np.testing.assert_allclose(best.overhang_area, expected, rtol=1e-6)
+    heights = mesh.vertices @ best.direction
+    np.testing.assert_allclose(best.build_height, heights.max() - heights.min(), rtol=1e-6)
+    assert current.overhang_area == summary.overhang_area
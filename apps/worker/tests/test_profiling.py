@@ -0,0 +1,78 @@
+import os
+
+import pytest
+import trimesh
+
+import main
+from geometry_analyzer import DownloadedFile
+from profiling import Profile, ProfileStore
+
+
+class InlinePool:
+    """Runs analyzer calls on the test's thread instead of a worker."""
+
+    async def run(self, method, *args):
+        return getattr(main.analyzer, method)(*args)
+
+
+def save_profile(store, created):
+    profile_id = store.save(Profile(stacks={"main;analyze": 12.0}, samples=1, duration=0.01), {})
+    # Eviction goes by metadata mtime; make the order explicit
+    os.utime(store._path(profile_id, "json"), (created, created))
+    return profile_id
+
+
+def test_store_keeps_only_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_entries=3)
+    ids = [save_profile(store, 1000 + i) for i in range(5)]
+
+    assert {metadata["id"] for metadata in store.list()} == set(ids[2:])
+    assert store.get(ids[0]) is None
+    assert store.collapsed_path(ids[0]) is None
+    with open(store.collapsed_path(ids[4])) as f:
+        assert f.read() == "main;analyze 12\n"
+
+
+def test_store_rejects_malformed_ids(tmp_path):
+    store = ProfileStore(str(tmp_path))
+
+    assert store.get("../secrets") is None
+    assert store.collapsed_path("../secrets") is None
+
+
+@pytest.fixture
+def profile_store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path))
+    monkeypatch.setattr(main, "profile_store", store)
+    monkeypatch.setattr(main, "PROFILE_SAMPLE_RATE", 1.0)
+    return store
+
+
+async def analyze(profile=False):
+    data = trimesh.creation.box(extents=(10, 20, 30)).export(file_type="stl")
+    request = main.GeometryAnalysisRequest(file_url="https://files.example.com/box.stl",
+                                           file_type="stl", process_type="3d_fff")
+    downloaded = DownloadedFile(sha256=None, size_bytes=len(data), data=data)
+    results = await main.analyze_targets(request, [request], downloaded, InlinePool(), profile=profile)
+    return results["3d_fff"]["profile_id"]
+
+
+async def test_slow_analyses_are_captured(profile_store, monkeypatch):
+    monkeypatch.setattr(main, "PROFILE_SLOW_THRESHOLD_SECONDS", 0)
+
+    profile_id = await analyze()
+
+    metadata = profile_store.get(profile_id)
+    assert metadata["file_type"] == "stl"
+    assert metadata["requested"] is False
+    assert await main.list_profiles() == {"profiles": [metadata]}
+
+
+async def test_fast_analyses_are_only_captured_on_request(profile_store, monkeypatch):
+    monkeypatch.setattr(main, "PROFILE_SLOW_THRESHOLD_SECONDS", 3600)
+
+    assert await analyze() is None
+    assert profile_store.list() == []
+
+    profile_id = await analyze(profile=True)
+    assert (await main.get_profile(profile_id))["requested"] is True
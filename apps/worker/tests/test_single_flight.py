@@ -0,0 +1,72 @@
+import asyncio
+
+from notifier import Notifier
+from single_flight import SingleFlight
+
+
+def make_flight(redis_pool, lease_seconds=5.0):
+    return SingleFlight(redis_pool, Notifier(redis_pool, "test:notify:"), lease_seconds, poll_interval=0.02)
+
+
+async def test_local_callers_share_the_leaders_result(redis_pool):
+    flight = make_flight(redis_pool)
+    lease = await flight.acquire("key")
+
+    assert lease is not None
+    assert await flight.acquire("key") is None
+    waiters = [asyncio.create_task(flight.wait("key", lambda: None)) for _ in range(3)]
+    await asyncio.sleep(0)
+    flight.resolve(lease, "result")
+    await flight.release(lease)
+
+    assert await asyncio.gather(*waiters) == ["result"] * 3
+    assert flight.stats() == {"in_flight": 0, "led": 1, "coalesced": 3, "takeovers": 0}
+
+
+async def test_callers_elsewhere_look_the_result_up(redis_pool):
+    # Two SingleFlights on one Redis stand for two worker processes
+    leader, follower = make_flight(redis_pool), make_flight(redis_pool)
+    store = {}
+
+    async def lookup():
+        return store.get("key")
+
+    lease = await leader.acquire("key")
+    assert await follower.acquire("key") is None
+    waiter = asyncio.create_task(follower.wait("key", lookup))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    store["key"] = "result"
+    await leader.release(lease)
+
+    assert await waiter == "result"
+    assert follower.stats()["takeovers"] == 0
+
+
+async def test_failed_leader_lets_a_waiter_take_over(redis_pool):
+    leader, follower = make_flight(redis_pool), make_flight(redis_pool)
+
+    async def lookup():
+        return None
+
+    lease = await leader.acquire("key")
+    waiter = asyncio.create_task(follower.wait("key", lookup))
+    await asyncio.sleep(0.05)
+    await leader.release(lease)
+
+    assert await waiter is None
+    assert follower.stats()["takeovers"] == 1
+    assert await follower.acquire("key") is not None
+
+
+async def test_expired_lease_is_not_released_by_its_old_leader(redis_pool):
+    leader, follower = make_flight(redis_pool, lease_seconds=0.1), make_flight(redis_pool)
+
+    stale = await leader.acquire("key")
+    await asyncio.sleep(0.15)
+    lease = await follower.acquire("key")
+    assert lease is not None
+    await leader.release(stale)
+
+    assert await redis_pool.client.get("geometry:lease:key") == lease.token.encode()
@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+import step_engine
+
+gmsh = pytest.importorskip("gmsh")
+
+
+def plate(occ):
+    occ.addBox(0, 0, 0, 40, 30, 10)
+
+
+def rod(occ):
+    occ.addCylinder(0, 0, 0, 0, 0, 50, 5)
+
+
+def volume(model):
+    return sum(model.occ.getMass(dim, tag) for dim, tag in model.occ.getEntities(3))
+
+
+@pytest.fixture
+def initialized(monkeypatch):
+    """Calls of gmsh.initialize once the session is running."""
+    with step_engine.session.lock:
+        step_engine.session._start()
+    calls = []
+    initialize = gmsh.initialize
+
+    def counting_initialize(*args, **kwargs):
+        calls.append(args)
+        return initialize(*args, **kwargs)
+
+    monkeypatch.setattr(gmsh, "initialize", counting_initialize)
+    return calls
+
+
+def test_consecutive_jobs_share_one_clean_session(step_file, initialized):
+    plate_path, rod_path = step_file("plate", plate), step_file("rod", rod)
+
+    with step_engine.session.open(plate_path) as opened:
+        assert len(opened.model.getEntities(2)) == 6
+        assert volume(opened.model) == pytest.approx(12000)
+        opened.model.mesh.generate(2)
+        assert len(step_engine.surface_triangles(opened)) > 0
+
+    with step_engine.session.open(rod_path) as opened:
+        # Nothing of the plate is left: not its faces, not its surface mesh
+        assert len(opened.model.getEntities(2)) == 3
+        assert volume(opened.model) == pytest.approx(math.pi * 25 * 50)
+        assert len(step_engine.surface_triangles(opened)) == 0
+
+    assert gmsh.model.getEntities() == []
+    assert initialized == []
+
+
+def test_failed_clear_reinitializes_gmsh(step_file, initialized, monkeypatch):
+    path = step_file("plate", plate)
+    clear = gmsh.clear
+    failures = [RuntimeError("clear failed")]
+
+    def failing_clear():
+        if failures:
+            raise failures.pop()
+        clear()
+
+    monkeypatch.setattr(gmsh, "clear", failing_clear)
+
+    with step_engine.session.open(path):
+        pass
+    assert step_engine.session._gmsh is None
+
+    with step_engine.session.open(path) as opened:
+        assert volume(opened.model) == pytest.approx(12000)
+    assert len(initialized) == 1
+
+
+def test_failed_import_leaves_the_session_usable(step_file, tmp_path, initialized):
+    path = step_file("plate", plate)
+    broken = tmp_path / "broken.step"
+    broken.write_text("not a STEP file")
+
+    with pytest.raises(Exception):
+        with step_engine.session.open(str(broken)):
+            pass
+
+    with step_engine.session.open(path) as opened:
+        assert len(opened.model.getEntities(3)) == 1
+    assert initialized == []
@@ -0,0 +1,72 @@
+import pytest
+
+import step_engine
+from geometry_analyzer import GeometryAnalyzer
+from step_features import extract_features
+
+HOLE_DIAMETER = 0.8
+FILLET_RADIUS = 0.5
+
+
+def notched_plate(fillet_radius=None):
+    """
+    40x30x10 plate with a vertical through hole and a notch cut out of one
+    corner; the notch leaves one vertical internal corner, optionally filleted.
+    """
+    def build(occ):
+        plate = occ.addBox(0, 0, 0, 40, 30, 10)
+        hole = occ.addCylinder(10, 15, -1, 0, 0, 12, HOLE_DIAMETER / 2)
+        notch = occ.addBox(20, 15, -1, 25, 20, 12)
+        (part,), _ = occ.cut([(3, plate)], [(3, hole), (3, notch)])
+        if fillet_radius:
+            corner = occ.getEntitiesInBoundingBox(19.9, 14.9, -0.1, 20.1, 15.1, 10.1, dim=1)
+            occ.fillet([part[1]], [tag for _, tag in corner], [fillet_radius])
+    return build
+
+
+@pytest.fixture
+def sharp_part(step_file):
+    return step_file("sharp", notched_plate())
+
+
+@pytest.fixture
+def filleted_part(step_file):
+    return step_file("filleted", notched_plate(FILLET_RADIUS))
+
+
+def features_of(path):
+    with step_engine.session.open(path) as gmsh:
+        return extract_features(gmsh)
+
+
+def test_hole_and_sharp_corner(sharp_part):
+    features = features_of(sharp_part)
+
+    assert len(features.holes) == 1
+    hole = features.holes[0]
+    assert hole.diameter == pytest.approx(HOLE_DIAMETER, abs=1e-3)
+    assert hole.depth == pytest.approx(10, abs=1e-3)
+    assert hole.vertical
+    assert features.fillet_radii == []
+    assert features.internal_corner_radii == []
+    assert features.sharp_internal_corners == 1
+
+
+def test_filleted_corner(filleted_part):
+    features = features_of(filleted_part)
+
+    assert len(features.holes) == 1
+    assert features.fillet_radii == [pytest.approx(FILLET_RADIUS, abs=1e-3)]
+    assert features.internal_corner_radii == [pytest.approx(FILLET_RADIUS, abs=1e-3)]
+    assert features.sharp_internal_corners == 0
+
+
+@pytest.mark.parametrize("part, corner_issue", [
+    ("sharp_part", "sharp_corners"),
+    ("filleted_part", "small_internal_radius"),
+])
+def test_features_drive_cnc_issues(request, part, corner_issue):
+    metrics, issues = GeometryAnalyzer().analyze_step(request.getfixturevalue(part), "cnc_3axis")
+
+    assert metrics.holes_count == 1
+    assert {issue.type for issue in issues} == {"small_holes", "deep_holes", corner_issue}
@@ -0,0 +1,58 @@
+import numpy as np
+import trimesh
+
+from stl_reader import STLTriangles, read_binary_stl
+
+
+def box_stl(extents=(10, 20, 30)) -> bytes:
+    return trimesh.creation.box(extents).export(file_type="stl")
+
+
+def test_binary_stl_is_read_in_place(tmp_path):
+    data = box_stl()
+    path = tmp_path / "box.stl"
+    path.write_bytes(data)
+
+    records = read_binary_stl(str(path))
+    stl = STLTriangles.load(str(path))
+
+    assert isinstance(records, np.memmap)
+    assert len(records) == 12
+    assert stl.file_view
+    np.testing.assert_array_equal(stl.triangles, read_binary_stl(data)["vertices"])
+
+
+def test_ascii_stl_falls_back_to_trimesh():
+    data = trimesh.creation.box((10, 20, 30)).export(file_type="stl_ascii").encode()
+
+    stl = STLTriangles.load(data)
+
+    assert read_binary_stl(data) is None
+    assert not stl.file_view
+    assert stl.triangle_count == 12
+
+
+def test_size_mismatch_is_not_binary():
+    assert read_binary_stl(box_stl() + b"\0") is None
+    assert read_binary_stl(b"solid") is None
+
+
+def test_summary_of_a_box():
+    # Small chunks exercise the accumulation across chunks
+    summary = STLTriangles.load(box_stl()).summarize(chunk_size=5)
+
+    assert summary.triangle_count == 12
+    np.testing.assert_allclose(summary.volume, 10 * 20 * 30, rtol=1e-6)
+    np.testing.assert_allclose(summary.area, 2 * (10 * 20 + 10 * 30 + 20 * 30), rtol=1e-6)
+    np.testing.assert_allclose(summary.bounds, [[-5, -10, -15], [5, 10, 15]])
+    # Four sides and the bottom point more than 45 degrees away from +Z
+    np.testing.assert_allclose(summary.overhang_area, 2 * 10 * 30 + 2 * 20 * 30 + 10 * 20, rtol=1e-6)
+
+
+def test_watertightness():
+    stl = STLTriangles.load(box_stl())
+    open_box = STLTriangles(np.asarray(stl.triangles)[1:])
+
+    assert stl.is_watertight()
+    assert not open_box.is_watertight()
+    assert stl.merged_arrays() is None
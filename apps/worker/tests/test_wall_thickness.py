@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import trimesh
+
+from geometry_analyzer import (
+    WALL_THICKNESS_FALLBACK_MAX_SAMPLES, WALL_THICKNESS_MAX_SAMPLES, WALL_THICKNESS_MIN_SAMPLES, GeometryAnalyzer
+)
+
+
+def hollow_cube(outer: float, wall: float) -> trimesh.Trimesh:
+    """Closed box with a box-shaped cavity, walls ``wall`` thick."""
+    cavity = trimesh.creation.box((outer - 2 * wall,) * 3)
+    cavity.invert()
+    return trimesh.util.concatenate([trimesh.creation.box((outer,) * 3), cavity])
+
+
+def test_hollow_cube_wall_thickness():
+    stats = GeometryAnalyzer()._estimate_wall_thickness(hollow_cube(20, 2))
+
+    np.testing.assert_allclose(stats.min, 2, atol=1e-3)
+    # Most rays cross one wall; those starting within 2mm of an outer edge miss the cavity
+    np.testing.assert_allclose(stats.percentiles["p50"], 2, atol=1e-3)
+    assert stats.hit_count == stats.sample_count
+
+
+def test_solid_plate_thickness():
+    stats = GeometryAnalyzer()._estimate_wall_thickness(trimesh.creation.box((40, 40, 3)))
+
+    # Top and bottom faces (3200 of 3680 mm²) measure the 3mm plate
+    np.testing.assert_allclose(stats.min, 3, atol=1e-3)
+    np.testing.assert_allclose(stats.percentiles["p50"], 3, atol=1e-3)
+    assert stats.percentiles["p95"] == 40
+
+
+def test_sample_budget_follows_ray_engine(monkeypatch):
+    analyzer = GeometryAnalyzer()
+
+    monkeypatch.setattr(trimesh.ray, "has_embree", True)
+    assert analyzer._wall_thickness_sample_count(10 ** 6) == WALL_THICKNESS_MAX_SAMPLES
+    # The triangle intersector keeps the per-ray implementation's sample count
+    monkeypatch.setattr(trimesh.ray, "has_embree", False)
+    assert analyzer._wall_thickness_sample_count(10 ** 6) == WALL_THICKNESS_FALLBACK_MAX_SAMPLES
+    assert analyzer._wall_thickness_sample_count(100) == WALL_THICKNESS_MIN_SAMPLES
+
+
+def test_embree_intersector_is_selected():
+    # embreex is a requirement; where it installs, trimesh must pick it up
+    pytest.importorskip("embreex")
+    from trimesh.ray import ray_pyembree
+
+    assert trimesh.ray.has_embree
+    assert isinstance(trimesh.creation.box().ray, ray_pyembree.RayMeshIntersector)